@@ -0,0 +1,124 @@
+"""
+Amortization schedules, computed once per distinct loan.
+
+A fixed-rate loan is fully described by (principal, annual rate, term,
+payments per year), so its whole schedule (the balance after every
+payment) is computed once and kept in a bounded LRU cache. Balance,
+interest and principal lookups are then array indexing instead of
+re-deriving the payment and compounding on every call.
+
+Rentals, the new home and student loans use monthly schedules; the
+pharmacy seller note uses an annual one.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+SCHEDULE_CACHE_SIZE = 4096
+
+_cache: "OrderedDict[tuple, AmortSchedule]" = OrderedDict()
+
+
+@dataclass(frozen=True)
+class AmortSchedule:
+    """One loan's schedule; index k means "after k payments" (k = 0 is the start)."""
+    payment: float
+    balance: np.ndarray
+
+    @property
+    def n(self) -> int:
+        return len(self.balance) - 1
+
+    @property
+    def interest(self) -> np.ndarray:
+        """Interest in payment k (0 at k = 0)."""
+        return np.concatenate(([0.0], self.payment - self.principal_paid[1:]))
+
+    @property
+    def principal_paid(self) -> np.ndarray:
+        """Principal repaid by payment k (0 at k = 0)."""
+        return np.concatenate(([0.0], -np.diff(self.balance)))
+
+    def balance_after(self, k) -> np.ndarray:
+        return self.balance[np.clip(k, 0, self.n)]
+
+
+def _key(principal: float, annual_rate: float, years: int, periods_per_year: int) -> tuple:
+    return float(principal), float(annual_rate), int(years), int(periods_per_year)
+
+
+def _build(keys: list) -> list:
+    """Schedules for many loans in one closed-form pass: the level payment, then the balance after each payment."""
+    k = np.array(keys, dtype=float)
+    principal, annual_rate, years, per_year = k[:, 0:1], k[:, 1:2], k[:, 2:3].astype(int), k[:, 3:4].astype(int)
+    r = annual_rate / per_year
+    n = years * per_year
+    m = np.minimum(np.arange(int(n.max()) + 1)[None, :], n)
+    growth_n = (1 + r) ** n
+    growth = (1 + r) ** m
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pmt = np.where(r == 0, principal / n, principal * (r * growth_n) / (growth_n - 1))
+        pmt = np.where(principal <= 0, 0.0, pmt)
+        bal = np.where(r == 0, principal * (1 - m / n), principal * growth - pmt * ((growth - 1) / r))
+    bal = np.where(principal <= 0, 0.0, np.maximum(0.0, bal))
+    return [AmortSchedule(float(pmt[i, 0]), bal[i, :int(n[i, 0]) + 1]) for i in range(len(keys))]
+
+
+def _lookup(keys: list) -> list:
+    """Cached schedules for these keys, building every missing one in a single pass."""
+    missing = list(dict.fromkeys(key for key in keys if key not in _cache))
+    fresh = dict(zip(missing, _build(missing))) if missing else {}
+    out = []
+    for key in keys:
+        if key in fresh:
+            _cache[key] = fresh[key]
+        _cache.move_to_end(key)
+        out.append(_cache[key])
+        if len(_cache) > SCHEDULE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return out
+
+
+def schedule(principal: float, annual_rate: float, years: int, periods_per_year: int = 12) -> AmortSchedule:
+    """The schedule of one loan (annual_rate as a fraction)."""
+    return _lookup([_key(principal, annual_rate, years, periods_per_year)])[0]
+
+
+class ScheduleTable:
+    """
+    Schedules for an array of loans of any shape (e.g. properties, or runs x
+    properties). Distinct loans are looked up once; lookups broadcast back
+    to the input shape.
+    """
+
+    def __init__(self, principal, annual_rate, years, periods_per_year: int = 12):
+        principal, annual_rate, years = np.broadcast_arrays(
+            np.asarray(principal, dtype=float), np.asarray(annual_rate, dtype=float), np.asarray(years, dtype=int)
+        )
+        flat = np.stack([principal.ravel(), annual_rate.ravel(), years.ravel().astype(float)], axis=1)
+        # Rows as opaque 24-byte records: a 1-D unique is far cheaper than unique(axis=0)
+        rows = np.ascontiguousarray(flat).view(np.dtype((np.void, flat.itemsize * 3))).ravel()
+        unique, inverse = np.unique(rows, return_inverse=True)
+        unique = unique.view(float).reshape(-1, 3)
+        schedules = _lookup([_key(p, r, t, periods_per_year) for p, r, t in unique.tolist()])
+
+        self.index = inverse.reshape(principal.shape)
+        self.n = np.array([s.n for s in schedules], dtype=int)
+        width = int(self.n.max()) + 1 if len(schedules) else 1
+        self.balances = np.zeros((len(schedules), width))
+        for i, s in enumerate(schedules):
+            self.balances[i, :len(s.balance)] = s.balance
+        self.payments = np.array([s.payment for s in schedules], dtype=float)
+
+    def payment(self) -> np.ndarray:
+        """Payment per period, shaped like the loans."""
+        return self.payments[self.index]
+
+    def periods(self) -> np.ndarray:
+        """Number of payments in each loan's term, shaped like the loans."""
+        return self.n[self.index]
+
+    def balance_after(self, k) -> np.ndarray:
+        """Balance after k payments (clipped to the term); k broadcasts against the loans."""
+        return self.balances[self.index, np.clip(k, 0, self.n[self.index])]
@@ -1,98 +1,28 @@
+import os
+from typing import TYPE_CHECKING
+
 import streamlit as st
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
 
-st.set_page_config(page_title="Financial Freedom Timeline Planner", layout="wide")
-st.title("Financial Freedom Timeline Planner — Net Worth + Modes + Retirement + 10 Properties + HELOC + Liquidations + Pharmacy Buy-In")
+from batch import BATCH_COLUMNS
+from bootstrap import HISTORY_FREQUENCIES
+from charts import fan_chart_png, heatmap_png, line_chart_png, result_chart_tabs, tornado_png
+from engine import CURRENT_HOME_RENTAL, TIGHT_CASH_FLOW, PropertyInputs, Scenario, rounded
+from executor import SHARD_PATHS, run_sharded
+from incremental import IncrementalSimulator
+from monthly import RESOLUTIONS, simulate_monthly
+from montecarlo import DISTRIBUTIONS, FAN_COLUMNS, FAN_PERCENTILES, MonteCarloSpec
+from report import COLUMNAR_FORMATS, monte_carlo_export, report_csv, report_html, report_markdown, sweep_export
+from taxes import DEFAULT_TAX_YEAR, available_tax_years
+
+# pandas, matplotlib and the analysis modules (goal seek, optimizer,
+# sensitivity, sweep, property table I/O) are imported by the sections that
+# use them, so the page starts drawing before they load. See bench_startup.py.
+if TYPE_CHECKING:
+    import pandas as pd
 
-# -----------------------------
-# Helpers
-# -----------------------------
-def amort_payment(principal: float, annual_rate: float, years: int) -> float:
-    """Monthly payment (P&I) for fixed-rate amortizing loan."""
-    r = annual_rate / 12.0
-    n = years * 12
-    if principal <= 0:
-        return 0.0
-    if r == 0:
-        return principal / n
-    return principal * (r * (1 + r) ** n) / ((1 + r) ** n - 1)
-
-def mortgage_balance(principal: float, annual_rate: float, years: int, months_paid: int) -> float:
-    """Remaining balance after months_paid payments, fixed-rate fully amortizing."""
-    r = annual_rate / 12.0
-    n = years * 12
-    m = max(0, min(int(months_paid), n))
-    if principal <= 0:
-        return 0.0
-    if r == 0:
-        return principal * (1 - m / n)
-    pmt = amort_payment(principal, annual_rate, years)
-    bal = principal * (1 + r) ** m - pmt * (((1 + r) ** m - 1) / r)
-    return max(0.0, bal)
-
-def income_stream(base: float, growth_pct: float, year: int, start_year: int) -> float:
-    if year < start_year:
-        return 0.0
-    t = year - start_year
-    return float(base * ((1 + growth_pct / 100.0) ** t))
-
-def grow_balance(balance: float, annual_return_pct: float) -> float:
-    """Apply annual return to a balance (end-of-year style)."""
-    return float(balance * (1.0 + annual_return_pct / 100.0))
-
-def annual_amort_step(balance: float, annual_rate: float, annual_payment: float, extra_principal: float = 0.0):
-    """
-    One year amortization step (simple annual approximation).
-    Returns: (payment_effective, interest, principal_paid, end_balance)
-    """
-    if balance <= 0:
-        return 0.0, 0.0, 0.0, 0.0
-    interest = balance * annual_rate
-    scheduled_principal = max(0.0, annual_payment - interest)
-    total_principal = min(balance, scheduled_principal + max(0.0, extra_principal))
-    payment_effective = interest + total_principal
-    end_balance = max(0.0, balance - total_principal)
-    return payment_effective, interest, total_principal, end_balance
-
-def progressive_tax(taxable_income: float, brackets):
-    """
-    brackets: list of tuples (rate, lower, upper_or_None)
-    Returns tax amount.
-    """
-    ti = max(0.0, float(taxable_income))
-    tax = 0.0
-    for rate, lower, upper in brackets:
-        if ti <= lower:
-            continue
-        if upper is None:
-            amt = ti - lower
-        else:
-            amt = min(ti, upper) - lower
-        if amt > 0:
-            tax += amt * rate
-    return max(0.0, tax)
-
-def fica_employee_tax(
-    wages: float,
-    ss_wage_base: float,
-    ss_rate: float = 0.062,
-    medicare_rate: float = 0.0145,
-    addl_medicare_rate: float = 0.009,
-    addl_medicare_threshold: float = 250000.0
-):
-    """
-    Employee-side FICA approximation:
-      - SS: 6.2% up to wage base
-      - Medicare: 1.45% all wages
-      - Additional Medicare: 0.9% above threshold
-    """
-    w = max(0.0, float(wages))
-    ss_tax = min(w, ss_wage_base) * ss_rate
-    medicare_tax = w * medicare_rate
-    addl = max(0.0, w - addl_medicare_threshold) * addl_medicare_rate
-    return ss_tax + medicare_tax + addl
+st.set_page_config(page_title="Financial Freedom Timeline Planner", layout="wide")
+st.title("Financial Freedom Timeline Planner — Net Worth + Modes + Retirement + Properties + HELOC + Liquidations + Pharmacy Buy-In")
 
 # -----------------------------
 # Sidebar: Global settings + Modes
@@ -101,6 +31,8 @@ with st.sidebar:
     st.header("Global Settings")
     horizon_years = st.slider("Horizon (years)", 5, 40, 20, step=1)
     years = np.arange(0, horizon_years + 1)
+    resolution = st.radio("Resolution", RESOLUTIONS, horizontal=True,
+                          help="Monthly: cash, loan payments, rent and interest move month by month, then roll up to years.")
 
     st.divider()
     st.header("Modes")
@@ -127,7 +59,14 @@ with st.sidebar:
 
     st.divider()
     st.header("Portfolio Settings")
-    max_props = st.slider("Max properties", 1, 10, 10)
+    property_input = st.radio("Property input", ["Expanders", "Table"], horizontal=True,
+                              help="Table: one editable row per property, with CSV/Excel import and export.")
+    if property_input == "Expanders":
+        # Each expander is ~25 widgets sent on every rerun, so larger portfolios go in the table
+        max_props = st.number_input("Max properties", 1, 20, 10, step=1,
+                                    help="Up to 20 in expanders; use the Table input for larger portfolios.")
+    else:
+        max_props = 0
 
     st.divider()
     st.header("HELOC Assumptions")
@@ -137,6 +76,38 @@ with st.sidebar:
     st.header("Cash Behavior")
     reinvest_surplus = st.checkbox("Reinvest annual surplus into investable cash", value=True)
 
+    st.divider()
+    st.header("Monte Carlo")
+    monte_carlo = st.checkbox("Monte Carlo fan charts", value=False)
+    if monte_carlo:
+        mc_paths = st.number_input("Paths", 100, 100000, 10000, step=1000)
+        mc_seed = st.number_input("Seed", 0, 2**31 - 1, 42)
+        mc_workers = st.number_input(
+            "Worker processes", 1, os.cpu_count() or 1, os.cpu_count() or 1,
+            help=f"Paths run in shards of {SHARD_PATHS:,}, spread over up to this many processes. "
+                 "The results are the same for any count.",
+        )
+        mc_distribution = st.selectbox("Distribution", DISTRIBUTIONS)
+        mc_retirement_sd = st.slider("Retirement return SD (pts)", 0.0, 30.0, 12.0, 0.5)
+        mc_value_sd = st.slider("Property value growth SD (pts)", 0.0, 20.0, 5.0, 0.5)
+        mc_rent_sd = st.slider("Rent growth SD (pts)", 0.0, 10.0, 2.0, 0.5)
+        mc_pharmacy_sd = st.slider("Pharmacy profit growth SD (pts)", 0.0, 20.0, 5.0, 0.5)
+        mc_vacancy_sd = st.slider("Vacancy SD (pts)", 0.0, 10.0, 0.0, 0.5)
+        mc_property_corr = st.slider("Correlation between properties", 0.0, 1.0, 0.0, 0.05,
+                                     help="1.0 = one regional shock hits every rental the same way")
+        mc_value_rent_corr = st.slider("Value growth ↔ rent growth correlation", -0.95, 0.95, 0.0, 0.05)
+        mc_value_vacancy_corr = st.slider("Value growth ↔ vacancy correlation", -0.95, 0.95, 0.0, 0.05)
+        mc_rent_vacancy_corr = st.slider("Rent growth ↔ vacancy correlation", -0.95, 0.95, 0.0, 0.05)
+        mc_bootstrap = st.checkbox("Bootstrap returns from a history file", value=False)
+        if mc_bootstrap:
+            mc_history_file = st.text_input("History file (.csv or .npy)", "returns.csv")
+            mc_history_frequency = st.selectbox("History rows are", list(HISTORY_FREQUENCIES))
+            mc_block_years = st.number_input("Block length (years)", 1, 20, 5)
+        else:
+            mc_history_file = ""
+            mc_history_frequency = "Annual"
+            mc_block_years = 5
+
 # -----------------------------
 # Income (Gross -> Net)
 # -----------------------------
@@ -225,10 +196,17 @@ with est2:
         disabled=(tax_mode != "Estimate taxes (federal + optional state + optional FICA)")
     )
 with est3:
+    tax_years = available_tax_years()
     tax_year = st.selectbox(
         "Tax year tables (estimator)",
-        ["2026"],
-        index=0,
+        tax_years,
+        index=tax_years.index(DEFAULT_TAX_YEAR) if DEFAULT_TAX_YEAR in tax_years else 0,
+        disabled=(tax_mode != "Estimate taxes (federal + optional state + optional FICA)")
+    )
+    index_tax_tables = st.checkbox(
+        "Index brackets to expense growth (estimator)",
+        value=False,
+        help="Grows brackets, the standard deduction and the SS wage base each year by the expense growth rate.",
         disabled=(tax_mode != "Estimate taxes (federal + optional state + optional FICA)")
     )
 with est4:
@@ -239,53 +217,6 @@ with est4:
         disabled=(tax_mode != "Estimate taxes (federal + optional state + optional FICA)" or not include_fica)
     )
 
-# Offline 2026 tables (edit here if you want to update later)
-STD_DEDUCTION_2026 = {
-    "Single": 16100.0,
-    "Married Filing Separately": 16100.0,
-    "Married Filing Jointly": 32200.0,
-    "Head of Household": 24150.0,
-}
-BRACKETS_2026 = {
-    "Single": [
-        (0.10, 0, 12400),
-        (0.12, 12400, 50400),
-        (0.22, 50400, 105700),
-        (0.24, 105700, 201775),
-        (0.32, 201775, 256225),
-        (0.35, 256225, 640600),
-        (0.37, 640600, None),
-    ],
-    "Married Filing Jointly": [
-        (0.10, 0, 24800),
-        (0.12, 24800, 100800),
-        (0.22, 100800, 211400),
-        (0.24, 211400, 403550),
-        (0.32, 403550, 512450),
-        (0.35, 512450, 768700),
-        (0.37, 768700, None),
-    ],
-    "Head of Household": [
-        (0.10, 0, 17700),
-        (0.12, 17700, 67450),
-        (0.22, 67450, 105700),
-        (0.24, 105700, 201750),
-        (0.32, 201750, 256200),
-        (0.35, 256200, 640600),
-        (0.37, 640600, None),
-    ],
-    "Married Filing Separately": [
-        (0.10, 0, 12400),
-        (0.12, 12400, 50400),
-        (0.22, 50400, 105700),
-        (0.24, 105700, 201775),
-        (0.32, 201775, 256225),
-        (0.35, 256225, 384350),
-        (0.37, 384350, None),
-    ],
-}
-SS_WAGE_BASE_2026 = 184500.0
-
 # -----------------------------
 # Expenses
 # -----------------------------
@@ -348,11 +279,6 @@ with nh14:
 with nh15:
     new_home_selling_cost_pct = st.slider("Selling costs (% of value)", 0.0, 12.0, 6.0, 0.5, disabled=not (new_home_enabled and include_new_home_equity_in_networth))
 
-if new_home_enabled and compute_loan_from_price:
-    new_home_loan_amount_eff = max(0.0, float(new_home_purchase_price) * (1.0 - float(new_home_down_pct) / 100.0))
-else:
-    new_home_loan_amount_eff = float(new_home_loan_amount)
-
 # -----------------------------
 # Mortgage Prepay Savings (Optional)
 # -----------------------------
@@ -484,38 +410,6 @@ with sl3:
 with sl4:
     student_loan_start_year = st.number_input("Repayment starts in year", 0, horizon_years, 1)
 
-def student_loan_annual_payment(principal: float, annual_rate_pct: float, years_term: int) -> float:
-    r = (annual_rate_pct / 100.0) / 12.0
-    n = years_term * 12
-    if principal <= 0:
-        return 0.0
-    if r == 0:
-        return principal / max(years_term, 1)
-    pmt_m = principal * (r * (1 + r) ** n) / ((1 + r) ** n - 1)
-    return float(pmt_m * 12.0)
-
-student_loan_payment_annual = student_loan_annual_payment(
-    student_loan_balance0, student_loan_interest_rate, int(student_loan_years)
-)
-
-def student_loan_remaining(year: int) -> float:
-    if year < student_loan_start_year:
-        return float(student_loan_balance0)
-
-    r = (student_loan_interest_rate / 100.0) / 12.0
-    n = int(student_loan_years) * 12
-    pmt_m = (student_loan_payment_annual / 12.0)
-
-    months_paid = (year - student_loan_start_year + 1) * 12
-    months_paid = min(months_paid, n)
-
-    if r == 0:
-        bal = student_loan_balance0 - pmt_m * months_paid
-        return float(max(0.0, bal))
-
-    bal = student_loan_balance0 * (1 + r) ** months_paid - pmt_m * (((1 + r) ** months_paid - 1) / r)
-    return float(max(0.0, bal))
-
 # -----------------------------
 # Capital / reserves
 # -----------------------------
@@ -529,7 +423,7 @@ with cc2:
 # -----------------------------
 # Properties
 # -----------------------------
-st.subheader("Properties (up to 10) — Existing Property + HELOC + Liquidation")
+st.subheader("Properties — Existing Property + HELOC + Liquidation")
 st.caption(
     "Use 'Existing at Year 0' for your current home converting to a rental. "
     "That uses current value + current mortgage balance (no down payment deducted)."
@@ -537,561 +431,340 @@ st.caption(
 
 properties = []
 
-for i in range(max_props):
-    default_enabled = (i == 0)
-    default_buy_year = 0 if i == 0 else 2
-
-    with st.expander(f"Property {i+1}", expanded=(i == 0)):
-        top1, top2, top3, top4 = st.columns(4)
-        enabled = top1.checkbox("Enabled", value=default_enabled, key=f"p_enabled_{i}")
-        name = top2.text_input("Name", value=("Current Home → Rental" if i == 0 else f"Rental {i+1}"), key=f"p_name_{i}")
-        purchase_year = top3.number_input("Purchase year", 0, horizon_years, default_buy_year, key=f"p_buy_{i}")
-        liquidation_year = top4.number_input("Liquidation year (0 = never)", 0, horizon_years, 0, key=f"p_sell_{i}")
-
-        ex1, ex2, ex3 = st.columns(3)
-        is_existing = ex1.checkbox("Existing at Year 0 (already owned)", value=(i == 0), key=f"p_exist_{i}")
-        existing_value = ex2.number_input(
-            "Current market value (Year 0)",
-            0, 5000000,
-            292000 if i == 0 else 200000,
-            step=1000,
-            key=f"p_exist_val_{i}",
-            disabled=not is_existing
-        )
-        existing_mort_balance = ex3.number_input(
-            "Current mortgage balance (Year 0)",
-            0, 5000000,
-            232000 if i == 0 else 160000,
-            step=1000,
-            key=f"p_exist_mort_{i}",
-            disabled=not is_existing
-        )
-
-        if is_existing:
-            purchase_year = 0
-
-        r1, r2, r3, r4 = st.columns(4)
-        purchase_price = r1.number_input(
-            "Purchase price / basis",
-            50000, 5000000,
-            int(existing_value) if is_existing else 200000,
-            step=5000,
-            key=f"p_price_{i}",
-            disabled=is_existing
-        )
-        down_pct = r2.slider("Down payment (%)", 0.0, 50.0, 20.0, 0.5, key=f"p_down_{i}", disabled=is_existing)
-        mortgage_rate = r3.slider(
-            "Mortgage rate (%)",
-            0.0, 15.0,
-            2.87 if (i == 0 and is_existing) else 7.0,
-            0.1,
-            key=f"p_rate_{i}"
-        )
-        term_years = r4.number_input(
-            "Remaining term (years)",
-            1, 40,
-            27 if (i == 0 and is_existing) else 30,
-            key=f"p_term_{i}"
-        )
-
-        r5, r6, r7, r8 = st.columns(4)
-        gross_rent_month = r5.number_input("Gross rent (monthly)", 0, 50000, 2000, step=50, key=f"p_rent_{i}")
-        tax_ins_month = r6.number_input("Taxes+Ins (monthly)", 0, 20000, 350, step=25, key=f"p_taxins_{i}")
-        maintenance_pct = r7.slider("Maintenance (% of rent)", 0.0, 25.0, 8.0, 0.5, key=f"p_maint_{i}")
-        vacancy_pct = r8.slider("Vacancy (% of rent)", 0.0, 25.0, 5.0, 0.5, key=f"p_vac_{i}")
-
-        r9, r10, r11, r12 = st.columns(4)
-        capex_pct = r9.slider("CapEx reserve (% of rent)", 0.0, 25.0, 5.0, 0.5, key=f"p_capex_{i}")
-        pm_enabled = r10.checkbox("Property mgmt?", value=True, key=f"p_pm_on_{i}")
-        pm_pct = r11.slider("PM fee (% of rent)", 0.0, 25.0, 10.0, 0.5, key=f"p_pm_{i}") if pm_enabled else 0.0
-        value_growth = r12.slider("Home value growth (%/yr)", -5.0, 15.0, 3.0, 0.1, key=f"p_grow_{i}")
-
-        rs1, rs2 = st.columns(2)
-        rent_start_year = rs1.number_input("Rent starts in year", 0, horizon_years, int(purchase_year), key=f"p_rent_start_{i}")
-        rent_growth = rs2.slider("Rent growth (%/yr)", -5.0, 15.0, 2.0, 0.1, key=f"p_rent_grow_{i}")
-
-        st.markdown("**HELOC settings**")
-        h1, h2, h3, h4 = st.columns(4)
-        heloc_enabled = h1.checkbox("Enable HELOC", value=False, key=f"p_heloc_on_{i}")
-        heloc_cltv = h2.slider("Max CLTV for HELOC (%)", 50.0, 95.0, 80.0, 0.5, key=f"p_cltv_{i}") if heloc_enabled else 0.0
-        heloc_draw_year = h3.number_input("HELOC draw year (0 = none)", 0, horizon_years, 0, key=f"p_heloc_draw_year_{i}") if heloc_enabled else 0
-        heloc_draw_amount = h4.number_input("HELOC draw amount", 0, 5000000, 0, step=5000, key=f"p_heloc_draw_amt_{i}") if heloc_enabled else 0
-
-        if enabled:
-            properties.append({
-                "name": name,
-                "purchase_year": int(purchase_year),
-                "liquidation_year": int(liquidation_year),
-                "is_existing": bool(is_existing),
-
-                "value_year0": float(existing_value) if is_existing else float(purchase_price),
-                "purchase_price": float(existing_value) if is_existing else float(purchase_price),
-
-                "down_pct": float(down_pct),
-                "mortgage_rate": float(mortgage_rate) / 100.0,
-                "term_years": int(term_years),
-                "mortgage_balance_year0": float(existing_mort_balance) if is_existing else None,
-
-                "gross_rent_month": float(gross_rent_month),
-                "tax_ins_month": float(tax_ins_month),
-                "maintenance_pct": float(maintenance_pct) / 100.0,
-                "vacancy_pct": float(vacancy_pct) / 100.0,
-                "capex_pct": float(capex_pct) / 100.0,
-                "pm_pct": float(pm_pct) / 100.0,
-                "value_growth": float(value_growth) / 100.0,
-
-                "rent_start_year": int(rent_start_year),
-                "rent_growth": float(rent_growth) / 100.0,
-
-                "heloc_enabled": bool(heloc_enabled),
-                "heloc_cltv": float(heloc_cltv) / 100.0 if heloc_enabled else 0.0,
-                "heloc_draw_year": int(heloc_draw_year) if heloc_enabled else 0,
-                "heloc_draw_amount": float(heloc_draw_amount) if heloc_enabled else 0.0,
-            })
-
-# -----------------------------
-# Initialize per-property state
-# -----------------------------
-prop_state = []
-for p in properties:
-    if p["is_existing"]:
-        loan_principal = p["mortgage_balance_year0"]
-    else:
-        loan_principal = p["purchase_price"] * (1 - p["down_pct"] / 100.0)
-
-    prop_state.append({
-        "loan_principal": float(loan_principal),
-        "heloc_balance": 0.0,
-        "active": True
-    })
-
-# -----------------------------
-# Run simulation
-# -----------------------------
-rows = []
-cash = float(starting_cash)
-cody_ret = float(cody_ret_balance0)
-lauren_ret = float(lauren_ret_balance0)
-
-# Pharmacy state
-ph_note_balance = 0.0
-ph_annual_payment = 0.0
-ph_equity_value = 0.0
-ph_active = False
-seller_note_rate = (float(seller_note_rate_pct) / 100.0) if pharmacy_buyin_enabled else 0.0
-
-for y in years:
-    y = int(y)
-
-    # -------------------------
-    # Gross incomes
-    # -------------------------
-    cody_gross_y = income_stream(cody_gross0, cody_growth, y, int(cody_income_start))
-    lauren_gross_y = income_stream(lauren_gross0, lauren_growth, y, int(lauren_income_start))
-    other_gross_y = income_stream(other_income0, other_income_growth, y, int(other_income_start))
-
-    # -------------------------
-    # Retirement employee contributions (needed before estimator if you treat as pretax)
-    # -------------------------
-    cody_emp_contrib = 0.0
-    cody_match = 0.0
-    lauren_emp_contrib = 0.0
-    lauren_match = 0.0
-    cody_ira = 0.0
-    lauren_ira = 0.0
-
-    if y >= int(cody_contrib_start_year):
-        cody_emp_contrib = cody_gross_y * (cody_contrib_pct / 100.0)
-        effective_contrib_pct = min(cody_contrib_pct, cody_match_cap_pct) if cody_match_cap_pct > 0 else 0.0
-        cody_match = cody_gross_y * (min(cody_employer_match_pct, effective_contrib_pct) / 100.0)
-
-    if y >= int(lauren_contrib_start_year):
-        lauren_emp_contrib = lauren_gross_y * (lauren_contrib_pct / 100.0)
-        effective_contrib_pct = min(lauren_contrib_pct, lauren_match_cap_pct) if lauren_match_cap_pct > 0 else 0.0
-        lauren_match = lauren_gross_y * (min(lauren_employer_match_pct, effective_contrib_pct) / 100.0)
-
-    cody_ira = float(cody_ira_annual) if cody_gross_y > 0 else 0.0
-    lauren_ira = float(lauren_ira_annual) if lauren_gross_y > 0 else 0.0
-
-    # -------------------------
-    # Taxes / Net pay
-    # -------------------------
-    est_federal_tax = 0.0
-    est_state_tax = 0.0
-    est_fica_tax = 0.0
-    est_total_tax = 0.0
-
-    if tax_mode == "Simple effective tax %":
-        cody_net_y = cody_gross_y * (1.0 - cody_effective_tax_pct / 100.0)
-        lauren_net_y = lauren_gross_y * (1.0 - lauren_effective_tax_pct / 100.0)
-        if other_income_is_net:
-            other_net_y = other_gross_y
-        else:
-            other_net_y = other_gross_y * (1.0 - other_effective_tax_pct / 100.0)
-
-        if show_tax_line_item:
-            est_total_tax = (cody_gross_y - cody_net_y) + (lauren_gross_y - lauren_net_y) + (other_gross_y - other_net_y)
+if property_input == "Table":
+    from portfolio_io import (
+        PropertyTableError,
+        excel_available,
+        frame_to_properties,
+        properties_to_frame,
+        read_property_table,
+        write_property_table,
+    )
 
+    st.caption(
+        "One row per property. Rates and percentages are in percent, as in the expanders; "
+        "mortgage_balance_year0 is only used for existing properties, and a purchased property is valued at its "
+        "purchase_price (value_year0 is ignored), as in the expanders. Untick `enabled` to keep a row but leave it out."
+    )
+    if "property_table" not in st.session_state:
+        st.session_state.property_table = properties_to_frame([CURRENT_HOME_RENTAL])
+        st.session_state.property_table_version = 0
+    upload = st.file_uploader("Import properties (CSV or XLSX)", type=["csv", "xlsx"], key="p_table_upload")
+    if upload is not None and st.session_state.get("property_table_source") != (upload.name, upload.size):
+        st.session_state.property_table_source = (upload.name, upload.size)
+        try:
+            st.session_state.property_table = read_property_table(upload.getvalue(), upload.name)
+            st.session_state.property_table_version += 1
+        except (ValueError, ImportError) as e:
+            st.error(f"Import rejected:\n{e}")
+
+    # A new key per import so the editor drops edits made to the previous table
+    edited = st.data_editor(
+        st.session_state.property_table,
+        num_rows="dynamic",
+        use_container_width=True,
+        key=f"p_table_{st.session_state.property_table_version}",
+    )
+    try:
+        properties = frame_to_properties(edited)
+    except PropertyTableError as e:
+        st.error(f"Property table rejected:\n{e}")
+        st.stop()
+
+    d1, d2 = st.columns(2)
+    d1.download_button("Export properties (CSV)", lambda: write_property_table(edited, "csv"),
+                       file_name="properties.csv", mime="text/csv")
+    if excel_available():
+        d2.download_button("Export properties (XLSX)", lambda: write_property_table(edited, "xlsx"),
+                           file_name="properties.xlsx",
+                           mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
     else:
-        status_key = filing_status
-        std_ded = STD_DEDUCTION_2026.get(status_key, 0.0)
-        brackets = BRACKETS_2026.get(status_key, BRACKETS_2026["Married Filing Jointly"])
-
-        household_gross = cody_gross_y + lauren_gross_y + (other_gross_y if not other_income_is_net else 0.0)
-
-        pretax = 0.0
-        if assume_employee_contribs_pretax:
-            pretax += cody_emp_contrib + lauren_emp_contrib
-
-        taxable_income = max(0.0, household_gross - pretax - std_ded)
-        est_federal_tax = progressive_tax(taxable_income, brackets)
-
-        if include_state_tax and state_tax_pct > 0:
-            est_state_tax = max(0.0, household_gross - pretax) * (state_tax_pct / 100.0)
-
-        if include_fica:
-            est_fica_tax = (
-                fica_employee_tax(
-                    wages=cody_gross_y,
-                    ss_wage_base=SS_WAGE_BASE_2026,
-                    addl_medicare_threshold=float(addl_medicare_threshold)
-                )
-                + fica_employee_tax(
-                    wages=lauren_gross_y,
-                    ss_wage_base=SS_WAGE_BASE_2026,
-                    addl_medicare_threshold=float(addl_medicare_threshold)
-                )
+        d2.caption("Excel export needs openpyxl (pip install openpyxl)")
+else:
+    for i in range(int(max_props)):
+        default_enabled = (i == 0)
+        default_buy_year = 0 if i == 0 else 2
+
+        with st.expander(f"Property {i+1}", expanded=(i == 0)):
+            top1, top2, top3, top4 = st.columns(4)
+            enabled = top1.checkbox("Enabled", value=default_enabled, key=f"p_enabled_{i}")
+            name = top2.text_input("Name", value=("Current Home → Rental" if i == 0 else f"Rental {i+1}"), key=f"p_name_{i}")
+            purchase_year = top3.number_input("Purchase year", 0, horizon_years, default_buy_year, key=f"p_buy_{i}")
+            liquidation_year = top4.number_input("Liquidation year (0 = never)", 0, horizon_years, 0, key=f"p_sell_{i}")
+
+            ex1, ex2, ex3 = st.columns(3)
+            is_existing = ex1.checkbox("Existing at Year 0 (already owned)", value=(i == 0), key=f"p_exist_{i}")
+            existing_value = ex2.number_input(
+                "Current market value (Year 0)",
+                0, 5000000,
+                292000 if i == 0 else 200000,
+                step=1000,
+                key=f"p_exist_val_{i}",
+                disabled=not is_existing
             )
-
-        est_total_tax = est_federal_tax + est_state_tax + est_fica_tax
-
-        household_net_taxable = max(0.0, household_gross - est_total_tax)
-        household_net = household_net_taxable + (other_gross_y if other_income_is_net else 0.0)
-
-        denom = (cody_gross_y + lauren_gross_y + (other_gross_y if not other_income_is_net else 0.0))
-        if denom <= 0:
-            cody_net_y = 0.0
-            lauren_net_y = 0.0
-            other_net_y = other_gross_y if other_income_is_net else 0.0
-        else:
-            cody_net_y = household_net_taxable * (cody_gross_y / denom)
-            lauren_net_y = household_net_taxable * (lauren_gross_y / denom)
-            if other_income_is_net:
-                other_net_y = other_gross_y
-            else:
-                other_net_y = household_net_taxable * (other_gross_y / denom)
-
-    base_income_net_y = cody_net_y + lauren_net_y + other_net_y
-
-    # -------------------------
-    # Expenses (inflation)
-    # -------------------------
-    base_expenses_y = float(base_living_expenses) * ((1 + expense_growth / 100.0) ** y)
-
-    # Push-hard adjustments
-    extra_income_y = float(push_extra_income) if (push_hard and y < push_years) else 0.0
-    extra_cost_y = float(push_extra_cost) if (push_hard and y < push_years) else 0.0
-
-    # Frugal adjustments
-    if frugal_mode and (frugal_start <= y < frugal_start + frugal_years):
-        base_expenses_y *= (1.0 - frugal_expense_reduction_pct / 100.0)
-
-    income_y = base_income_net_y + extra_income_y
-    expenses_y = base_expenses_y + extra_cost_y
-
-    # -------------------------
-    # Student loans
-    # -------------------------
-    sl_remaining = student_loan_remaining(y)
-    sl_pay_y = student_loan_payment_annual if (y >= student_loan_start_year and sl_remaining > 0) else 0.0
-
-    # -------------------------
-    # Retirement balances
-    # -------------------------
-    total_ret_contrib_outflow = 0.0
-    if count_retirement_contrib_as_expense:
-        total_ret_contrib_outflow = cody_emp_contrib + lauren_emp_contrib + cody_ira + lauren_ira
-
-    cody_ret = grow_balance(cody_ret + cody_emp_contrib + cody_match + cody_ira, retirement_return)
-    lauren_ret = grow_balance(lauren_ret + lauren_emp_contrib + lauren_match + lauren_ira, retirement_return)
-    total_retirement = cody_ret + lauren_ret
-
-    # -------------------------
-    # New home payment (PITI + HOA + PMI)
-    # -------------------------
-    new_home_piti_y = 0.0
-    new_home_value_y = 0.0
-    new_home_mort_bal_y = 0.0
-    new_home_equity_y = 0.0
-    new_home_liquidation_proceeds = 0.0
-
-    if new_home_enabled and y >= int(new_home_start_year) and new_home_loan_amount_eff > 0:
-        months_paid = int((y - int(new_home_start_year)) * 12)
-
-        pmt_m = amort_payment(new_home_loan_amount_eff, float(new_home_rate_pct) / 100.0, int(new_home_term_years))
-        pi_annual = 12.0 * pmt_m
-
-        escrow_annual = float(new_home_property_tax_annual) + float(new_home_insurance_annual)
-        pmi_annual = 12.0 * float(new_home_pmi_monthly)
-        hoa_annual = 12.0 * float(new_home_hoa_monthly)
-
-        new_home_piti_y = pi_annual + escrow_annual + pmi_annual + hoa_annual
-
-        if include_new_home_equity_in_networth and compute_loan_from_price and new_home_purchase_price > 0:
-            yrs_held = max(0, y - int(new_home_start_year))
-            new_home_value_y = float(new_home_purchase_price) * ((1 + float(new_home_value_growth_pct) / 100.0) ** yrs_held)
-            new_home_mort_bal_y = mortgage_balance(
-                principal=float(new_home_loan_amount_eff),
-                annual_rate=float(new_home_rate_pct) / 100.0,
-                years=int(new_home_term_years),
-                months_paid=months_paid
+            existing_mort_balance = ex3.number_input(
+                "Current mortgage balance (Year 0)",
+                0, 5000000,
+                232000 if i == 0 else 160000,
+                step=1000,
+                key=f"p_exist_mort_{i}",
+                disabled=not is_existing
             )
-            new_home_equity_y = max(0.0, new_home_value_y - new_home_mort_bal_y)
-
-            if int(new_home_sell_year) > 0 and y == int(new_home_sell_year):
-                sell_cost = (float(new_home_selling_cost_pct) / 100.0) * new_home_value_y
-                new_home_liquidation_proceeds = max(0.0, new_home_value_y - sell_cost - new_home_mort_bal_y)
-                cash += new_home_liquidation_proceeds
-                # stop counting payments after sale
-                new_home_enabled = False
-
-    # -------------------------
-    # Properties
-    # -------------------------
-    rental_cf_y = 0.0
-    total_equity = 0.0
-    total_heloc = 0.0
-    active_props = 0
-    acquired_props = 0
-    liquidated_props = 0
-    heloc_drawn_total = 0.0
-    total_property_value = 0.0
-
-    for idx, p in enumerate(properties):
-        stt = prop_state[idx]
-        if y < p["purchase_year"]:
-            continue
-        if not stt["active"]:
-            continue
-
-        if (not p["is_existing"]) and (y == p["purchase_year"]):
-            down_needed = p["purchase_price"] * (p["down_pct"] / 100.0)
-            cash -= down_needed
-            acquired_props += 1
-
-        yrs_held = y - p["purchase_year"]
-        months_paid = int(yrs_held * 12)
-
-        home_value = p["value_year0"] * ((1 + p["value_growth"]) ** yrs_held)
-        total_property_value += home_value
-
-        mort_bal = mortgage_balance(
-            principal=stt["loan_principal"],
-            annual_rate=p["mortgage_rate"],
-            years=p["term_years"],
-            months_paid=months_paid
-        )
 
-        if p["heloc_enabled"] and p["heloc_draw_year"] > 0 and y == p["heloc_draw_year"]:
-            allowed_total_debt = p["heloc_cltv"] * home_value
-            allowed_heloc = max(0.0, allowed_total_debt - mort_bal)
-            draw = min(p["heloc_draw_amount"], allowed_heloc)
-            if draw > 0:
-                stt["heloc_balance"] += draw
-                cash += draw
-                heloc_drawn_total += draw
-
-        if y >= p["rent_start_year"]:
-            rent_years = y - p["rent_start_year"]
-            gross_rent_annual = 12 * p["gross_rent_month"] * ((1 + p["rent_growth"]) ** rent_years)
-        else:
-            gross_rent_annual = 0.0
-
-        pm_annual = p["pm_pct"] * gross_rent_annual
-        maint_annual = p["maintenance_pct"] * gross_rent_annual
-        vacancy_annual = p["vacancy_pct"] * gross_rent_annual
-        capex_annual = p["capex_pct"] * gross_rent_annual
-        tax_ins_annual = 12 * p["tax_ins_month"]
-
-        pmt_month = amort_payment(stt["loan_principal"], p["mortgage_rate"], p["term_years"])
-        debt_service_annual = 12 * pmt_month
-
-        heloc_interest_annual = stt["heloc_balance"] * (heloc_rate / 100.0)
-
-        net_prop = gross_rent_annual - (
-            pm_annual + maint_annual + vacancy_annual + capex_annual + tax_ins_annual + debt_service_annual + heloc_interest_annual
-        )
-        rental_cf_y += net_prop
-
-        equity = home_value - mort_bal - stt["heloc_balance"]
-        total_equity += equity
-        total_heloc += stt["heloc_balance"]
-        active_props += 1
-
-        if p["liquidation_year"] > 0 and y == p["liquidation_year"]:
-            net_proceeds = max(0.0, home_value - mort_bal - stt["heloc_balance"])
-            cash += net_proceeds
-            stt["active"] = False
-            liquidated_props += 1
-
-    # -------------------------
-    # Mortgage savings cashflow (optional)
-    # -------------------------
-    mort_savings_y = 0.0
-    if include_mortgage_prepay_savings and (y >= int(mortgage_savings_start_year)):
-        mort_savings_y = float(mortgage_savings_annual)
-
-    # -------------------------
-    # Pharmacy buy-in cashflow + note + equity value
-    # -------------------------
-    ph_profit_y = 0.0
-    ph_note_payment_y = 0.0
-    ph_note_interest_y = 0.0
-    ph_note_principal_y = 0.0
-    ph_extra_principal_y = 0.0
-
-    if pharmacy_buyin_enabled:
-        if (y == int(pharmacy_buyin_year)) and (not ph_active):
-            ph_active = True
-            cash -= float(pharmacy_cash_down)
-            ph_note_balance = max(0.0, float(pharmacy_buyin_price) - float(pharmacy_cash_down))
-
-            if seller_note_years > 0 and ph_note_balance > 0:
-                r = seller_note_rate
-                n = int(seller_note_years)
-                if r == 0:
-                    ph_annual_payment = ph_note_balance / n
-                else:
-                    ph_annual_payment = ph_note_balance * (r) / (1 - (1 + r) ** (-n))
-            else:
-                ph_annual_payment = 0.0
-
-            ph_equity_value = float(pharmacy_buyin_price)
-
-        if ph_active and y >= int(pharmacy_buyin_year):
-            yrs_since = y - int(pharmacy_buyin_year)
-            ph_equity_value = float(pharmacy_buyin_price) * ((1 + float(pharmacy_equity_growth_pct) / 100.0) ** yrs_since)
-
-        if ph_active and (y >= int(pharmacy_profit_start_year)):
-            if y < int(pharmacy_profit_growth_start_year):
-                growth_years = 0
-            else:
-                growth_years = y - int(pharmacy_profit_growth_start_year)
-
-            ph_profit_y = float(pharmacy_expected_profit) * (
-                (1 + float(pharmacy_profit_growth_pct) / 100.0) ** growth_years
+            if is_existing:
+                purchase_year = 0
+
+            r1, r2, r3, r4 = st.columns(4)
+            purchase_price = r1.number_input(
+                "Purchase price / basis",
+                50000, 5000000,
+                int(existing_value) if is_existing else 200000,
+                step=5000,
+                key=f"p_price_{i}",
+                disabled=is_existing
             )
-
-        if ph_active and ph_note_balance > 0 and ph_annual_payment > 0:
-            extra = 0.0
-            if enable_accel_paydown:
-                if int(accel_year) > 0 and y == int(accel_year):
-                    extra += float(lauren_dist_lump)
-                if float(extra_principal_recurring) > 0 and y >= int(recurring_extra_start_year):
-                    extra += float(extra_principal_recurring)
-
-            ph_extra_principal_y = extra
-            ph_note_payment_y, ph_note_interest_y, ph_note_principal_y, ph_note_balance = annual_amort_step(
-                balance=ph_note_balance,
-                annual_rate=seller_note_rate,
-                annual_payment=float(ph_annual_payment),
-                extra_principal=extra
+            down_pct = r2.slider("Down payment (%)", 0.0, 50.0, 20.0, 0.5, key=f"p_down_{i}", disabled=is_existing)
+            mortgage_rate = r3.slider(
+                "Mortgage rate (%)",
+                0.0, 15.0,
+                2.87 if (i == 0 and is_existing) else 7.0,
+                0.1,
+                key=f"p_rate_{i}"
+            )
+            term_years = r4.number_input(
+                "Remaining term (years)",
+                1, 40,
+                27 if (i == 0 and is_existing) else 30,
+                key=f"p_term_{i}"
             )
 
-    # -------------------------
-    # Net cash flow and cash update
-    # -------------------------
-    net_cash_flow_y = (
-        income_y
-        - expenses_y
-        - new_home_piti_y
-        - sl_pay_y
-        + rental_cf_y
-        + mort_savings_y
-        + ph_profit_y
-        - ph_note_payment_y
-        - total_ret_contrib_outflow
-    )
-
-    if reinvest_surplus:
-        cash += net_cash_flow_y
-
-    # -------------------------
-    # Net worth
-    # -------------------------
-    net_worth = cash + total_equity - sl_remaining
-    if include_retirement_in_networth:
-        net_worth += total_retirement
-    if pharmacy_buyin_enabled and include_pharmacy_equity_in_networth and ph_active:
-        net_worth += (ph_equity_value - ph_note_balance)
-    if include_new_home_equity_in_networth:
-        net_worth += new_home_equity_y
-
-    status = "🟢 Sustainable" if net_cash_flow_y >= 30000 else ("🟡 Tight buffer" if net_cash_flow_y >= 10000 else "🔴 At risk")
-
-    rows.append({
-        "Year": y,
-
-        "Cody Gross": round(cody_gross_y, 2),
-        "Lauren Gross": round(lauren_gross_y, 2),
-        "Other Gross": round(other_gross_y, 2),
-
-        "Cody Net": round(cody_net_y, 2),
-        "Lauren Net": round(lauren_net_y, 2),
-        "Other Net": round(other_net_y, 2),
-
-        "Income (Net Total)": round(income_y, 2),
-
-        "Estimated Taxes (Total)": round(est_total_tax, 2) if show_tax_line_item else 0.0,
-        "Estimated Federal Tax": round(est_federal_tax, 2) if show_tax_line_item else 0.0,
-        "Estimated State Tax": round(est_state_tax, 2) if show_tax_line_item else 0.0,
-        "Estimated FICA": round(est_fica_tax, 2) if show_tax_line_item else 0.0,
+            r5, r6, r7, r8 = st.columns(4)
+            gross_rent_month = r5.number_input("Gross rent (monthly)", 0, 50000, 2000, step=50, key=f"p_rent_{i}")
+            tax_ins_month = r6.number_input("Taxes+Ins (monthly)", 0, 20000, 350, step=25, key=f"p_taxins_{i}")
+            maintenance_pct = r7.slider("Maintenance (% of rent)", 0.0, 25.0, 8.0, 0.5, key=f"p_maint_{i}")
+            vacancy_pct = r8.slider("Vacancy (% of rent)", 0.0, 25.0, 5.0, 0.5, key=f"p_vac_{i}")
+
+            r9, r10, r11, r12 = st.columns(4)
+            capex_pct = r9.slider("CapEx reserve (% of rent)", 0.0, 25.0, 5.0, 0.5, key=f"p_capex_{i}")
+            pm_enabled = r10.checkbox("Property mgmt?", value=True, key=f"p_pm_on_{i}")
+            pm_pct = r11.slider("PM fee (% of rent)", 0.0, 25.0, 10.0, 0.5, key=f"p_pm_{i}") if pm_enabled else 0.0
+            value_growth = r12.slider("Home value growth (%/yr)", -5.0, 15.0, 3.0, 0.1, key=f"p_grow_{i}")
+
+            rs1, rs2 = st.columns(2)
+            rent_start_year = rs1.number_input("Rent starts in year", 0, horizon_years, int(purchase_year), key=f"p_rent_start_{i}")
+            rent_growth = rs2.slider("Rent growth (%/yr)", -5.0, 15.0, 2.0, 0.1, key=f"p_rent_grow_{i}")
+
+            st.markdown("**HELOC settings**")
+            h1, h2, h3, h4 = st.columns(4)
+            heloc_enabled = h1.checkbox("Enable HELOC", value=False, key=f"p_heloc_on_{i}")
+            heloc_cltv = h2.slider("Max CLTV for HELOC (%)", 50.0, 95.0, 80.0, 0.5, key=f"p_cltv_{i}") if heloc_enabled else 0.0
+            heloc_draw_year = h3.number_input("HELOC draw year (0 = none)", 0, horizon_years, 0, key=f"p_heloc_draw_year_{i}") if heloc_enabled else 0
+            heloc_draw_amount = h4.number_input("HELOC draw amount", 0, 5000000, 0, step=5000, key=f"p_heloc_draw_amt_{i}") if heloc_enabled else 0
+
+            if enabled:
+                properties.append(PropertyInputs(
+                    name=name,
+                    purchase_year=int(purchase_year),
+                    liquidation_year=int(liquidation_year),
+                    is_existing=bool(is_existing),
+
+                    value_year0=float(existing_value) if is_existing else float(purchase_price),
+                    purchase_price=float(existing_value) if is_existing else float(purchase_price),
+
+                    down_pct=float(down_pct),
+                    mortgage_rate=float(mortgage_rate) / 100.0,
+                    term_years=int(term_years),
+                    mortgage_balance_year0=float(existing_mort_balance) if is_existing else None,
+
+                    gross_rent_month=float(gross_rent_month),
+                    tax_ins_month=float(tax_ins_month),
+                    maintenance_pct=float(maintenance_pct) / 100.0,
+                    vacancy_pct=float(vacancy_pct) / 100.0,
+                    capex_pct=float(capex_pct) / 100.0,
+                    pm_pct=float(pm_pct) / 100.0,
+                    value_growth=float(value_growth) / 100.0,
+
+                    rent_start_year=int(rent_start_year),
+                    rent_growth=float(rent_growth) / 100.0,
+
+                    heloc_enabled=bool(heloc_enabled),
+                    heloc_cltv=float(heloc_cltv) / 100.0 if heloc_enabled else 0.0,
+                    heloc_draw_year=int(heloc_draw_year) if heloc_enabled else 0,
+                    heloc_draw_amount=float(heloc_draw_amount) if heloc_enabled else 0.0,
+                ))
 
-        "Expenses (non-property)": round(expenses_y, 2),
-        "New Home PITI+HOA (annual)": round(new_home_piti_y, 2),
+# -----------------------------
+# Run simulation
+# -----------------------------
+@st.cache_data(max_entries=64, show_spinner=False)
+def run_monthly_rollup(scenario: Scenario) -> "pd.DataFrame":
+    """Memoized on the scenario's contents, so reruns that don't change an input skip the simulation."""
+    return simulate_monthly(scenario)
 
-        "Retirement Employee Contrib": round(cody_emp_contrib + lauren_emp_contrib, 2),
-        "Retirement Employer Match": round(cody_match + lauren_match, 2),
-        "IRA Contributions": round(cody_ira + lauren_ira, 2),
-        "Retirement Balance (Total)": round(total_retirement, 2),
+@st.cache_data(max_entries=64, show_spinner=False)
+def run_annual(scenario: Scenario) -> "pd.DataFrame":
+    """
+    Memoized on the scenario's contents like the monthly rollup, so a scenario
+    any session has already run is not simulated again. A miss goes through
+    this session's IncrementalSimulator, which only re-simulates the years
+    from the first one the edit can affect; building the results frame
+    still costs about as much as a full simulation.
+    """
+    if "incremental_sim" not in st.session_state:
+        st.session_state.incremental_sim = IncrementalSimulator()
+    return st.session_state.incremental_sim.run(scenario)
 
-        "Student Loan Pay": round(sl_pay_y, 2),
-        "Student Loan Remaining": round(sl_remaining, 2),
+def run_scenario(scenario: Scenario, resolution: str = "Annual") -> "pd.DataFrame":
+    if resolution == "Monthly":
+        return run_monthly_rollup(scenario)
+    return run_annual(scenario)
 
-        "Rental Cash Flow": round(rental_cf_y, 2),
-        "Mortgage Savings": round(mort_savings_y, 2),
+@st.cache_data(max_entries=16, show_spinner=False)
+def run_monthly(scenario: Scenario) -> "pd.DataFrame":
+    return simulate_monthly(scenario, rollup=False)
 
-        "Pharmacy Profit": round(ph_profit_y, 2),
-        "Pharmacy Note Payment": round(ph_note_payment_y, 2),
-        "Pharmacy Note Interest": round(ph_note_interest_y, 2),
-        "Pharmacy Note Principal": round(ph_note_principal_y, 2),
-        "Pharmacy Extra Principal": round(ph_extra_principal_y, 2),
-        "Pharmacy Note Balance": round(ph_note_balance, 2),
-        "Pharmacy Equity Value": round(ph_equity_value, 2) if ph_active else 0.0,
+@st.cache_data(max_entries=16, show_spinner=False)
+def run_goal_seek(scenario: Scenario, income_field: str, property_index: int) -> dict:
+    """Each answer is a batched search over the engine, not a slider-drag per guess."""
+    from goalseek import earliest_passive_coverage_year, latest_liquidation_year, min_income_for_cash_flow
 
-        "Net Cash Flow": round(net_cash_flow_y, 2),
+    return {
+        "income": min_income_for_cash_flow(scenario, income_field),
+        "liquidation": latest_liquidation_year(scenario, property_index) if scenario.properties else None,
+        "coverage": earliest_passive_coverage_year(scenario),
+    }
 
-        "Investable Cash": round(cash, 2),
-        "Total Property Value (active)": round(total_property_value, 2),
-        "Total Equity (active rentals)": round(total_equity, 2),
-        "HELOC Outstanding": round(total_heloc, 2),
+@st.cache_data(max_entries=8, show_spinner=False)
+def run_optimizer(scenario: Scenario, beam_width: int):
+    from optimizer import optimize_schedule
 
-        "New Home Value": round(new_home_value_y, 2),
-        "New Home Mortgage Balance": round(new_home_mort_bal_y, 2),
-        "New Home Equity": round(new_home_equity_y, 2),
-        "New Home Liquidation Proceeds": round(new_home_liquidation_proceeds, 2),
+    return optimize_schedule(scenario, beam_width=beam_width)
 
-        "Net Worth": round(net_worth, 2),
+@st.cache_data(max_entries=16, show_spinner=False)
+def run_tornado(scenario: Scenario, bump_pct: float) -> "pd.DataFrame":
+    """Every ± bump runs in one batched evaluation, not one script rerun each."""
+    from sensitivity import run_sensitivity
 
-        "Active Properties": int(active_props),
-        "Acquired This Year": int(acquired_props),
-        "Liquidated This Year": int(liquidated_props),
-        "HELOC Drawn This Year": round(heloc_drawn_total, 2),
+    return run_sensitivity(scenario, bump_pct)
 
-        "Status": status
-    })
+@st.cache_data(max_entries=16, show_spinner=False)
+def run_fan_bands(scenario: Scenario, spec: MonteCarloSpec, history_mtime: float, _workers: int = 1) -> dict:
+    """
+    Paths are reduced shard by shard, so memory doesn't grow with the path count.
+    `history_mtime` is only part of the cache key, so an edited history file reruns;
+    `_workers` is left out of it, since the results don't depend on it.
+    """
+    return run_sharded(scenario, spec, workers=_workers).bands
+
+scenario = Scenario(
+    horizon_years=int(horizon_years),
+    push_hard=bool(push_hard),
+    push_years=int(push_years),
+    push_extra_income=float(push_extra_income),
+    push_extra_cost=float(push_extra_cost),
+    frugal_mode=bool(frugal_mode),
+    frugal_start=int(frugal_start),
+    frugal_years=int(frugal_years),
+    frugal_expense_reduction_pct=float(frugal_expense_reduction_pct),
+    heloc_rate=float(heloc_rate),
+    reinvest_surplus=bool(reinvest_surplus),
+
+    cody_gross0=float(cody_gross0),
+    lauren_gross0=float(lauren_gross0),
+    cody_growth=float(cody_growth),
+    lauren_growth=float(lauren_growth),
+    cody_income_start=int(cody_income_start),
+    lauren_income_start=int(lauren_income_start),
+    other_income0=float(other_income0),
+    other_income_growth=float(other_income_growth),
+    other_income_start=int(other_income_start),
+    other_income_is_net=bool(other_income_is_net),
+
+    tax_mode=tax_mode,
+    filing_status=filing_status,
+    include_state_tax=bool(include_state_tax),
+    state_tax_pct=float(state_tax_pct),
+    cody_effective_tax_pct=float(cody_effective_tax_pct),
+    lauren_effective_tax_pct=float(lauren_effective_tax_pct),
+    other_effective_tax_pct=float(other_effective_tax_pct),
+    show_tax_line_item=bool(show_tax_line_item),
+    include_fica=bool(include_fica),
+    assume_employee_contribs_pretax=bool(assume_employee_contribs_pretax),
+    tax_year=tax_year,
+    tax_indexation_pct=float(expense_growth) if index_tax_tables else 0.0,
+    addl_medicare_threshold=float(addl_medicare_threshold),
+
+    base_living_expenses=float(base_living_expenses),
+    expense_growth=float(expense_growth),
+
+    new_home_enabled=bool(new_home_enabled),
+    new_home_start_year=int(new_home_start_year),
+    compute_loan_from_price=bool(compute_loan_from_price),
+    include_new_home_equity_in_networth=bool(include_new_home_equity_in_networth),
+    new_home_purchase_price=float(new_home_purchase_price),
+    new_home_down_pct=float(new_home_down_pct),
+    new_home_loan_amount=float(new_home_loan_amount),
+    new_home_rate_pct=float(new_home_rate_pct),
+    new_home_term_years=int(new_home_term_years),
+    new_home_property_tax_annual=float(new_home_property_tax_annual),
+    new_home_insurance_annual=float(new_home_insurance_annual),
+    new_home_hoa_monthly=float(new_home_hoa_monthly),
+    new_home_pmi_monthly=float(new_home_pmi_monthly),
+    new_home_value_growth_pct=float(new_home_value_growth_pct),
+    new_home_sell_year=int(new_home_sell_year),
+    new_home_selling_cost_pct=float(new_home_selling_cost_pct),
+
+    include_mortgage_prepay_savings=bool(include_mortgage_prepay_savings),
+    mortgage_prepay_amount=float(mortgage_prepay_amount),
+    mortgage_savings_annual=float(mortgage_savings_annual),
+    mortgage_savings_start_year=int(mortgage_savings_start_year),
+
+    pharmacy_buyin_enabled=bool(pharmacy_buyin_enabled),
+    pharmacy_buyin_year=int(pharmacy_buyin_year),
+    pharmacy_buyin_price=float(pharmacy_buyin_price),
+    pharmacy_cash_down=float(pharmacy_cash_down),
+    pharmacy_expected_profit=float(pharmacy_expected_profit),
+    pharmacy_profit_start_year=int(pharmacy_profit_start_year),
+    seller_note_years=int(seller_note_years),
+    seller_note_rate_pct=float(seller_note_rate_pct),
+    pharmacy_profit_growth_pct=float(pharmacy_profit_growth_pct),
+    pharmacy_profit_growth_start_year=int(pharmacy_profit_growth_start_year),
+    include_pharmacy_equity_in_networth=bool(include_pharmacy_equity_in_networth),
+    pharmacy_equity_growth_pct=float(pharmacy_equity_growth_pct),
+    enable_accel_paydown=bool(enable_accel_paydown),
+    accel_year=int(accel_year),
+    lauren_dist_lump=float(lauren_dist_lump),
+    extra_principal_recurring=float(extra_principal_recurring),
+    recurring_extra_start_year=int(recurring_extra_start_year),
+
+    retirement_return=float(retirement_return),
+    include_retirement_in_networth=bool(include_retirement_in_networth),
+    count_retirement_contrib_as_expense=bool(count_retirement_contrib_as_expense),
+    cody_ret_balance0=float(cody_ret_balance0),
+    lauren_ret_balance0=float(lauren_ret_balance0),
+    cody_contrib_pct=float(cody_contrib_pct),
+    cody_employer_match_pct=float(cody_employer_match_pct),
+    cody_match_cap_pct=float(cody_match_cap_pct),
+    cody_contrib_start_year=int(cody_contrib_start_year),
+    lauren_contrib_pct=float(lauren_contrib_pct),
+    lauren_employer_match_pct=float(lauren_employer_match_pct),
+    lauren_match_cap_pct=float(lauren_match_cap_pct),
+    lauren_contrib_start_year=int(lauren_contrib_start_year),
+    cody_ira_annual=float(cody_ira_annual),
+    lauren_ira_annual=float(lauren_ira_annual),
+
+    student_loan_balance0=float(student_loan_balance0),
+    student_loan_interest_rate=float(student_loan_interest_rate),
+    student_loan_years=int(student_loan_years),
+    student_loan_start_year=int(student_loan_start_year),
+
+    starting_cash=float(starting_cash),
+    min_cash_reserve=float(min_cash_reserve),
+
+    properties=tuple(properties),
+)
 
-df = pd.DataFrame(rows)
+df = run_scenario(scenario, resolution)
 
 # -----------------------------
 # Outputs
@@ -1106,103 +779,161 @@ m4.metric("Final Investable Cash", f"${df.loc[df.index[-1], 'Investable Cash']:,
 m5.metric("Final Equity (active rentals)", f"${df.loc[df.index[-1], 'Total Equity (active rentals)']:,.0f}")
 m6.metric("Final Retirement (total)", f"${df.loc[df.index[-1], 'Retirement Balance (Total)']:,.0f}")
 
-# Net cash flow chart
-fig, ax = plt.subplots()
-ax.plot(df["Year"], df["Net Cash Flow"], linewidth=2)
-ax.axhline(y=30000, linestyle="--")
-ax.axhline(y=10000, linestyle="--")
-ax.axhline(y=0, linestyle="--")
-ax.set_xlabel("Year")
-ax.set_ylabel("Annual Net Cash Flow")
-ax.set_title("Net Cash Flow Over Time")
-st.pyplot(fig)
-
-# Net worth chart
-fig2, ax2 = plt.subplots()
-ax2.plot(df["Year"], df["Net Worth"], linewidth=2)
-ax2.set_xlabel("Year")
-ax2.set_ylabel("Dollars")
-ax2.set_title("Net Worth Over Time")
-st.pyplot(fig2)
-
-# Retirement balance chart
-fig3, ax3 = plt.subplots()
-ax3.plot(df["Year"], df["Retirement Balance (Total)"], linewidth=2)
-ax3.set_xlabel("Year")
-ax3.set_ylabel("Dollars")
-ax3.set_title("Retirement Balance Over Time")
-st.pyplot(fig3)
-
-# Income breakdown chart (NET)
-fig4, ax4 = plt.subplots()
-ax4.plot(df["Year"], df["Cody Net"], linewidth=2)
-ax4.plot(df["Year"], df["Lauren Net"], linewidth=2)
-ax4.plot(df["Year"], df["Other Net"], linewidth=2)
-ax4.set_xlabel("Year")
-ax4.set_ylabel("Dollars")
-ax4.set_title("Net Income Breakdown Over Time")
-ax4.legend(["Cody Net", "Lauren Net", "Other Net"])
-st.pyplot(fig4)
-
-# Active properties chart
-fig5, ax5 = plt.subplots()
-ax5.plot(df["Year"], df["Active Properties"], linewidth=2)
-ax5.set_xlabel("Year")
-ax5.set_ylabel("Count")
-ax5.set_title("Active Properties Over Time")
-st.pyplot(fig5)
-
-# Cash vs equity vs retirement chart
-fig6, ax6 = plt.subplots()
-ax6.plot(df["Year"], df["Investable Cash"], linewidth=2)
-ax6.plot(df["Year"], df["Total Equity (active rentals)"], linewidth=2)
-ax6.plot(df["Year"], df["Retirement Balance (Total)"], linewidth=2)
-ax6.set_xlabel("Year")
-ax6.set_ylabel("Dollars")
-ax6.set_title("Cash vs Equity vs Retirement")
-ax6.legend(["Investable Cash", "Total Equity (rentals)", "Retirement"])
-st.pyplot(fig6)
-
-# Taxes chart (if enabled)
-if show_tax_line_item:
-    st.subheader("Estimated Taxes (if enabled)")
-    figt, axt = plt.subplots()
-    axt.plot(df["Year"], df["Estimated Taxes (Total)"], linewidth=2)
-    axt.set_xlabel("Year")
-    axt.set_ylabel("Dollars")
-    axt.set_title("Estimated Taxes (Total) Over Time")
-    st.pyplot(figt)
-
-# Pharmacy charts (only if enabled)
-if pharmacy_buyin_enabled:
-    st.subheader("Pharmacy Buy-In Charts")
-    fig7, ax7 = plt.subplots()
-    ax7.plot(df["Year"], df["Pharmacy Note Balance"], linewidth=2)
-    ax7.set_xlabel("Year")
-    ax7.set_ylabel("Dollars")
-    ax7.set_title("Pharmacy Seller Note Balance Over Time")
-    st.pyplot(fig7)
-
-    fig8, ax8 = plt.subplots()
-    ax8.plot(df["Year"], df["Pharmacy Profit"], linewidth=2)
-    ax8.plot(df["Year"], df["Pharmacy Note Payment"], linewidth=2)
-    ax8.set_xlabel("Year")
-    ax8.set_ylabel("Dollars")
-    ax8.set_title("Pharmacy Profit vs Note Payment")
-    ax8.legend(["Profit", "Note Payment"])
-    st.pyplot(fig8)
-
-# New home equity charts (only if enabled)
-if include_new_home_equity_in_networth:
-    st.subheader("New Home Equity Charts")
-    fignh, axnh = plt.subplots()
-    axnh.plot(df["Year"], df["New Home Equity"], linewidth=2)
-    axnh.set_xlabel("Year")
-    axnh.set_ylabel("Dollars")
-    axnh.set_title("New Home Equity Over Time (simple)")
-    st.pyplot(fignh)
-
-st.dataframe(df, use_container_width=True)
+# Charts: only the open tab is drawn, and unchanged charts come from the image cache
+chart_tabs = result_chart_tabs(show_tax_line_item, pharmacy_buyin_enabled, include_new_home_equity_in_networth)
+for tab, charts in zip(st.tabs(list(chart_tabs), key="result_chart_tab", on_change="rerun"), chart_tabs.values()):
+    if tab.open:
+        with tab:
+            for chart in charts:
+                st.image(line_chart_png(df, chart), width="stretch")
+
+st.dataframe(rounded(df), use_container_width=True)
+
+if resolution == "Monthly":
+    with st.expander("Monthly detail"):
+        st.caption("One row per month; flow columns are that month's amount, balances are at month end.")
+        st.dataframe(rounded(run_monthly(scenario)), use_container_width=True)
+
+# Goal seek (only if enabled)
+st.subheader("Goal Seek")
+show_goal_seek = st.checkbox("Solve for key thresholds", value=False)
+if show_goal_seek:
+    g1, g2 = st.columns(2)
+    income_fields = {"Cody": "cody_gross0", "Lauren": "lauren_gross0", "Other": "other_income0"}
+    income_who = g1.selectbox("Income to solve for", list(income_fields))
+    prop_labels = [f"{i + 1}: {p.name}" for i, p in enumerate(scenario.properties)] or ["(no properties)"]
+    liq_prop = g2.selectbox("Property to liquidate", prop_labels)
+    answers = run_goal_seek(scenario, income_fields[income_who], prop_labels.index(liq_prop))
+
+    a1, a2, a3 = st.columns(3)
+    income = answers["income"]
+    a1.metric(
+        f"Min {income_who} gross (year 0) for Net Cash Flow ≥ ${TIGHT_CASH_FLOW:,.0f}",
+        "Not reachable" if income is None else f"${income:,.0f}",
+    )
+    liq = answers["liquidation"]
+    a2.metric(
+        f"Latest liquidation year keeping cash ≥ ${scenario.min_cash_reserve:,.0f}",
+        "None works" if liq is None else ("Never needed" if liq == 0 else f"Year {liq}"),
+    )
+    cov = answers["coverage"]
+    a3.metric("Passive income covers expenses from", "Not within horizon" if cov is None else f"Year {cov}")
+    st.caption(
+        "Passive income = rental cash flow + pharmacy profit. Expenses = living expenses, new home PITI, "
+        "student loan and pharmacy note payments."
+    )
+
+# Schedule optimizer (only if enabled)
+st.subheader("Schedule Optimizer")
+show_optimizer = st.checkbox("Search purchase / sale / HELOC draw years for the highest final net worth", value=False)
+if show_optimizer and scenario.properties:
+    beam_width = st.slider("Beam width (schedules kept per step)", 1, 32, 8)
+    opt = run_optimizer(scenario, int(beam_width))
+    o1, o2, o3 = st.columns(3)
+    o1.metric("Current Final Net Worth", f"${opt.base_net_worth:,.0f}")
+    o2.metric(
+        "Best Final Net Worth",
+        f"${opt.schedules.loc[0, 'Final Net Worth']:,.0f}",
+        f"{opt.schedules.loc[0, 'Final Net Worth'] - opt.base_net_worth:,.0f}",
+    )
+    o3.metric("Schedules Evaluated", f"{opt.evaluations:,}")
+    if not opt.schedules.loc[0, "Meets Cash Floor"]:
+        st.warning(f"No schedule found keeps Investable Cash above ${scenario.min_cash_reserve:,.0f} every year.")
+    st.dataframe(opt.schedules, use_container_width=True)
+
+# Sensitivity / tornado (only if enabled)
+st.subheader("Sensitivity")
+show_sensitivity = st.checkbox("Bump every numeric input up and down and rank the impact", value=False)
+if show_sensitivity:
+    bump_pct = st.slider("Bump size (%)", 1.0, 50.0, 10.0, 1.0)
+    sens = run_tornado(scenario, float(bump_pct))
+    st.caption(
+        f"{len(sens)} inputs, {2 * len(sens) + 1} runs. Base final net worth ${sens.attrs['base_net_worth']:,.0f}. "
+        "Whole-number inputs (years, terms) move at least one year; inputs at 0 stay at 0."
+    )
+    top = sens.head(15).iloc[::-1]
+    st.image(tornado_png(top, float(bump_pct)), width="stretch")
+    st.dataframe(sens, use_container_width=True)
+
+# Two-input heatmap sweep (only if enabled)
+st.subheader("Heatmap Sweep")
+show_sweep = st.checkbox("Sweep two inputs over a grid", value=False)
+if show_sweep:
+    from sensitivity import sensitivity_knobs
+    from sweep import SWEEP_METRICS, default_range, grid_values, run_sweep
+
+    knobs = {k.label: k for k in sensitivity_knobs(scenario)}
+    labels = list(knobs)
+    sx, sy = st.columns(2)
+    x_label = sx.selectbox("X input", labels, index=0)
+    y_label = sy.selectbox("Y input", labels, index=min(1, len(labels) - 1))
+    knob_x, knob_y = knobs[x_label], knobs[y_label]
+    x_lo0, x_hi0 = default_range(knob_x, scenario)
+    y_lo0, y_hi0 = default_range(knob_y, scenario)
+    x_lo = sx.number_input("X from", value=float(x_lo0), format="%g", key=f"sweep_x_lo_{x_label}")
+    x_hi = sx.number_input("X to", value=float(x_hi0), format="%g", key=f"sweep_x_hi_{x_label}")
+    y_lo = sy.number_input("Y from", value=float(y_lo0), format="%g", key=f"sweep_y_lo_{y_label}")
+    y_hi = sy.number_input("Y to", value=float(y_hi0), format="%g", key=f"sweep_y_hi_{y_label}")
+    grid_n = st.slider("Grid points per axis", 10, 100, 50, 5)
+    sweep_metric = st.selectbox("Metric", SWEEP_METRICS)
+    if knob_x == knob_y:
+        st.error("Pick two different inputs.")
+    else:
+        xs = grid_values(knob_x, scenario, x_lo, x_hi, grid_n)
+        ys = grid_values(knob_y, scenario, y_lo, y_hi, grid_n)
+        sweep_grids = run_sweep(scenario, knob_x, xs, knob_y, ys)
+        grid = sweep_grids[sweep_metric]
+        st.image(heatmap_png(xs, ys, grid, x_label, y_label, sweep_metric), width="stretch")
+        sweep_format = st.radio("Sweep export format", list(COLUMNAR_FORMATS), horizontal=True, key="sweep_export_format")
+        st.download_button(
+            label=f"Download every metric per cell ({sweep_format.title()})",
+            data=lambda: sweep_export(xs, ys, sweep_grids, x_label, y_label, sweep_format),
+            file_name=f"sweep.{COLUMNAR_FORMATS[sweep_format][0]}",
+            mime=COLUMNAR_FORMATS[sweep_format][1],
+        )
+
+# Monte Carlo fan charts (only if enabled)
+if monte_carlo:
+    mc_spec = MonteCarloSpec(
+        n_paths=int(mc_paths),
+        seed=int(mc_seed),
+        distribution=mc_distribution,
+        retirement_return_sd=float(mc_retirement_sd),
+        value_growth_sd=float(mc_value_sd),
+        rent_growth_sd=float(mc_rent_sd),
+        pharmacy_profit_growth_sd=float(mc_pharmacy_sd),
+        vacancy_sd=float(mc_vacancy_sd),
+        property_correlation=float(mc_property_corr),
+        value_rent_corr=float(mc_value_rent_corr),
+        value_vacancy_corr=float(mc_value_vacancy_corr),
+        rent_vacancy_corr=float(mc_rent_vacancy_corr),
+        history_file=mc_history_file or None,
+        history_frequency=mc_history_frequency,
+        block_years=int(mc_block_years),
+    )
+    st.subheader(f"Monte Carlo ({mc_spec.n_paths:,} paths)")
+    if mc_spec.history_file and not os.path.exists(mc_spec.history_file):
+        st.error(f"History file not found: {mc_spec.history_file}")
+    else:
+        history_mtime = os.path.getmtime(mc_spec.history_file) if mc_spec.history_file else 0.0
+        try:
+            bands = run_fan_bands(scenario, mc_spec, history_mtime, int(mc_workers))
+        except ValueError as e:
+            st.error(f"Monte Carlo settings rejected: {e}")
+            bands = {}
+        for col in bands:
+            st.image(fan_chart_png(df["Year"], bands[col], df[col], col, FAN_PERCENTILES), width="stretch")
+        if bands:
+            e1, e2 = st.columns([3, 1])
+            mc_export_columns = e1.multiselect("Columns in the paths export", BATCH_COLUMNS, default=FAN_COLUMNS)
+            mc_format = e2.radio("Format", list(COLUMNAR_FORMATS), horizontal=True, key="mc_export_format")
+            st.download_button(
+                label=f"Download every path ({mc_format.title()}, {mc_spec.n_paths * len(df):,} rows)",
+                data=lambda: monte_carlo_export(scenario, mc_spec, mc_format, mc_export_columns),
+                file_name=f"monte_carlo_paths.{COLUMNAR_FORMATS[mc_format][0]}",
+                mime=COLUMNAR_FORMATS[mc_format][1],
+                disabled=not mc_export_columns,
+            )
 
 with st.expander("Notes / simplifications"):
     st.markdown(
@@ -1214,10 +945,14 @@ with st.expander("Notes / simplifications"):
     - **Simple effective tax %** (per-person), or
     - **Tax estimator** (household-level progressive federal + optional state + optional employee FICA).
 - **Tax estimator** (offline approximation):
-  - Uses standard deduction + offline 2026 brackets in the code.
+  - Uses standard deduction + offline brackets from `tax_tables/<year>.json` (add a file to add a year).
+  - Tables stay frozen at the chosen year unless indexed to expense growth.
   - Optional: treats **401(k) employee contributions** as pre-tax to reduce taxable income.
   - Optional: includes employee-side FICA (SS+Medicare+Additional Medicare).
   - Planning-level only (not a substitute for actual tax preparation).
+- **Student loans**:
+  - The annual payment is charged in every year of the repayment horizon, including the final year, and stops after it.
+  - Earlier versions stopped on the computed balance instead. Rounding could drop the final year's payment or keep charging it after payoff, so results from before this change can differ by about one annual payment.
 - **New house mortgage**:
   - Models annual **PITI + HOA + PMI** as a cashflow expense starting at the selected year.
   - Optional simple equity tracking if you compute loan from price/down.
@@ -1229,6 +964,10 @@ with st.expander("Notes / simplifications"):
   - One draw event per property, capped by CLTV; interest charged annually.
 - **Liquidation**:
   - No closing costs/taxes modeled on rental sales (yet).
+- **Monthly resolution** (sidebar):
+  - Loans pay monthly from their amortization schedules and stop at payoff; rent, HELOC interest and retirement returns accrue monthly.
+  - Home and pharmacy values are still revalued yearly; purchases/draws land in the first month of their year, sales close in the last.
+  - A property sold in a year no longer counts in that year's year-end balances.
         """
     )
 
@@ -1242,7 +981,7 @@ report_notes = st.text_area("Report notes (optional)", "")
 
 hide_cols_default = []
 cols_to_hide = st.multiselect("Hide columns in report", options=list(df.columns), default=hide_cols_default)
-df_report = df.drop(columns=cols_to_hide, errors="ignore").copy()
+df_report = rounded(df.drop(columns=cols_to_hide, errors="ignore"))
 
 summary_lines = [
     f"Report Title: {report_title}",
@@ -1273,63 +1012,24 @@ st.dataframe(df_report, use_container_width=True)
 
 st.markdown("### Downloads")
 
-csv_bytes = df_report.to_csv(index=False).encode("utf-8")
+# Each file is built only when its button is clicked, then cached by the report's contents
 st.download_button(
     label="Download report table (CSV)",
-    data=csv_bytes,
+    data=lambda: report_csv(df_report),
     file_name="financial_report.csv",
     mime="text/csv",
 )
 
-html_table = df_report.to_html(index=False)
-
-notes_html = ""
-if report_notes.strip():
-    notes_html = "<h2>Notes</h2><div class='summary'>" + report_notes.replace("\n", "<br>") + "</div>"
-
-# IMPORTANT: HTML is kept entirely inside a string to avoid SyntaxErrors.
-html_doc = (
-    "<!doctype html>"
-    "<html><head><meta charset='utf-8' />"
-    f"<title>{report_title}</title>"
-    "<style>"
-    "body{font-family:Arial,sans-serif;padding:24px;}"
-    "h1,h2,h3{margin:0.4em 0;}"
-    ".summary{white-space:pre-wrap;background:#f7f7f7;padding:12px;border-radius:8px;}"
-    "table{border-collapse:collapse;width:100%;font-size:12px;}"
-    "th,td{border:1px solid #ddd;padding:6px 8px;}"
-    "th{background:#f0f0f0;}"
-    "@media print{body{padding:0;}table{font-size:10px;}}"
-    "</style></head><body>"
-    f"<h1>{report_title}</h1>"
-    "<h2>Summary</h2>"
-    f"<div class='summary'>{summary_text.replace(chr(10), '<br>')}</div>"
-    f"{notes_html}"
-    "<h2>Results</h2>"
-    f"{html_table}"
-    "</body></html>"
-)
-
 st.download_button(
     label="Download printable report (HTML)",
-    data=html_doc.encode("utf-8"),
+    data=lambda: report_html(df_report, report_title, summary_text, report_notes),
     file_name="financial_report.html",
     mime="text/html",
 )
 
-try:
-    md_table = df_report.to_markdown(index=False)
-except Exception:
-    md_table = df_report.to_csv(index=False)
-
-md_doc = f"# {report_title}\n\n## Summary\n\n```\n{summary_text}\n```\n\n"
-if report_notes.strip():
-    md_doc += f"## Notes\n\n{report_notes}\n\n"
-md_doc += "## Results Table\n\n" + md_table + "\n"
-
 st.download_button(
     label="Download report (Markdown)",
-    data=md_doc.encode("utf-8"),
+    data=lambda: report_markdown(df_report, report_title, summary_text, report_notes),
     file_name="financial_report.md",
     mime="text/markdown",
 )
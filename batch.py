@@ -0,0 +1,544 @@
+"""
+Batched simulation: N scenario variants at once as (scenario x year) arrays.
+
+`simulate_batch()` runs the same model as `engine.simulate()`, but every
+quantity carries a leading scenario axis, so a what-if sweep over
+`retirement_return`, `heloc_rate`, `expense_growth`, property inputs, etc.
+is one pass over the years instead of N full simulations. Results come back
+as a dict of float arrays shaped (N, horizon + 1), keyed by the same column
+names as the results DataFrame (unrounded).
+
+`paths` optionally replaces a constant rate with a per-year one:
+    "retirement_return"           (N, T)     %/yr
+    "pharmacy_profit_growth_pct"  (N, T)     %/yr
+    "value_growth"                (N, P, T)  fraction/yr
+    "rent_growth"                 (N, P, T)  fraction/yr
+    "vacancy_pct"                 (N, P, T)  fraction of rent
+Column t of a growth path is the growth applied going into year t.
+"""
+from dataclasses import fields
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from amortization import ScheduleTable
+from engine import PropertyInputs, Scenario
+from taxes import TAX_MODE_SIMPLE, fica_tax, project_taxes_batch
+
+SCENARIO_FIELDS = [f.name for f in fields(Scenario) if f.name != "properties"]
+PROPERTY_FIELDS = [f.name for f in fields(PropertyInputs) if f.name not in ("name", "mortgage_balance_year0")]
+
+# Every numeric column of engine.simulate() except "Year"
+BATCH_COLUMNS = [
+    "Cody Gross", "Lauren Gross", "Other Gross",
+    "Cody Net", "Lauren Net", "Other Net",
+    "Income (Net Total)",
+    "Estimated Taxes (Total)", "Estimated Federal Tax", "Estimated State Tax", "Estimated FICA",
+    "Expenses (non-property)", "New Home PITI+HOA (annual)",
+    "Retirement Employee Contrib", "Retirement Employer Match", "IRA Contributions", "Retirement Balance (Total)",
+    "Student Loan Pay", "Student Loan Remaining",
+    "Rental Cash Flow", "Mortgage Savings",
+    "Pharmacy Profit", "Pharmacy Note Payment", "Pharmacy Note Interest", "Pharmacy Note Principal",
+    "Pharmacy Extra Principal", "Pharmacy Note Balance", "Pharmacy Equity Value",
+    "Net Cash Flow",
+    "Investable Cash", "Total Property Value (active)", "Total Equity (active rentals)", "HELOC Outstanding",
+    "New Home Value", "New Home Mortgage Balance", "New Home Equity", "New Home Liquidation Proceeds",
+    "Net Worth",
+    "Active Properties", "Acquired This Year", "Liquidated This Year", "HELOC Drawn This Year",
+]
+
+# -----------------------------
+# Stacking scenarios into arrays
+# -----------------------------
+def stack_scenarios(scenarios: Sequence[Scenario]):
+    """
+    Turn N scenarios into (household, properties) dicts of arrays shaped
+    (N,) and (N, P). Property lists of different lengths are padded with
+    placeholder properties whose "present" flag is False.
+    """
+    if not scenarios:
+        raise ValueError("simulate_batch needs at least one scenario")
+    horizons = {int(s.horizon_years) for s in scenarios}
+    if len(horizons) != 1:
+        raise ValueError("All scenarios in a batch must share the same horizon_years")
+
+    hh = {name: np.array([getattr(s, name) for s in scenarios]) for name in SCENARIO_FIELDS}
+
+    n_props = max(len(s.properties) for s in scenarios)
+    pad = PropertyInputs()
+    grid = [list(s.properties) + [pad] * (n_props - len(s.properties)) for s in scenarios]
+
+    props = {
+        name: np.array([[getattr(p, name) for p in row] for row in grid]).reshape(len(scenarios), n_props)
+        for name in PROPERTY_FIELDS
+    }
+    props["mortgage_balance_year0"] = np.array(
+        [[np.nan if p.mortgage_balance_year0 is None else p.mortgage_balance_year0 for p in row] for row in grid],
+        dtype=float,
+    ).reshape(len(scenarios), n_props)
+    props["present"] = np.array(
+        [[j < len(s.properties) for j in range(n_props)] for s in scenarios], dtype=bool
+    ).reshape(len(scenarios), n_props)
+    derive_inputs(hh, props)
+    return hh, props
+
+def derive_inputs(hh: Dict[str, np.ndarray], props: Dict[str, np.ndarray]) -> None:
+    """
+    (Re)compute the inputs derived from others, in place: the new-home loan
+    and each property's starting loan. Call after editing stacked fields.
+    """
+    from_price = hh["new_home_enabled"] & hh["compute_loan_from_price"]
+    price_loan = np.maximum(0.0, hh["new_home_purchase_price"] * (1.0 - hh["new_home_down_pct"] / 100.0))
+    hh["new_home_loan_amount_eff"] = np.where(from_price, price_loan, hh["new_home_loan_amount"]).astype(float)
+    props["loan_principal"] = np.where(
+        props["is_existing"],
+        props["mortgage_balance_year0"],
+        props["purchase_price"] * (1 - props["down_pct"] / 100.0),
+    ).astype(float)
+
+def _masked_sum(x: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Per-row sum of x (N, P) over the properties selected by mask."""
+    if mask.shape[0] == 1:
+        return x @ mask[0].astype(float)
+    return (x * mask) @ np.ones(mask.shape[1])
+
+def _growth_from(rate_path: np.ndarray, start: np.ndarray, years: np.ndarray) -> np.ndarray:
+    """Compound factor from `start` to each year for a per-year rate path (1.0 up to and including start)."""
+    cum = np.cumprod(1.0 + rate_path, axis=-1)
+    idx = np.clip(start, 0, len(years) - 1).astype(int)
+    base = np.take_along_axis(cum, idx[..., None], axis=-1)
+    return np.where(years > start[..., None], cum / base, 1.0)
+
+# -----------------------------
+# Batched simulation
+# -----------------------------
+def run_batch(hh: Dict[str, np.ndarray], props: Dict[str, np.ndarray], years: np.ndarray,
+              paths: Optional[Dict[str, np.ndarray]] = None,
+              columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Core batched loop. `hh` arrays are (N,) and `props` arrays are (N, P);
+    either may have N == 1 and broadcast against `paths`, in which case
+    inputs that don't vary are only evaluated once. Columns that don't depend
+    on carried state can come back as read-only broadcast views. `columns`
+    picks a subset of BATCH_COLUMNS; year-by-year buffers are only
+    allocated for the ones asked for.
+    """
+    columns = list(BATCH_COLUMNS if columns is None else columns)
+    unknown = [c for c in columns if c not in BATCH_COLUMNS]
+    if unknown:
+        raise ValueError(f"unknown batch column(s): {', '.join(unknown)}")
+    paths = paths or {}
+    T = len(years)
+    N = max([len(v) for v in hh.values()] + [len(v) for v in props.values()] + [len(v) for v in paths.values()])
+    P = props["present"].shape[1]
+
+    Y = years[None, :]
+
+    def c(name):
+        return hh[name][:, None].astype(float)
+
+    def i(name):
+        return hh[name][:, None].astype(int)
+
+    def b(name):
+        return hh[name][:, None].astype(bool)
+
+    zeros = np.zeros((1, T))
+    out = {}
+
+    # -------------------------
+    # Gross incomes
+    # -------------------------
+    def income(base, growth, start):
+        t = Y - i(start)
+        return np.where(t >= 0, c(base) * (1 + c(growth) / 100.0) ** np.maximum(t, 0), 0.0)
+
+    cody_gross = income("cody_gross0", "cody_growth", "cody_income_start")
+    lauren_gross = income("lauren_gross0", "lauren_growth", "lauren_income_start")
+    other_gross = income("other_income0", "other_income_growth", "other_income_start")
+
+    # -------------------------
+    # Retirement contributions
+    # -------------------------
+    def contributions(person, gross):
+        on = Y >= i(f"{person}_contrib_start_year")
+        contrib_pct = c(f"{person}_contrib_pct")
+        cap_pct = c(f"{person}_match_cap_pct")
+        effective_contrib_pct = np.where(cap_pct > 0, np.minimum(contrib_pct, cap_pct), 0.0)
+        emp = np.where(on, gross * (contrib_pct / 100.0), 0.0)
+        match = np.where(on, gross * (np.minimum(c(f"{person}_employer_match_pct"), effective_contrib_pct) / 100.0), 0.0)
+        ira = np.where(gross > 0, c(f"{person}_ira_annual"), 0.0)
+        return emp, match, ira
+
+    cody_emp, cody_match, cody_ira = contributions("cody", cody_gross)
+    lauren_emp, lauren_match, lauren_ira = contributions("lauren", lauren_gross)
+
+    # -------------------------
+    # Taxes / net pay (simple and estimator, selected per scenario)
+    # -------------------------
+    other_is_net = b("other_income_is_net")
+    show_tax = b("show_tax_line_item")
+    estimate = (hh["tax_mode"] != TAX_MODE_SIMPLE)[:, None]
+
+    cody_net = cody_gross * (1.0 - c("cody_effective_tax_pct") / 100.0)
+    lauren_net = lauren_gross * (1.0 - c("lauren_effective_tax_pct") / 100.0)
+    other_net = np.where(other_is_net, other_gross, other_gross * (1.0 - c("other_effective_tax_pct") / 100.0))
+    total_tax = np.where(show_tax, (cody_gross - cody_net) + (lauren_gross - lauren_net) + (other_gross - other_net), 0.0)
+    est_federal = zeros
+    est_state = zeros
+    est_fica = zeros
+
+    if estimate.any():
+        tables = project_taxes_batch(hh["tax_year"], hh["filing_status"], hh["tax_indexation_pct"], T)
+        household_gross = cody_gross + lauren_gross + np.where(other_is_net, 0.0, other_gross)
+        pretax = np.where(b("assume_employee_contribs_pretax"), cody_emp + lauren_emp, 0.0)
+
+        taxable = np.maximum(0.0, household_gross - pretax - tables.standard_deduction)
+        est_federal = np.where(estimate, tables.federal_tax(taxable), 0.0)
+
+        with_state = b("include_state_tax") & (c("state_tax_pct") > 0)
+        est_state = np.where(estimate & with_state, np.maximum(0.0, household_gross - pretax) * (c("state_tax_pct") / 100.0), 0.0)
+
+        threshold = c("addl_medicare_threshold")
+        est_fica = np.where(
+            estimate & b("include_fica"),
+            fica_tax(cody_gross, tables.ss_wage_base, threshold) + fica_tax(lauren_gross, tables.ss_wage_base, threshold),
+            0.0
+        )
+
+        est_total = est_federal + est_state + est_fica
+        net_taxable = np.maximum(0.0, household_gross - est_total)
+        has_income = household_gross > 0
+        safe_denom = np.where(has_income, household_gross, 1.0)
+
+        cody_net = np.where(estimate, np.where(has_income, net_taxable * (cody_gross / safe_denom), 0.0), cody_net)
+        lauren_net = np.where(estimate, np.where(has_income, net_taxable * (lauren_gross / safe_denom), 0.0), lauren_net)
+        other_net = np.where(
+            estimate & ~other_is_net,
+            np.where(has_income, net_taxable * (other_gross / safe_denom), 0.0),
+            other_net
+        )
+        total_tax = np.where(estimate, est_total, total_tax)
+
+    income_net = cody_net + lauren_net + other_net
+
+    # -------------------------
+    # Expenses (inflation) + modes
+    # -------------------------
+    base_expenses = c("base_living_expenses") * ((1 + c("expense_growth") / 100.0) ** Y)
+    pushing = b("push_hard") & (Y < i("push_years"))
+    frugal = b("frugal_mode") & (i("frugal_start") <= Y) & (Y < i("frugal_start") + i("frugal_years"))
+    base_expenses = np.where(frugal, base_expenses * (1.0 - c("frugal_expense_reduction_pct") / 100.0), base_expenses)
+
+    income_total = income_net + np.where(pushing, c("push_extra_income"), 0.0)
+    expenses = base_expenses + np.where(pushing, c("push_extra_cost"), 0.0)
+
+    # -------------------------
+    # Student loans
+    # -------------------------
+    sl_balance0 = c("student_loan_balance0")
+    sl_term = i("student_loan_years")
+    sl_start = i("student_loan_start_year")
+    sl_loans = ScheduleTable(sl_balance0, c("student_loan_interest_rate") / 100.0, sl_term)
+    sl_payment = 12.0 * sl_loans.payment()
+    months_paid = np.minimum((Y - sl_start + 1) * 12, sl_term * 12)
+    sl_bal = np.where(months_paid >= sl_term * 12, 0.0, sl_loans.balance_after(months_paid))
+    sl_remaining = np.where(Y < sl_start, sl_balance0, sl_bal)
+    # Paid in every year that starts with a balance, including the year of the last payment
+    sl_pay = np.where((Y >= sl_start) & ((Y - sl_start) * 12 < sl_term * 12), sl_payment, 0.0)
+
+    # -------------------------
+    # New home (PITI + HOA + PMI) and optional equity
+    # -------------------------
+    nh_loan = c("new_home_loan_amount_eff")
+    nh_rate = c("new_home_rate_pct") / 100.0
+    nh_term = i("new_home_term_years")
+    nh_start = i("new_home_start_year")
+    nh_paying = b("new_home_enabled") & (nh_loan > 0) & (Y >= nh_start)
+    nh_loans = ScheduleTable(nh_loan, nh_rate, nh_term)
+
+    nh_piti = (
+        12.0 * nh_loans.payment()
+        + (c("new_home_property_tax_annual") + c("new_home_insurance_annual"))
+        + 12.0 * c("new_home_pmi_monthly")
+        + 12.0 * c("new_home_hoa_monthly")
+    )
+
+    nh_tracked = b("include_new_home_equity_in_networth") & b("compute_loan_from_price") & (c("new_home_purchase_price") > 0)
+    nh_yrs_held = np.maximum(0, Y - nh_start)
+    nh_value = c("new_home_purchase_price") * ((1 + c("new_home_value_growth_pct") / 100.0) ** nh_yrs_held)
+    nh_bal = nh_loans.balance_after(nh_yrs_held * 12)
+
+    nh_sell = i("new_home_sell_year")
+    nh_sells = nh_tracked & (nh_sell > 0) & (nh_sell >= nh_start)
+    nh_proceeds = np.where(
+        nh_paying & nh_sells & (Y == nh_sell),
+        np.maximum(0.0, nh_value - (c("new_home_selling_cost_pct") / 100.0) * nh_value - nh_bal),
+        0.0
+    )
+    nh_paying = nh_paying & ~(nh_sells & (Y > nh_sell))
+    nh_shown = nh_paying & nh_tracked
+
+    out["New Home PITI+HOA (annual)"] = np.where(nh_paying, nh_piti, 0.0)
+    out["New Home Value"] = np.where(nh_shown, nh_value, 0.0)
+    out["New Home Mortgage Balance"] = np.where(nh_shown, nh_bal, 0.0)
+    out["New Home Equity"] = np.where(nh_shown, np.maximum(0.0, nh_value - nh_bal), 0.0)
+    out["New Home Liquidation Proceeds"] = nh_proceeds
+
+    # -------------------------
+    # Mortgage savings
+    # -------------------------
+    mort_savings = np.where(
+        b("include_mortgage_prepay_savings") & (Y >= i("mortgage_savings_start_year")),
+        c("mortgage_savings_annual"),
+        0.0
+    )
+
+    # -------------------------
+    # Pharmacy profit + equity value
+    # -------------------------
+    ph_enabled = hh["pharmacy_buyin_enabled"].astype(bool)
+    ph_buy_year = hh["pharmacy_buyin_year"].astype(int)
+    ph_owned = ph_enabled[:, None] & (Y >= ph_buy_year[:, None])
+    ph_equity = np.where(
+        ph_owned,
+        c("pharmacy_buyin_price") * ((1 + c("pharmacy_equity_growth_pct") / 100.0) ** np.maximum(0, Y - ph_buy_year[:, None])),
+        0.0
+    )
+    ph_growth_start = hh["pharmacy_profit_growth_start_year"].astype(int)
+    if "pharmacy_profit_growth_pct" in paths:
+        ph_growth = _growth_from(
+            np.broadcast_to(paths["pharmacy_profit_growth_pct"], (N, T)) / 100.0,
+            np.broadcast_to(ph_growth_start, (N,)),
+            years
+        )
+    else:
+        ph_growth = (1 + c("pharmacy_profit_growth_pct") / 100.0) ** np.maximum(0, Y - ph_growth_start[:, None])
+    ph_profit = np.where(ph_owned & (Y >= i("pharmacy_profit_start_year")), c("pharmacy_expected_profit") * ph_growth, 0.0)
+
+    # -------------------------
+    # Carried state: cash, retirement, properties, seller note
+    # -------------------------
+    cash = np.broadcast_to(hh["starting_cash"], (N,)).astype(float)
+    cody_ret = np.broadcast_to(hh["cody_ret_balance0"], (N,)).astype(float)
+    lauren_ret = np.broadcast_to(hh["lauren_ret_balance0"], (N,)).astype(float)
+    retirement_return = paths.get("retirement_return")
+    if retirement_return is not None:
+        retirement_return = np.broadcast_to(retirement_return, (N, T))
+
+    present = props["present"]
+    purchase = props["purchase_year"].astype(int)
+    existing = props["is_existing"].astype(bool)
+    liquidation = props["liquidation_year"].astype(int)
+    value0 = props["value_year0"].astype(float)
+    loan_principal = props["loan_principal"]
+    mortgage_rate = props["mortgage_rate"].astype(float)
+    term = props["term_years"].astype(int)
+    down_needed = props["purchase_price"] * (props["down_pct"] / 100.0)
+    rent_start = props["rent_start_year"].astype(int)
+    rent_month = props["gross_rent_month"].astype(float)
+    heloc_enabled = props["heloc_enabled"].astype(bool)
+    heloc_cltv = props["heloc_cltv"].astype(float)
+    heloc_draw_year = props["heloc_draw_year"].astype(int)
+    heloc_draw_amount = props["heloc_draw_amount"].astype(float)
+    loans = ScheduleTable(loan_principal, mortgage_rate, term)
+    fixed_costs = 12 * props["tax_ins_month"] + 12 * loans.payment()
+    keep_share = 1.0 - (props["pm_pct"] + props["maintenance_pct"] + props["capex_pct"])
+    heloc_rate = hh["heloc_rate"].astype(float)[:, None] / 100.0
+
+    def year_major(key):
+        path = paths.get(key)
+        if path is None:
+            return None
+        return np.ascontiguousarray(np.moveaxis(np.broadcast_to(path, (N, P, T)), -1, 0))
+
+    def since(index, start):
+        """1 / index at each property's start year, so index[t] * since(...) is the growth since start."""
+        at = np.broadcast_to(np.clip(start, 0, T - 1), (N, P))[None]
+        return 1.0 / np.take_along_axis(index, at, axis=0)[0]
+
+    # Stochastic growth runs through cumulative (year, path, property) indexes
+    value_index = year_major("value_growth")
+    if value_index is not None:
+        value_index = np.cumprod(1.0 + value_index, axis=0)
+        value_base = value0 * since(value_index, purchase)
+    rent_index = year_major("rent_growth")
+    if rent_index is not None:
+        rent_index = np.cumprod(1.0 + rent_index, axis=0)
+        rent_base = 12 * rent_month * since(rent_index, rent_start)
+    vacancy_path = year_major("vacancy_pct")
+    if vacancy_path is None:
+        keep_share = keep_share - props["vacancy_pct"]
+
+    heloc = np.zeros((1, P))
+    active = present.copy()
+
+    note_balance = np.zeros(N)
+    note_payment = np.zeros(N)
+    ph_active = np.zeros(N, dtype=bool)
+    note_rate = np.where(ph_enabled, hh["seller_note_rate_pct"].astype(float) / 100.0, 0.0)
+    note_years = hh["seller_note_years"].astype(int)
+    note_principal0 = np.maximum(0.0, hh["pharmacy_buyin_price"].astype(float) - hh["pharmacy_cash_down"].astype(float))
+    note_annual = ScheduleTable(note_principal0, note_rate, note_years, periods_per_year=1).payment()
+    note_annual = np.where((note_years > 0) & (note_principal0 > 0), note_annual, 0.0)
+    accel = hh["enable_accel_paydown"].astype(bool)
+    lump = np.where(accel & (hh["accel_year"].astype(int) > 0), hh["lauren_dist_lump"].astype(float), 0.0)
+    recurring = np.where(accel, hh["extra_principal_recurring"].astype(float), 0.0)
+
+    stateful = [
+        "Retirement Balance (Total)",
+        "Rental Cash Flow", "Total Property Value (active)", "Total Equity (active rentals)", "HELOC Outstanding",
+        "Active Properties", "Acquired This Year", "Liquidated This Year", "HELOC Drawn This Year",
+        "Pharmacy Note Payment", "Pharmacy Note Interest", "Pharmacy Note Principal",
+        "Pharmacy Extra Principal", "Pharmacy Note Balance",
+        "Net Cash Flow", "Investable Cash", "Net Worth",
+    ]
+    # Year-major buffers so each year writes one contiguous row; columns
+    # nobody asked for share one scratch buffer
+    scratch = np.zeros((T, N))
+    rows = {name: np.zeros((T, N)) if name in columns else scratch for name in stateful}
+
+    ret_outflow = np.where(b("count_retirement_contrib_as_expense"), cody_emp + lauren_emp + cody_ira + lauren_ira, 0.0)
+    reinvest = hh["reinvest_surplus"].astype(bool)
+
+    for t, y in enumerate(years.tolist()):
+        # Retirement balances
+        r = retirement_return[:, t] if retirement_return is not None else hh["retirement_return"].astype(float)
+        cody_ret = (cody_ret + cody_emp[:, t] + cody_match[:, t] + cody_ira[:, t]) * (1.0 + r / 100.0)
+        lauren_ret = (lauren_ret + lauren_emp[:, t] + lauren_match[:, t] + lauren_ira[:, t]) * (1.0 + r / 100.0)
+        rows["Retirement Balance (Total)"][t] = cody_ret + lauren_ret
+
+        cash = cash + nh_proceeds[:, t]
+
+        # Properties
+        owned = active & (y >= purchase)
+        buying = owned & ~existing & (y == purchase)
+        if buying.any():
+            cash = cash - _masked_sum(down_needed, buying)
+
+        held = np.maximum(0, y - purchase)
+        if value_index is None:
+            home_value = value0 * (1 + props["value_growth"]) ** held
+        else:
+            home_value = value_base * value_index[t]
+        mort_bal = loans.balance_after(held * 12)
+
+        drawing = owned & heloc_enabled & (heloc_draw_year > 0) & (heloc_draw_year == y)
+        drawn = 0.0
+        if drawing.any():
+            allowed = np.maximum(0.0, heloc_cltv * home_value - mort_bal)
+            draw = np.where(drawing, np.maximum(0.0, np.minimum(heloc_draw_amount, allowed)), 0.0)
+            heloc = heloc + draw
+            drawn = draw @ np.ones(P)
+            cash = cash + drawn
+        rows["HELOC Drawn This Year"][t] = drawn
+
+        if rent_index is None:
+            gross_rent = np.where(y >= rent_start, 12 * rent_month * (1 + props["rent_growth"]) ** np.maximum(0, y - rent_start), 0.0)
+        else:
+            gross_rent = np.where(y >= rent_start, rent_base, 0.0) * rent_index[t]
+        keep = keep_share if vacancy_path is None else keep_share - vacancy_path[t]
+        net_rent = gross_rent * keep - (fixed_costs + heloc * heloc_rate)
+
+        value_total = _masked_sum(home_value, owned)
+        heloc_total = _masked_sum(heloc, owned)
+        rental_cf = _masked_sum(net_rent, owned)
+        equity_total = value_total - _masked_sum(mort_bal, owned) - heloc_total
+        rows["Rental Cash Flow"][t] = rental_cf
+        rows["Total Property Value (active)"][t] = value_total
+        rows["Total Equity (active rentals)"][t] = equity_total
+        rows["HELOC Outstanding"][t] = heloc_total
+        rows["Active Properties"][t] = owned.sum(axis=1)
+        rows["Acquired This Year"][t] = buying.sum(axis=1)
+
+        selling = owned & (liquidation > 0) & (liquidation == y)
+        if selling.any():
+            cash = cash + _masked_sum(np.maximum(0.0, home_value - mort_bal - heloc), selling)
+            active = active & ~selling
+        rows["Liquidated This Year"][t] = selling.sum(axis=1)
+
+        # Pharmacy seller note
+        buying_in = ph_enabled & ~ph_active & (ph_buy_year == y)
+        ph_active = ph_active | buying_in
+        cash = cash - np.where(buying_in, hh["pharmacy_cash_down"].astype(float), 0.0)
+        note_balance = np.where(buying_in, note_principal0, note_balance)
+        note_payment = np.where(buying_in, note_annual, note_payment)
+
+        amortizing = ph_active & (note_balance > 0) & (note_payment > 0)
+        extra = (
+            np.where(hh["accel_year"].astype(int) == y, lump, 0.0)
+            + np.where((recurring > 0) & (y >= hh["recurring_extra_start_year"].astype(int)), recurring, 0.0)
+        )
+        interest = note_balance * note_rate
+        principal_paid = np.minimum(note_balance, np.maximum(0.0, note_payment - interest) + np.maximum(0.0, extra))
+        note_paid = np.where(amortizing, interest + principal_paid, 0.0)
+        rows["Pharmacy Note Payment"][t] = note_paid
+        rows["Pharmacy Note Interest"][t] = np.where(amortizing, interest, 0.0)
+        rows["Pharmacy Note Principal"][t] = np.where(amortizing, principal_paid, 0.0)
+        rows["Pharmacy Extra Principal"][t] = np.where(amortizing, extra, 0.0)
+        note_balance = np.where(amortizing, np.maximum(0.0, note_balance - principal_paid), note_balance)
+        rows["Pharmacy Note Balance"][t] = note_balance
+
+        # Net cash flow and cash update
+        net_cash_flow = (
+            income_total[:, t]
+            - expenses[:, t]
+            - out["New Home PITI+HOA (annual)"][:, t]
+            - sl_pay[:, t]
+            + rental_cf
+            + mort_savings[:, t]
+            + ph_profit[:, t]
+            - note_paid
+            - ret_outflow[:, t]
+        )
+        cash = np.where(reinvest, cash + net_cash_flow, cash)
+        rows["Net Cash Flow"][t] = net_cash_flow
+        rows["Investable Cash"][t] = cash
+
+        # Net worth
+        net_worth = cash + equity_total - sl_remaining[:, t]
+        net_worth = net_worth + np.where(hh["include_retirement_in_networth"].astype(bool), cody_ret + lauren_ret, 0.0)
+        net_worth = net_worth + np.where(
+            ph_enabled & hh["include_pharmacy_equity_in_networth"].astype(bool) & ph_active,
+            ph_equity[:, t] - note_balance,
+            0.0
+        )
+        net_worth = net_worth + np.where(
+            hh["include_new_home_equity_in_networth"].astype(bool),
+            out["New Home Equity"][:, t],
+            0.0
+        )
+        rows["Net Worth"][t] = net_worth
+
+    for name in stateful:
+        if name in columns:
+            out[name] = rows[name].T
+    out.update({
+        "Cody Gross": cody_gross,
+        "Lauren Gross": lauren_gross,
+        "Other Gross": other_gross,
+        "Cody Net": cody_net,
+        "Lauren Net": lauren_net,
+        "Other Net": other_net,
+        "Income (Net Total)": income_total,
+        "Estimated Taxes (Total)": np.where(show_tax, total_tax, 0.0),
+        "Estimated Federal Tax": np.where(show_tax, est_federal, 0.0),
+        "Estimated State Tax": np.where(show_tax, est_state, 0.0),
+        "Estimated FICA": np.where(show_tax, est_fica, 0.0),
+        "Expenses (non-property)": expenses,
+        "Retirement Employee Contrib": cody_emp + lauren_emp,
+        "Retirement Employer Match": cody_match + lauren_match,
+        "IRA Contributions": cody_ira + lauren_ira,
+        "Student Loan Pay": sl_pay,
+        "Student Loan Remaining": sl_remaining,
+        "Mortgage Savings": mort_savings,
+        "Pharmacy Profit": ph_profit,
+        "Pharmacy Equity Value": np.where(ph_owned, ph_equity, 0.0),
+    })
+    return {name: np.broadcast_to(out[name], (N, T)) for name in columns}
+
+def simulate_batch(scenarios: Sequence[Scenario], paths: Optional[Dict[str, np.ndarray]] = None,
+                   columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+    """Simulate N scenarios at once; every column comes back shaped (N, horizon + 1)."""
+    hh, props = stack_scenarios(scenarios)
+    return run_batch(hh, props, scenarios[0].years, paths, columns)
@@ -0,0 +1,109 @@
+"""
+Startup benchmark: how long the modules take to import and the app takes
+to render, each measured in a fresh interpreter.
+
+    python bench_startup.py
+    python bench_startup.py --repeat 5 --max-import 0.5 --max-render 6
+
+The engine stack (engine, batch, executor, incremental) must import without
+pandas, matplotlib or Streamlit; that is always checked. --max-import and
+--max-render set budgets in seconds (best of --repeat runs) for the engine
+imports and the first app render; the script exits nonzero if any check
+fails, so it can run in CI.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ("pandas", "matplotlib", "streamlit")
+
+# Imports that must stay free of HEAVY_MODULES
+ENGINE_IMPORTS = ["engine", "batch", "executor", "incremental"]
+IMPORT_TARGETS = {
+    "engine stack": ENGINE_IMPORTS,
+    "charts + report": ["charts", "report"],
+    "app modules": ["streamlit", "bootstrap", "charts", "engine", "executor", "incremental", "monthly",
+                    "montecarlo", "report", "taxes"],
+}
+
+_IMPORT_SCRIPT = """
+import json, sys, time
+t = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+print(json.dumps({{"seconds": time.perf_counter() - t,
+                   "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+_RENDER_SCRIPT = """
+import json, sys, time
+t = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout=120)
+at.run()
+first = time.perf_counter() - t
+t = time.perf_counter()
+at.run()
+rerun = time.perf_counter() - t
+print(json.dumps({{"seconds": first, "rerun": rerun, "errors": [str(e.value) for e in at.exception],
+                   "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def _run(script: str) -> Dict:
+    out = subprocess.run([sys.executable, "-c", script], cwd=HERE, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def time_import(modules: List[str], repeat: int = 3) -> Dict:
+    """Best of `repeat` fresh-interpreter imports, plus which heavy modules they pulled in."""
+    runs = [_run(_IMPORT_SCRIPT.format(modules=modules, heavy=HEAVY_MODULES)) for _ in range(repeat)]
+    return min(runs, key=lambda r: r["seconds"])
+
+
+def time_render(repeat: int = 1) -> Dict:
+    """Best of `repeat` first renders of app.py (with the default inputs) and the rerun after each."""
+    runs = [_run(_RENDER_SCRIPT.format(heavy=HEAVY_MODULES)) for _ in range(repeat)]
+    return min(runs, key=lambda r: r["seconds"])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement; the fastest is kept")
+    parser.add_argument("--max-import", type=float, help="budget (s) for importing the engine stack")
+    parser.add_argument("--max-render", type=float, help="budget (s) for the app's first render")
+    parser.add_argument("--skip-render", action="store_true", help="only time imports")
+    args = parser.parse_args(argv)
+
+    failures = []
+    results = {}
+    for label, modules in IMPORT_TARGETS.items():
+        r = results[label] = time_import(modules, args.repeat)
+        print(f"import {label:<16} {r['seconds']:7.3f}s  heavy: {', '.join(r['loaded']) or '-'}")
+
+    engine = results["engine stack"]
+    if engine["loaded"]:
+        failures.append(f"engine stack imports {', '.join(engine['loaded'])}")
+    if args.max_import is not None and engine["seconds"] > args.max_import:
+        failures.append(f"engine stack import {engine['seconds']:.3f}s > {args.max_import:g}s")
+
+    if not args.skip_render:
+        r = time_render(max(1, args.repeat // 3))
+        print(f"first render            {r['seconds']:7.3f}s  rerun {r['rerun']:.3f}s  "
+              f"heavy: {', '.join(r['loaded']) or '-'}")
+        if r["errors"]:
+            failures.append("app raised: " + "; ".join(r["errors"]))
+        if args.max_render is not None and r["seconds"] > args.max_render:
+            failures.append(f"first render {r['seconds']:.3f}s > {args.max_render:g}s")
+
+    for f in failures:
+        print(f"FAIL: {f}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
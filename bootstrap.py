@@ -0,0 +1,113 @@
+"""
+Sequence-of-returns bootstrap from a local history file.
+
+The file holds one row per period (annual or monthly) of simple returns as
+fractions (0.07 = 7%), in named columns:
+
+    retirement_return   market return for the retirement balance (required)
+    value_growth        property appreciation (optional)
+    rent_growth         rent growth (optional)
+
+A `.npy` file must hold a structured array with those field names. A `.csv`
+file needs a header row; it is parsed once into a `.npy` sidecar in
+HISTORY_CACHE_DIR (never next to the user's file), which is then reused
+until the CSV changes. Either way the data is memory mapped, so a large
+history is paged in on demand rather than loaded on every rerun. Blank or
+non-numeric cells are rejected rather than passed on as NaN returns.
+
+Paths are circular block bootstraps: each path strings together blocks of
+consecutive periods starting at random rows, and every column uses the same
+rows, so the series keep their co-movement and their streaks.
+"""
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from hashing import data_hash
+
+HISTORY_FIELDS = ("retirement_return", "value_growth", "rent_growth")
+HISTORY_FREQUENCIES = {"Annual": 1, "Monthly": 12}
+# Parsed CSV histories, one .npy per source path
+HISTORY_CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+                                 "financial-freedom-planner", "history")
+
+
+def _read_csv(csv_path: str) -> np.ndarray:
+    return np.atleast_1d(np.genfromtxt(csv_path, delimiter=",", names=True, dtype=float, encoding="utf-8"))
+
+
+def _csv_to_npy(csv_path: str, npy_path: str) -> None:
+    os.makedirs(os.path.dirname(npy_path), exist_ok=True)
+    # Written under a temporary name so another session never maps a partial file
+    partial = f"{npy_path}.{os.getpid()}.tmp"
+    with open(partial, "wb") as f:
+        np.save(f, _read_csv(csv_path))
+    os.replace(partial, npy_path)
+
+
+def _check_values(path: str, history: np.ndarray) -> None:
+    for field in HISTORY_FIELDS:
+        if field in (history.dtype.names or ()):
+            bad = np.flatnonzero(~np.isfinite(history[field]))
+            if len(bad):
+                raise ValueError(f"{path}: '{field}' has {len(bad)} blank or non-numeric value(s), "
+                                 f"first in data row {bad[0] + 1}")
+
+
+@lru_cache(maxsize=8)
+def _open_history(path: str, mtime: float) -> np.ndarray:
+    if path.lower().endswith(".csv"):
+        sidecar = os.path.join(HISTORY_CACHE_DIR, data_hash(path) + ".npy")
+        try:
+            if not os.path.exists(sidecar) or os.path.getmtime(sidecar) < mtime:
+                _csv_to_npy(path, sidecar)
+            history = np.load(sidecar, mmap_mode="r")
+        except OSError:
+            # No writable cache directory: parse in memory instead
+            history = _read_csv(path)
+    else:
+        history = np.load(path, mmap_mode="r")
+    # Once per file version, not per shard
+    _check_values(path, history)
+    return history
+
+
+def load_history(path: str) -> np.ndarray:
+    """Memory-mapped structured array of the history file; validated, cached per file version."""
+    path = os.path.abspath(os.path.expanduser(path))
+    history = _open_history(path, os.path.getmtime(path))
+    names = history.dtype.names or ()
+    if "retirement_return" not in names:
+        raise ValueError(f"{path}: needs a 'retirement_return' column (found {list(names)})")
+    if history.shape[0] == 0:
+        raise ValueError(f"{path}: no rows")
+    return history
+
+
+def bootstrap_indices(n_rows: int, n_paths: int, n_periods: int, block_len: int,
+                      rng: np.random.Generator) -> np.ndarray:
+    """Row indices (n_paths, n_periods) built from circular blocks of `block_len` rows."""
+    block_len = max(1, min(int(block_len), n_rows))
+    n_blocks = -(-n_periods // block_len)
+    starts = rng.integers(0, n_rows, size=(n_paths, n_blocks))
+    idx = (starts[:, :, None] + np.arange(block_len)) % n_rows
+    return idx.reshape(n_paths, -1)[:, :n_periods]
+
+
+def bootstrap_returns(history: np.ndarray, n_paths: int, n_years: int, block_years: int,
+                      periods_per_year: int, rng: np.random.Generator) -> dict:
+    """
+    {field: (n_paths, n_years) annual returns as fractions} for every history
+    field present; monthly rows are compounded into calendar-year returns.
+    """
+    idx = bootstrap_indices(history.shape[0], n_paths, n_years * periods_per_year,
+                            block_years * periods_per_year, rng)
+    out = {}
+    for field in HISTORY_FIELDS:
+        if field in history.dtype.names:
+            r = np.asarray(history[field], dtype=float)[idx]
+            if periods_per_year > 1:
+                r = np.prod(1.0 + r.reshape(n_paths, n_years, periods_per_year), axis=-1) - 1.0
+            out[field] = r
+    return out
@@ -0,0 +1,177 @@
+"""
+Result charts as cached PNG images.
+
+Every chart is drawn from a few columns of a results frame (or a handful
+of arrays). The PNG is kept in a bounded LRU cache keyed by the chart and
+a hash of exactly the data it plots. A rerun that leaves that data
+unchanged gets the stored bytes back without touching matplotlib.
+
+Charts are drawn on matplotlib.figure.Figure objects rather than through
+pyplot. That way nothing is registered with pyplot's global figure
+manager, and each figure is cleared and dropped as soon as its PNG is
+written, so a long-running server does not accumulate figures.
+matplotlib itself is imported on the first cache miss, not with this
+module.
+"""
+import io
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from engine import SUSTAINABLE_CASH_FLOW, TIGHT_CASH_FLOW
+from hashing import data_hash
+
+CHART_CACHE_SIZE = 256
+FIGSIZE = (6.4, 4.8)
+DPI = 150
+
+_cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from matplotlib.figure import Figure
+
+
+@dataclass(frozen=True)
+class LineChart:
+    """Lines of results columns against Year."""
+    title: str
+    columns: Tuple[str, ...]
+    ylabel: str = "Dollars"
+    legend: Tuple[str, ...] = ()
+    hlines: Tuple[float, ...] = ()
+
+
+NET_CASH_FLOW_CHART = LineChart(
+    "Net Cash Flow Over Time", ("Net Cash Flow",), "Annual Net Cash Flow",
+    hlines=(SUSTAINABLE_CASH_FLOW, TIGHT_CASH_FLOW, 0.0),
+)
+NET_WORTH_CHART = LineChart("Net Worth Over Time", ("Net Worth",))
+RETIREMENT_CHART = LineChart("Retirement Balance Over Time", ("Retirement Balance (Total)",))
+INCOME_CHART = LineChart(
+    "Net Income Breakdown Over Time", ("Cody Net", "Lauren Net", "Other Net"),
+    legend=("Cody Net", "Lauren Net", "Other Net"),
+)
+ACTIVE_PROPERTIES_CHART = LineChart("Active Properties Over Time", ("Active Properties",), "Count")
+BALANCE_SHEET_CHART = LineChart(
+    "Cash vs Equity vs Retirement",
+    ("Investable Cash", "Total Equity (active rentals)", "Retirement Balance (Total)"),
+    legend=("Investable Cash", "Total Equity (rentals)", "Retirement"),
+)
+TAX_CHART = LineChart("Estimated Taxes (Total) Over Time", ("Estimated Taxes (Total)",))
+PHARMACY_NOTE_CHART = LineChart("Pharmacy Seller Note Balance Over Time", ("Pharmacy Note Balance",))
+PHARMACY_CASH_CHART = LineChart(
+    "Pharmacy Profit vs Note Payment", ("Pharmacy Profit", "Pharmacy Note Payment"),
+    legend=("Profit", "Note Payment"),
+)
+NEW_HOME_CHART = LineChart("New Home Equity Over Time (simple)", ("New Home Equity",))
+
+
+def result_chart_tabs(show_taxes: bool, show_pharmacy: bool, show_new_home: bool) -> Dict[str, List[LineChart]]:
+    """The results charts grouped into tabs, in display order."""
+    tabs = {
+        "Cash Flow": [NET_CASH_FLOW_CHART],
+        "Net Worth": [NET_WORTH_CHART, BALANCE_SHEET_CHART],
+        "Income": [INCOME_CHART] + ([TAX_CHART] if show_taxes else []),
+        "Retirement": [RETIREMENT_CHART],
+        "Properties": [ACTIVE_PROPERTIES_CHART],
+    }
+    if show_pharmacy:
+        tabs["Pharmacy"] = [PHARMACY_NOTE_CHART, PHARMACY_CASH_CHART]
+    if show_new_home:
+        tabs["New Home"] = [NEW_HOME_CHART]
+    return tabs
+
+
+# -----------------------------
+# Cache
+# -----------------------------
+def _render(key: tuple, draw: Callable[["Figure"], None]) -> bytes:
+    """PNG bytes for `key`, drawing with `draw(fig)` only on a cache miss."""
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=FIGSIZE, dpi=DPI)
+    try:
+        draw(fig)
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png")
+    finally:
+        fig.clear()
+    png = _cache[key] = buf.getvalue()
+    if len(_cache) > CHART_CACHE_SIZE:
+        _cache.popitem(last=False)
+    return png
+
+
+# -----------------------------
+# Charts
+# -----------------------------
+def line_chart_png(df: "pd.DataFrame", chart: LineChart) -> bytes:
+    data = df[["Year", *chart.columns]]
+
+    def draw(fig: "Figure") -> None:
+        ax = fig.subplots()
+        for col in chart.columns:
+            ax.plot(data["Year"], data[col], linewidth=2)
+        for y in chart.hlines:
+            ax.axhline(y=y, linestyle="--")
+        ax.set_xlabel("Year")
+        ax.set_ylabel(chart.ylabel)
+        ax.set_title(chart.title)
+        if chart.legend:
+            ax.legend(list(chart.legend))
+
+    return _render(("line", chart, data_hash(data)), draw)
+
+
+def tornado_png(top: "pd.DataFrame", bump_pct: float) -> bytes:
+    """Low/high bars per input; `top` is already ordered bottom to top."""
+    data = top[["Input", "Δ Net Worth (low)", "Δ Net Worth (high)"]]
+
+    def draw(fig: "Figure") -> None:
+        ax = fig.subplots()
+        ax.barh(data["Input"], data["Δ Net Worth (low)"])
+        ax.barh(data["Input"], data["Δ Net Worth (high)"])
+        ax.axvline(x=0, linestyle="--")
+        ax.set_xlabel("Change in Final Net Worth")
+        ax.set_title(f"Tornado: top {len(data)} inputs (±{bump_pct:g}%)")
+        ax.legend([f"-{bump_pct:g}%", f"+{bump_pct:g}%"])
+
+    return _render(("tornado", data_hash(data, bump_pct)), draw)
+
+
+def heatmap_png(xs: np.ndarray, ys: np.ndarray, grid: np.ndarray, x_label: str, y_label: str, metric: str) -> bytes:
+    def draw(fig: "Figure") -> None:
+        ax = fig.subplots()
+        mesh = ax.pcolormesh(xs, ys, grid, shading="nearest")
+        fig.colorbar(mesh, ax=ax, label=metric)
+        ax.set_xlabel(x_label)
+        ax.set_ylabel(y_label)
+        ax.set_title(f"{metric} ({len(xs)} × {len(ys)} runs)")
+
+    return _render(("heatmap", data_hash(xs, ys, grid, x_label, y_label, metric)), draw)
+
+
+def fan_chart_png(years: Sequence[int], band: Sequence[np.ndarray], deterministic: Sequence[float], column: str,
+                  percentiles: Tuple[int, int, int]) -> bytes:
+    """A Monte Carlo percentile band (lo, mid, hi) with the deterministic run dashed on top."""
+    years, deterministic = np.asarray(years), np.asarray(deterministic, dtype=float)
+    lo, mid, hi = (np.asarray(b, dtype=float) for b in band)
+    p_lo, p_mid, p_hi = percentiles
+
+    def draw(fig: "Figure") -> None:
+        ax = fig.subplots()
+        ax.fill_between(years, lo, hi, alpha=0.3)
+        ax.plot(years, mid, linewidth=2)
+        ax.plot(years, deterministic, linestyle="--")
+        ax.set_xlabel("Year")
+        ax.set_ylabel("Dollars")
+        ax.set_title(f"{column}: P{p_lo}–P{p_hi} band")
+        ax.legend([f"P{p_lo}–P{p_hi}", f"P{p_mid}", "Deterministic"])
+
+    return _render(("fan", data_hash(years, lo, mid, hi, deterministic, column, percentiles)), draw)
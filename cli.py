@@ -0,0 +1,345 @@
+"""
+Headless batch runner: scenario files in, result tables out.
+
+    python cli.py client.toml -o results/
+    python cli.py scenarios/ -o results/ --format parquet --workers 8
+    python cli.py --template > client.json
+
+A scenario file (JSON or TOML) holds the app's inputs under the app's
+names: any Scenario field, `resolution` ("Annual" or "Monthly") and a
+`properties` list whose entries are property table rows (portfolio_io's
+columns and units, so rates are in percent as in the expanders). Anything
+left out takes the app's default; unknown keys are rejected.
+
+Each scenario writes <output>/<name>.csv or .parquet with the app's
+(rounded) results table. Directories are searched recursively, their
+layout is kept under the output directory, and files run across a process
+pool in chunks. Each chunk's property rows are validated as one table, so
+thousands of small scenarios don't pay a round trip or a table check
+each. summary.csv lists every file with its headline numbers or the error
+that stopped it; the exit status is nonzero if any file failed.
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from engine import RESULT_DECIMALS, STATUS_AT_RISK, Scenario, rounded, simulate
+from monthly import RESOLUTIONS, simulate_monthly
+from taxes import FILING_STATUSES, TAX_MODE_ESTIMATE, TAX_MODE_SIMPLE, available_tax_years
+
+SCENARIO_SUFFIXES = (".json", ".toml")
+OUTPUT_FORMATS = ("csv", "parquet")
+SUMMARY_FILE = "summary.csv"
+SUMMARY_COLUMNS = ["File", "Output", "Resolution", "Years", "Final Net Worth", "Final Investable Cash",
+                   "Min Investable Cash", "At-Risk Years", "Error"]
+# Scenario files per worker task; their property rows are validated together
+CHUNK_FILES = 64
+
+_SCENARIO_FIELDS = {f.name: f for f in fields(Scenario) if f.name != "properties"}
+_CHOICES = {"tax_mode": [TAX_MODE_SIMPLE, TAX_MODE_ESTIMATE], "filing_status": FILING_STATUSES}
+
+
+class ScenarioFileError(ValueError):
+    """A scenario file could not be read or failed validation."""
+
+
+# -----------------------------
+# Scenario files
+# -----------------------------
+def _coerce(name: str, value, kind):
+    """value as the field's type; JSON/TOML already give bools and numbers, so only lossless conversions happen."""
+    if kind is bool:
+        if isinstance(value, bool):
+            return value
+    elif kind is int:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+    elif kind is float:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+    elif kind is str:
+        if isinstance(value, (str, int)) and not isinstance(value, bool):
+            return str(value)
+    raise ScenarioFileError(f"{name} must be {kind.__name__} (got {value!r})")
+
+
+def _split_scenario_dict(data: Dict) -> Tuple[Dict, str, Optional[List[Dict]]]:
+    """Validated Scenario keyword arguments (without properties), the resolution and the raw property rows."""
+    if not isinstance(data, dict):
+        raise ScenarioFileError("a scenario file must hold a single object / table of inputs")
+    data = dict(data)
+    resolution = data.pop("resolution", RESOLUTIONS[0])
+    if resolution not in RESOLUTIONS:
+        raise ScenarioFileError(f"resolution must be one of {', '.join(RESOLUTIONS)} (got {resolution!r})")
+    rows = data.pop("properties", None)
+    if rows is not None and (not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows)):
+        raise ScenarioFileError("properties must be a list of property rows")
+
+    unknown = [k for k in data if k not in _SCENARIO_FIELDS]
+    if unknown:
+        raise ScenarioFileError(f"unknown input(s): {', '.join(unknown)}")
+    kw = {name: _coerce(name, value, _SCENARIO_FIELDS[name].type) for name, value in data.items()}
+    for name, choices in dict(_CHOICES, tax_year=available_tax_years()).items():
+        if name in kw and kw[name] not in choices:
+            raise ScenarioFileError(f"{name} must be one of {', '.join(choices)} (got {kw[name]!r})")
+    if kw.get("horizon_years", 1) < 1:
+        raise ScenarioFileError("horizon_years must be at least 1")
+    return kw, resolution, rows
+
+
+def _property_rows(rows: List[Dict]) -> Tuple:
+    import pandas as pd
+
+    from portfolio_io import frame_to_properties
+
+    return tuple(frame_to_properties(pd.DataFrame(rows))) if rows else ()
+
+
+def scenario_from_dict(data: Dict) -> Tuple[Scenario, str]:
+    """A Scenario and resolution from a parsed scenario file."""
+    kw, resolution, rows = _split_scenario_dict(data)
+    if rows is not None:
+        kw["properties"] = _property_rows(rows)
+    return Scenario(**kw), resolution
+
+
+def scenario_to_dict(s: Scenario, resolution: str = RESOLUTIONS[0]) -> Dict:
+    """The inverse of scenario_from_dict(), e.g. as a starting point for a new file."""
+    from portfolio_io import properties_to_frame
+
+    data = {"resolution": resolution}
+    data.update({name: getattr(s, name) for name in _SCENARIO_FIELDS})
+    table = properties_to_frame(s.properties)
+    data["properties"] = [
+        {k: (v.item() if hasattr(v, "item") else v) for k, v in row.items() if v == v}  # NaN = no balance
+        for row in table.to_dict("records")
+    ]
+    return data
+
+
+def _toml_loads():
+    try:
+        import tomllib
+    except ImportError:
+        try:
+            import tomli as tomllib
+        except ImportError as e:
+            raise ImportError("TOML scenarios need Python 3.11+ or tomli (pip install tomli)") from e
+    return tomllib.loads
+
+
+def read_scenario_file(path: str) -> Dict:
+    """The parsed contents of one JSON or TOML scenario file, not yet validated."""
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix == ".toml":
+        loads = _toml_loads()
+    elif suffix == ".json":
+        loads = json.loads
+    else:
+        raise ScenarioFileError(f"unsupported scenario file type {suffix!r}; use {' or '.join(SCENARIO_SUFFIXES)}")
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        return loads(text)
+    except ValueError as e:  # JSONDecodeError and TOMLDecodeError are both ValueErrors
+        raise ScenarioFileError(f"could not parse {os.path.basename(path)}: {e}") from e
+
+
+def load_scenario_file(path: str) -> Tuple[Scenario, str]:
+    """Parse and validate one JSON or TOML scenario file."""
+    return scenario_from_dict(read_scenario_file(path))
+
+
+def load_scenario_files(paths: Sequence[str]) -> List[Union[Tuple[Scenario, str], Exception]]:
+    """
+    load_scenario_file() for many files, with the error in place of any that
+    fail. Property rows from every file are validated as one table, since
+    the table checks cost far more per call than per row; if that table has
+    errors, each file is checked on its own to say which.
+    """
+    from portfolio_io import PropertyTableError, clean_table_to_properties, validate_property_table
+
+    loaded: List = []
+    all_rows: List[Dict] = []
+    for path in paths:
+        try:
+            loaded.append(_split_scenario_dict(read_scenario_file(path)))
+        except Exception as e:
+            loaded.append(e)
+            continue
+        all_rows.extend(loaded[-1][2] or ())
+
+    clean = None
+    if all_rows:
+        import pandas as pd
+
+        try:
+            clean = validate_property_table(pd.DataFrame(all_rows))
+        except PropertyTableError:
+            pass
+
+    results: List = []
+    first = 0
+    for item in loaded:
+        if isinstance(item, Exception):
+            results.append(item)
+            continue
+        kw, resolution, rows = item
+        try:
+            if rows is not None:
+                if clean is None:
+                    kw["properties"] = _property_rows(rows)
+                else:
+                    kw["properties"] = tuple(clean_table_to_properties(clean.iloc[first:first + len(rows)]))
+            results.append((Scenario(**kw), resolution))
+        except Exception as e:
+            results.append(e)
+        first += len(rows or ())
+    return results
+
+
+def find_scenarios(inputs: Sequence[str]) -> List[Tuple[str, str]]:
+    """(path, output stem) per scenario file; directories are searched recursively and keep their layout."""
+    jobs = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, dirs, files in os.walk(item):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(SCENARIO_SUFFIXES):
+                        path = os.path.join(root, name)
+                        jobs.append((path, os.path.splitext(os.path.relpath(path, item))[0]))
+        elif os.path.isfile(item):
+            jobs.append((item, os.path.splitext(os.path.basename(item))[0]))
+        else:
+            raise FileNotFoundError(item)
+    seen, dupes = set(), set()
+    for _, stem in jobs:
+        (dupes if stem in seen else seen).add(stem)
+    if dupes:
+        raise ValueError(f"several inputs would write the same output: {', '.join(sorted(dupes))}")
+    return jobs
+
+
+# -----------------------------
+# Running
+# -----------------------------
+def _write_results(scenario: Scenario, resolution: str, out_path: str, fmt: str) -> Dict:
+    """Simulate, write the rounded results table and return the summary numbers."""
+    df = simulate_monthly(scenario) if resolution == "Monthly" else simulate(scenario)
+    df = rounded(df, RESULT_DECIMALS)
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    if fmt == "parquet":
+        df.to_parquet(out_path, index=False)
+    else:
+        df.to_csv(out_path, index=False)
+    last = df.iloc[-1]
+    return {
+        "Output": out_path,
+        "Resolution": resolution,
+        "Years": len(df),
+        "Final Net Worth": last["Net Worth"],
+        "Final Investable Cash": last["Investable Cash"],
+        "Min Investable Cash": df["Investable Cash"].min(),
+        "At-Risk Years": int((df["Status"] == STATUS_AT_RISK).sum()),
+    }
+
+
+def run_chunk(paths: Sequence[str], out_paths: Sequence[str], fmt: str = "csv") -> List[Dict]:
+    """
+    Simulate scenario files and write their results; returns one summary row
+    per file. Errors are recorded in the row, not raised, so one bad file
+    doesn't stop the rest.
+    """
+    summary = []
+    for path, out_path, loaded in zip(paths, out_paths, load_scenario_files(paths)):
+        row = dict.fromkeys(SUMMARY_COLUMNS, "")
+        row["File"] = path
+        try:
+            if isinstance(loaded, Exception):
+                raise loaded
+            row.update(_write_results(*loaded, out_path, fmt))
+        except Exception as e:
+            row["Error"] = f"{type(e).__name__}: {e}"
+        summary.append(row)
+    return summary
+
+
+def run_files(jobs: Sequence[Tuple[str, str]], out_dir: str, fmt: str = "csv",
+              workers: Optional[int] = None, chunk_files: int = CHUNK_FILES) -> List[Dict]:
+    """
+    Run every (path, stem) job in chunks of chunk_files, across a process
+    pool unless workers=1 (workers=None uses every core). Summary rows come
+    back in job order.
+    """
+    paths = [path for path, _ in jobs]
+    outs = [os.path.join(out_dir, f"{stem}.{fmt}") for _, stem in jobs]
+    chunk_files = max(1, int(chunk_files))
+    starts = range(0, len(jobs), chunk_files)
+    args = ([paths[i:i + chunk_files] for i in starts], [outs[i:i + chunk_files] for i in starts],
+            [fmt] * len(starts))
+    workers = min(workers or os.cpu_count() or 1, len(starts))
+    if workers <= 1:
+        parts = map(run_chunk, *args)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(run_chunk, *args))
+    return [row for part in parts for row in part]
+
+
+def write_summary(rows: Sequence[Dict], path: str) -> None:
+    import csv
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("inputs", nargs="*", help="scenario files (.json/.toml) or directories of them")
+    parser.add_argument("-o", "--output", default="results", help="output directory (default: results)")
+    parser.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="csv")
+    parser.add_argument("-w", "--workers", type=int, help="worker processes (default: every core; 1 = in-process)")
+    parser.add_argument("--template", action="store_true", help="print the app's default inputs as JSON and exit")
+    args = parser.parse_args(argv)
+
+    if args.template:
+        json.dump(scenario_to_dict(Scenario()), sys.stdout, indent=2, ensure_ascii=False)
+        print()
+        return 0
+    if not args.inputs:
+        parser.error("give at least one scenario file or directory")
+    if args.format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("Parquet output needs pyarrow (pip install pyarrow)")
+
+    try:
+        jobs = find_scenarios(args.inputs)
+    except (FileNotFoundError, ValueError) as e:
+        parser.error(str(e))
+    if not jobs:
+        parser.error("no scenario files found")
+
+    rows = run_files(jobs, args.output, args.format, args.workers)
+    os.makedirs(args.output, exist_ok=True)
+    write_summary(rows, os.path.join(args.output, SUMMARY_FILE))
+
+    failed = [r for r in rows if r["Error"]]
+    print(f"{len(rows) - len(failed)} of {len(rows)} scenarios written to {args.output}", file=sys.stderr)
+    for r in failed:
+        print(f"{r['File']}: {r['Error']}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,900 @@
+"""
+Simulation engine for the Financial Freedom Timeline Planner.
+
+Nothing in here touches Streamlit: the app (or any other caller) builds a
+frozen `Scenario` from its inputs and `simulate()` turns it into the
+year-by-year results DataFrame. pandas is only imported once a DataFrame
+is built, so batch runs and worker processes start on NumPy alone.
+"""
+from dataclasses import dataclass, fields
+from typing import TYPE_CHECKING, Optional, Sequence, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+from amortization import ScheduleTable, schedule
+from state import RunState
+from taxes import DEFAULT_TAX_YEAR, TAX_MODE_ESTIMATE, TAX_MODE_SIMPLE, fica_tax, project_taxes
+
+# -----------------------------
+# Helpers
+# -----------------------------
+def grow_balance(balance: float, annual_return_pct: float) -> float:
+    """Apply annual return to a balance (end-of-year style)."""
+    return float(balance * (1.0 + annual_return_pct / 100.0))
+
+def annual_amort_step(balance: float, annual_rate: float, annual_payment: float, extra_principal: float = 0.0):
+    """
+    One year amortization step (simple annual approximation).
+    Returns: (payment_effective, interest, principal_paid, end_balance)
+    """
+    if balance <= 0:
+        return 0.0, 0.0, 0.0, 0.0
+    interest = balance * annual_rate
+    scheduled_principal = max(0.0, annual_payment - interest)
+    total_principal = min(balance, scheduled_principal + max(0.0, extra_principal))
+    payment_effective = interest + total_principal
+    end_balance = max(0.0, balance - total_principal)
+    return payment_effective, interest, total_principal, end_balance
+
+# -----------------------------
+# Cash-flow status thresholds
+# -----------------------------
+SUSTAINABLE_CASH_FLOW = 30000.0
+TIGHT_CASH_FLOW = 10000.0
+
+STATUS_SUSTAINABLE = "🟢 Sustainable"
+STATUS_TIGHT = "🟡 Tight buffer"
+STATUS_AT_RISK = "🔴 At risk"
+
+def cash_flow_status(net_cash_flow: float) -> str:
+    if net_cash_flow >= SUSTAINABLE_CASH_FLOW:
+        return STATUS_SUSTAINABLE
+    if net_cash_flow >= TIGHT_CASH_FLOW:
+        return STATUS_TIGHT
+    return STATUS_AT_RISK
+
+# -----------------------------
+# Scenario inputs
+# -----------------------------
+@dataclass(frozen=True)
+class PropertyInputs:
+    """
+    One rental property, in the same units the app's property expander builds
+    (rates as fractions, except down_pct which stays in percent).
+    """
+    name: str = "Rental"
+    purchase_year: int = 2
+    liquidation_year: int = 0
+    is_existing: bool = False
+
+    value_year0: float = 200000.0
+    purchase_price: float = 200000.0
+
+    down_pct: float = 20.0
+    mortgage_rate: float = 0.07
+    term_years: int = 30
+    mortgage_balance_year0: Optional[float] = None
+
+    gross_rent_month: float = 2000.0
+    tax_ins_month: float = 350.0
+    maintenance_pct: float = 0.08
+    vacancy_pct: float = 0.05
+    capex_pct: float = 0.05
+    pm_pct: float = 0.10
+    value_growth: float = 0.03
+
+    rent_start_year: int = 2
+    rent_growth: float = 0.02
+
+    heloc_enabled: bool = False
+    heloc_cltv: float = 0.0
+    heloc_draw_year: int = 0
+    heloc_draw_amount: float = 0.0
+
+    def initial_loan_principal(self) -> float:
+        if self.is_existing:
+            return float(self.mortgage_balance_year0)
+        return float(self.purchase_price * (1 - self.down_pct / 100.0))
+
+
+CURRENT_HOME_RENTAL = PropertyInputs(
+    name="Current Home → Rental",
+    purchase_year=0,
+    is_existing=True,
+    value_year0=292000.0,
+    purchase_price=292000.0,
+    mortgage_rate=0.0287,
+    term_years=27,
+    mortgage_balance_year0=232000.0,
+    rent_start_year=0,
+)
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """
+    Every input the simulation reads. Defaults match the app's widget defaults,
+    and field names match the app's variable names.
+    """
+    # Global settings + modes
+    horizon_years: int = 20
+    push_hard: bool = False
+    push_years: int = 0
+    push_extra_income: float = 0.0
+    push_extra_cost: float = 0.0
+    frugal_mode: bool = False
+    frugal_start: int = 0
+    frugal_years: int = 0
+    frugal_expense_reduction_pct: float = 0.0
+    heloc_rate: float = 9.0
+    reinvest_surplus: bool = True
+
+    # Income (gross)
+    cody_gross0: float = 140000.0
+    lauren_gross0: float = 75000.0
+    cody_growth: float = 0.0
+    lauren_growth: float = 2.0
+    cody_income_start: int = 0
+    lauren_income_start: int = 0
+    other_income0: float = 0.0
+    other_income_growth: float = 0.0
+    other_income_start: int = 0
+    other_income_is_net: bool = True
+
+    # Taxes
+    tax_mode: str = TAX_MODE_SIMPLE
+    filing_status: str = "Married Filing Jointly"
+    include_state_tax: bool = False
+    state_tax_pct: float = 0.0
+    cody_effective_tax_pct: float = 25.0
+    lauren_effective_tax_pct: float = 20.0
+    other_effective_tax_pct: float = 0.0
+    show_tax_line_item: bool = True
+    include_fica: bool = True
+    assume_employee_contribs_pretax: bool = True
+    tax_year: str = DEFAULT_TAX_YEAR
+    tax_indexation_pct: float = 0.0  # %/yr applied to brackets, deductions and the SS wage base
+    addl_medicare_threshold: float = 250000.0
+
+    # Expenses
+    base_living_expenses: float = 90000.0
+    expense_growth: float = 0.0
+
+    # New house (PITI)
+    new_home_enabled: bool = True
+    new_home_start_year: int = 0
+    compute_loan_from_price: bool = False
+    include_new_home_equity_in_networth: bool = False
+    new_home_purchase_price: float = 0.0
+    new_home_down_pct: float = 20.0
+    new_home_loan_amount: float = 0.0
+    new_home_rate_pct: float = 7.0
+    new_home_term_years: int = 30
+    new_home_property_tax_annual: float = 0.0
+    new_home_insurance_annual: float = 0.0
+    new_home_hoa_monthly: float = 0.0
+    new_home_pmi_monthly: float = 0.0
+    new_home_value_growth_pct: float = 3.0
+    new_home_sell_year: int = 0
+    new_home_selling_cost_pct: float = 6.0
+
+    # Mortgage prepay savings
+    include_mortgage_prepay_savings: bool = True
+    mortgage_prepay_amount: float = 71000.0
+    mortgage_savings_annual: float = 8000.0
+    mortgage_savings_start_year: int = 0
+
+    # Pharmacy buy-in
+    pharmacy_buyin_enabled: bool = False
+    pharmacy_buyin_year: int = 0
+    pharmacy_buyin_price: float = 120000.0
+    pharmacy_cash_down: float = 47000.0
+    pharmacy_expected_profit: float = 30000.0
+    pharmacy_profit_start_year: int = 0
+    seller_note_years: int = 5
+    seller_note_rate_pct: float = 5.5
+    pharmacy_profit_growth_pct: float = 0.0
+    pharmacy_profit_growth_start_year: int = 0
+    include_pharmacy_equity_in_networth: bool = True
+    pharmacy_equity_growth_pct: float = 0.0
+    enable_accel_paydown: bool = True
+    accel_year: int = 2
+    lauren_dist_lump: float = 20000.0
+    extra_principal_recurring: float = 0.0
+    recurring_extra_start_year: int = 2
+
+    # Retirement
+    retirement_return: float = 7.0
+    include_retirement_in_networth: bool = True
+    count_retirement_contrib_as_expense: bool = True
+    cody_ret_balance0: float = 0.0
+    lauren_ret_balance0: float = 0.0
+    cody_contrib_pct: float = 0.0
+    cody_employer_match_pct: float = 0.0
+    cody_match_cap_pct: float = 0.0
+    cody_contrib_start_year: int = 0
+    lauren_contrib_pct: float = 0.0
+    lauren_employer_match_pct: float = 0.0
+    lauren_match_cap_pct: float = 0.0
+    lauren_contrib_start_year: int = 0
+    cody_ira_annual: float = 0.0
+    lauren_ira_annual: float = 0.0
+
+    # Student loans
+    student_loan_balance0: float = 232000.0
+    student_loan_interest_rate: float = 6.8
+    student_loan_years: int = 20
+    student_loan_start_year: int = 1
+
+    # Capital / reserves
+    starting_cash: float = 40000.0
+    min_cash_reserve: float = 15000.0
+
+    # Properties
+    properties: Tuple[PropertyInputs, ...] = (CURRENT_HOME_RENTAL,)
+
+    @property
+    def years(self) -> np.ndarray:
+        return np.arange(0, int(self.horizon_years) + 1)
+
+    @property
+    def new_home_loan_amount_eff(self) -> float:
+        if self.new_home_enabled and self.compute_loan_from_price:
+            return max(0.0, float(self.new_home_purchase_price) * (1.0 - float(self.new_home_down_pct) / 100.0))
+        return float(self.new_home_loan_amount)
+
+
+# -----------------------------
+# Closed-form series over the year axis
+# -----------------------------
+def income_stream_vec(base: float, growth_pct, years: np.ndarray, start_year) -> np.ndarray:
+    """Income from start_year on, growing growth_pct %/yr, for a whole array of years at once."""
+    t = years - start_year
+    return np.where(t >= 0, base * (1 + growth_pct / 100.0) ** np.maximum(t, 0), 0.0)
+
+def household_series(s: Scenario) -> dict:
+    """
+    Every household stream with a closed form in the year index, over the
+    whole horizon at once. Carried state (cash, HELOC balances, the pharmacy
+    note, retirement balances) is left to the year loop in simulate().
+    """
+    years = s.years
+    zeros = np.zeros(len(years))
+
+    # Gross incomes
+    cody_gross = income_stream_vec(s.cody_gross0, s.cody_growth, years, int(s.cody_income_start))
+    lauren_gross = income_stream_vec(s.lauren_gross0, s.lauren_growth, years, int(s.lauren_income_start))
+    other_gross = income_stream_vec(s.other_income0, s.other_income_growth, years, int(s.other_income_start))
+
+    # Retirement contributions
+    cody_on = years >= int(s.cody_contrib_start_year)
+    effective_contrib_pct = min(s.cody_contrib_pct, s.cody_match_cap_pct) if s.cody_match_cap_pct > 0 else 0.0
+    cody_emp_contrib = np.where(cody_on, cody_gross * (s.cody_contrib_pct / 100.0), 0.0)
+    cody_match = np.where(cody_on, cody_gross * (min(s.cody_employer_match_pct, effective_contrib_pct) / 100.0), 0.0)
+
+    lauren_on = years >= int(s.lauren_contrib_start_year)
+    effective_contrib_pct = min(s.lauren_contrib_pct, s.lauren_match_cap_pct) if s.lauren_match_cap_pct > 0 else 0.0
+    lauren_emp_contrib = np.where(lauren_on, lauren_gross * (s.lauren_contrib_pct / 100.0), 0.0)
+    lauren_match = np.where(lauren_on, lauren_gross * (min(s.lauren_employer_match_pct, effective_contrib_pct) / 100.0), 0.0)
+
+    cody_ira = np.where(cody_gross > 0, float(s.cody_ira_annual), 0.0)
+    lauren_ira = np.where(lauren_gross > 0, float(s.lauren_ira_annual), 0.0)
+
+    # Taxes / net pay
+    est_federal_tax = zeros
+    est_state_tax = zeros
+    est_fica_tax = zeros
+    est_total_tax = zeros
+
+    if s.tax_mode == TAX_MODE_SIMPLE:
+        cody_net = cody_gross * (1.0 - s.cody_effective_tax_pct / 100.0)
+        lauren_net = lauren_gross * (1.0 - s.lauren_effective_tax_pct / 100.0)
+        if s.other_income_is_net:
+            other_net = other_gross
+        else:
+            other_net = other_gross * (1.0 - s.other_effective_tax_pct / 100.0)
+
+        if s.show_tax_line_item:
+            est_total_tax = (cody_gross - cody_net) + (lauren_gross - lauren_net) + (other_gross - other_net)
+
+    else:
+        tables = project_taxes(s.tax_year, s.filing_status, s.tax_indexation_pct, len(years))
+        std_ded = tables.standard_deduction
+
+        taxed_other = zeros if s.other_income_is_net else other_gross
+        household_gross = cody_gross + lauren_gross + taxed_other
+        pretax = (cody_emp_contrib + lauren_emp_contrib) if s.assume_employee_contribs_pretax else zeros
+
+        taxable_income = np.maximum(0.0, household_gross - pretax - std_ded)
+        est_federal_tax = tables.federal_tax(taxable_income)
+
+        if s.include_state_tax and s.state_tax_pct > 0:
+            est_state_tax = np.maximum(0.0, household_gross - pretax) * (s.state_tax_pct / 100.0)
+
+        if s.include_fica:
+            threshold = float(s.addl_medicare_threshold)
+            est_fica_tax = (
+                fica_tax(cody_gross, tables.ss_wage_base, threshold)
+                + fica_tax(lauren_gross, tables.ss_wage_base, threshold)
+            )
+
+        est_total_tax = est_federal_tax + est_state_tax + est_fica_tax
+        household_net_taxable = np.maximum(0.0, household_gross - est_total_tax)
+
+        # Split household net back out in proportion to gross
+        denom = household_gross
+        has_income = denom > 0
+        safe_denom = np.where(has_income, denom, 1.0)
+        cody_net = np.where(has_income, household_net_taxable * (cody_gross / safe_denom), 0.0)
+        lauren_net = np.where(has_income, household_net_taxable * (lauren_gross / safe_denom), 0.0)
+        if s.other_income_is_net:
+            other_net = other_gross
+        else:
+            other_net = np.where(has_income, household_net_taxable * (other_gross / safe_denom), 0.0)
+
+    base_income_net = cody_net + lauren_net + other_net
+
+    # Expenses (inflation) + modes
+    base_expenses = float(s.base_living_expenses) * ((1 + s.expense_growth / 100.0) ** years)
+
+    pushing = s.push_hard & (years < s.push_years)
+    extra_income = np.where(pushing, float(s.push_extra_income), 0.0)
+    extra_cost = np.where(pushing, float(s.push_extra_cost), 0.0)
+
+    if s.frugal_mode:
+        frugal = (s.frugal_start <= years) & (years < s.frugal_start + s.frugal_years)
+        base_expenses = np.where(frugal, base_expenses * (1.0 - s.frugal_expense_reduction_pct / 100.0), base_expenses)
+
+    # Student loans
+    sl = schedule(s.student_loan_balance0, s.student_loan_interest_rate / 100.0, int(s.student_loan_years))
+    sl_payment_annual = 12.0 * sl.payment
+    months_paid = np.minimum((years - s.student_loan_start_year + 1) * 12, sl.n)
+    sl_remaining = np.where(months_paid >= sl.n, 0.0, sl.balance_after(months_paid))
+    sl_remaining = np.where(years < s.student_loan_start_year, float(s.student_loan_balance0), sl_remaining)
+    # Paid in every year that starts with a balance, including the year of the last payment
+    sl_paying = (years >= s.student_loan_start_year) & ((years - s.student_loan_start_year) * 12 < sl.n)
+    sl_pay = np.where(sl_paying, sl_payment_annual, 0.0)
+
+    # New home (PITI + HOA + PMI), with the optional simple equity tracking
+    new_home_piti = zeros
+    new_home_value = zeros
+    new_home_mort_bal = zeros
+    new_home_equity = zeros
+    new_home_proceeds = zeros
+
+    loan = s.new_home_loan_amount_eff
+    start = int(s.new_home_start_year)
+    if s.new_home_enabled and loan > 0:
+        rate = float(s.new_home_rate_pct) / 100.0
+        term = int(s.new_home_term_years)
+        paying = years >= start
+
+        loan_schedule = schedule(loan, rate, term)
+        pi_annual = 12.0 * loan_schedule.payment
+        escrow_annual = float(s.new_home_property_tax_annual) + float(s.new_home_insurance_annual)
+        pmi_annual = 12.0 * float(s.new_home_pmi_monthly)
+        hoa_annual = 12.0 * float(s.new_home_hoa_monthly)
+        piti = pi_annual + escrow_annual + pmi_annual + hoa_annual
+
+        if s.include_new_home_equity_in_networth and s.compute_loan_from_price and s.new_home_purchase_price > 0:
+            yrs_held = np.maximum(0, years - start)
+            value = float(s.new_home_purchase_price) * ((1 + float(s.new_home_value_growth_pct) / 100.0) ** yrs_held)
+            bal = loan_schedule.balance_after(yrs_held * 12)
+
+            sell_year = int(s.new_home_sell_year)
+            if sell_year > 0 and sell_year >= start:
+                sell_cost = (float(s.new_home_selling_cost_pct) / 100.0) * value
+                new_home_proceeds = np.where(years == sell_year, np.maximum(0.0, value - sell_cost - bal), 0.0)
+                # stop counting payments after sale
+                paying = paying & (years <= sell_year)
+
+            new_home_value = np.where(paying, value, 0.0)
+            new_home_mort_bal = np.where(paying, bal, 0.0)
+            new_home_equity = np.where(paying, np.maximum(0.0, value - bal), 0.0)
+
+        new_home_piti = np.where(paying, piti, 0.0)
+
+    # Mortgage savings
+    mort_savings = zeros
+    if s.include_mortgage_prepay_savings:
+        mort_savings = np.where(years >= int(s.mortgage_savings_start_year), float(s.mortgage_savings_annual), 0.0)
+
+    # Pharmacy profit + equity value (the seller note itself is carried state)
+    ph_profit = zeros
+    ph_equity_value = zeros
+    if s.pharmacy_buyin_enabled:
+        ph_owned = years >= int(s.pharmacy_buyin_year)
+        yrs_since = np.maximum(0, years - int(s.pharmacy_buyin_year))
+        ph_equity_value = np.where(
+            ph_owned,
+            float(s.pharmacy_buyin_price) * ((1 + float(s.pharmacy_equity_growth_pct) / 100.0) ** yrs_since),
+            0.0
+        )
+        growth_years = np.maximum(0, years - int(s.pharmacy_profit_growth_start_year))
+        ph_profit = np.where(
+            ph_owned & (years >= int(s.pharmacy_profit_start_year)),
+            float(s.pharmacy_expected_profit) * ((1 + float(s.pharmacy_profit_growth_pct) / 100.0) ** growth_years),
+            0.0
+        )
+
+    return {
+        "cody_gross": cody_gross,
+        "lauren_gross": lauren_gross,
+        "other_gross": other_gross,
+        "cody_emp_contrib": cody_emp_contrib,
+        "cody_match": cody_match,
+        "lauren_emp_contrib": lauren_emp_contrib,
+        "lauren_match": lauren_match,
+        "cody_ira": cody_ira,
+        "lauren_ira": lauren_ira,
+        "cody_net": cody_net,
+        "lauren_net": lauren_net,
+        "other_net": other_net,
+        "est_federal_tax": est_federal_tax,
+        "est_state_tax": est_state_tax,
+        "est_fica_tax": est_fica_tax,
+        "est_total_tax": est_total_tax,
+        "income": base_income_net + extra_income,
+        "expenses": base_expenses + extra_cost,
+        "sl_remaining": sl_remaining,
+        "sl_pay": sl_pay,
+        "new_home_piti": new_home_piti,
+        "new_home_value": new_home_value,
+        "new_home_mort_bal": new_home_mort_bal,
+        "new_home_equity": new_home_equity,
+        "new_home_proceeds": new_home_proceeds,
+        "mort_savings": mort_savings,
+        "ph_profit": ph_profit,
+        "ph_equity_value": ph_equity_value,
+    }
+
+class PropertyArrays:
+    """
+    The portfolio as one NumPy array per PropertyInputs field (struct of
+    arrays), so property math runs over every unit at once, however many.
+    """
+    FIELDS = [f.name for f in fields(PropertyInputs) if f.name not in ("name", "mortgage_balance_year0")]
+
+    def __init__(self, properties):
+        properties = list(properties)
+        self.names = [p.name for p in properties]
+        for field in self.FIELDS:
+            setattr(self, field, np.array([getattr(p, field) for p in properties]))
+        self.mortgage_balance_year0 = np.array(
+            [np.nan if p.mortgage_balance_year0 is None else p.mortgage_balance_year0 for p in properties],
+            dtype=float,
+        )
+        self.loan_principal = np.where(
+            self.is_existing,
+            self.mortgage_balance_year0,
+            self.purchase_price * (1 - self.down_pct / 100.0),
+        ).astype(float)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def col(self, field: str) -> np.ndarray:
+        """A field as a float column (P, 1), ready to broadcast against years."""
+        return np.asarray(getattr(self, field), dtype=float)[:, None]
+
+
+def property_series(pa: PropertyArrays, years: np.ndarray) -> dict:
+    """
+    Closed-form (properties x years) arrays for every rental: home value,
+    mortgage balance, gross rent and operating costs including debt service.
+    Cells before a property's purchase year are meaningless and must be masked
+    by the caller.
+    """
+    col = pa.col
+    loans = ScheduleTable(pa.loan_principal[:, None], col("mortgage_rate"), col("term_years").astype(int))
+
+    yrs_held = np.maximum(0, years[None, :] - col("purchase_year").astype(int))
+    home_value = col("value_year0") * ((1 + col("value_growth")) ** yrs_held)
+    mort_bal = loans.balance_after(yrs_held * 12)
+
+    rent_years = years[None, :] - col("rent_start_year").astype(int)
+    gross_rent = np.where(
+        rent_years >= 0,
+        12 * col("gross_rent_month") * ((1 + col("rent_growth")) ** np.maximum(rent_years, 0)),
+        0.0
+    )
+
+    debt_service = 12 * loans.payment()
+    operating_costs = (
+        col("pm_pct") * gross_rent
+        + col("maintenance_pct") * gross_rent
+        + col("vacancy_pct") * gross_rent
+        + col("capex_pct") * gross_rent
+        + 12 * col("tax_ins_month")
+        + debt_service
+    )
+
+    return {
+        "home_value": home_value,
+        "mort_bal": mort_bal,
+        "gross_rent": gross_rent,
+        "operating_costs": operating_costs,
+    }
+
+PORTFOLIO_ROW_KEYS = (
+    "rental_cf", "equity", "heloc", "value", "sale_proceeds", "heloc_drawn", "down_payment",
+    "active", "acquired", "liquidated",
+)
+
+
+def portfolio_rows(pa: PropertyArrays, years: np.ndarray, heloc_rate_pct: float) -> dict:
+    """
+    Each property's contribution to the portfolio totals, shaped
+    (properties x years) and already masked to the years it counts in.
+    Ownership, purchases, HELOC draws and sales are fixed by the schedule,
+    never by cash, so the whole grid is computed at once.
+    """
+    if not len(pa):
+        return {k: np.zeros((0, len(years))) for k in PORTFOLIO_ROW_KEYS}
+
+    ps = property_series(pa, years)
+    home_value, mort_bal = ps["home_value"], ps["mort_bal"]
+    y = years[None, :]
+    buy = pa.col("purchase_year")
+    sell = pa.col("liquidation_year")
+    draw_year = pa.col("heloc_draw_year")
+
+    # A sale only takes effect if it falls on or after the purchase
+    sold_later = (sell > 0) & (sell >= buy)
+    owned = (y >= buy) & ~(sold_later & (y > sell))
+    acquiring = owned & ~pa.is_existing[:, None] & (y == buy)
+    drawing = owned & pa.heloc_enabled[:, None] & (draw_year > 0) & (y == draw_year)
+    selling = owned & (sell > 0) & (y == sell)
+
+    allowed = np.maximum(0.0, pa.col("heloc_cltv") * home_value - mort_bal)
+    draw = np.where(drawing, np.maximum(0.0, np.minimum(pa.col("heloc_draw_amount"), allowed)), 0.0)
+    heloc = np.cumsum(draw, axis=1)
+
+    net_rent = ps["gross_rent"] - (ps["operating_costs"] + heloc * (heloc_rate_pct / 100.0))
+    equity = home_value - mort_bal - heloc
+    down = pa.col("purchase_price") * (pa.col("down_pct") / 100.0)
+
+    def masked(x, mask=owned):
+        return np.where(mask, x, 0.0)
+
+    return {
+        "rental_cf": masked(net_rent),
+        "equity": masked(equity),
+        "heloc": masked(heloc),
+        "value": masked(home_value),
+        "sale_proceeds": masked(np.maximum(0.0, equity), selling),
+        "heloc_drawn": draw,
+        "down_payment": masked(down, acquiring),
+        "active": owned,
+        "acquired": acquiring,
+        "liquidated": selling,
+    }
+
+
+def portfolio_totals(rows: dict) -> dict:
+    """
+    Per-year totals, shaped (years,), from portfolio_rows(). `cash_delta` is
+    what the portfolio adds to cash each year: sale proceeds and HELOC draws
+    minus down payments.
+    """
+    t = {k: v.sum(axis=0) for k, v in rows.items()}
+    return {
+        "rental_cf": t["rental_cf"],
+        "equity": t["equity"],
+        "heloc": t["heloc"],
+        "value": t["value"],
+        "cash_delta": t["sale_proceeds"] + t["heloc_drawn"] - t["down_payment"],
+        "heloc_drawn": t["heloc_drawn"],
+        "active": t["active"],
+        "acquired": t["acquired"],
+        "liquidated": t["liquidated"],
+    }
+
+
+def portfolio_series(pa: PropertyArrays, years: np.ndarray, heloc_rate_pct: float) -> dict:
+    """Per-year portfolio totals, shaped (years,) (see portfolio_rows and portfolio_totals)."""
+    return portfolio_totals(portfolio_rows(pa, years, heloc_rate_pct))
+
+# -----------------------------
+# Result columns
+# -----------------------------
+RESULT_COLUMNS = [
+    "Year",
+    "Cody Gross", "Lauren Gross", "Other Gross",
+    "Cody Net", "Lauren Net", "Other Net",
+    "Income (Net Total)",
+    "Estimated Taxes (Total)", "Estimated Federal Tax", "Estimated State Tax", "Estimated FICA",
+    "Expenses (non-property)", "New Home PITI+HOA (annual)",
+    "Retirement Employee Contrib", "Retirement Employer Match", "IRA Contributions", "Retirement Balance (Total)",
+    "Student Loan Pay", "Student Loan Remaining",
+    "Rental Cash Flow", "Mortgage Savings",
+    "Pharmacy Profit", "Pharmacy Note Payment", "Pharmacy Note Interest", "Pharmacy Note Principal",
+    "Pharmacy Extra Principal", "Pharmacy Note Balance", "Pharmacy Equity Value",
+    "Net Cash Flow",
+    "Investable Cash", "Total Property Value (active)", "Total Equity (active rentals)", "HELOC Outstanding",
+    "New Home Value", "New Home Mortgage Balance", "New Home Equity", "New Home Liquidation Proceeds",
+    "Net Worth",
+    "Active Properties", "Acquired This Year", "Liquidated This Year", "HELOC Drawn This Year",
+    "Status",
+]
+INT_RESULT_COLUMNS = ["Year", "Active Properties", "Acquired This Year", "Liquidated This Year"]
+TEXT_RESULT_COLUMNS = ["Status"]
+# Results are kept at full precision and rounded only for display and export
+RESULT_DECIMALS = 2
+
+
+def _result_dtype(name: str):
+    if name in INT_RESULT_COLUMNS:
+        return np.int64
+    if name in TEXT_RESULT_COLUMNS:
+        return object
+    return float
+
+
+class ResultColumns:
+    """
+    Preallocated, typed column buffers for one run, one slot per year.
+    Columns not asked for all point at one shared scratch buffer, so the
+    year loop can write every column unconditionally while only the
+    selected ones are ever materialized.
+    """
+
+    def __init__(self, n_years: int, columns: Optional[Sequence[str]] = None):
+        self.columns = list(RESULT_COLUMNS if columns is None else columns)
+        unknown = [c for c in self.columns if c not in RESULT_COLUMNS]
+        if unknown:
+            raise ValueError(f"unknown result column(s): {', '.join(unknown)}")
+        self.n_years = 0
+        self.data = {}
+        self.resize(n_years)
+
+    def resize(self, n_years: int) -> None:
+        """Change the number of years, keeping the values already written."""
+        keep = min(n_years, self.n_years)
+        scratch = np.zeros(n_years, dtype=object)
+        data = {}
+        for name in RESULT_COLUMNS:
+            if name in self.columns:
+                data[name] = np.zeros(n_years, dtype=_result_dtype(name))
+                if keep:
+                    data[name][:keep] = self.data[name][:keep]
+            else:
+                data[name] = scratch
+        self.data = data
+        self.n_years = n_years
+
+    def frame(self) -> "pd.DataFrame":
+        """The selected columns as a DataFrame (a copy; the buffers can be reused)."""
+        import pandas as pd
+
+        return pd.DataFrame({name: self.data[name].copy() for name in self.columns})
+
+
+def rounded(df: "pd.DataFrame", decimals: int = RESULT_DECIMALS) -> "pd.DataFrame":
+    """Results rounded for display or export."""
+    return df.round(decimals)
+
+# -----------------------------
+# Simulation
+# -----------------------------
+def initial_state(s: Scenario) -> RunState:
+    """The state carried from year to year, as it stands at the start of year 0."""
+    return RunState(
+        cash=float(s.starting_cash),
+        cody_ret=float(s.cody_ret_balance0),
+        lauren_ret=float(s.lauren_ret_balance0),
+    )
+
+
+def simulate_year(s: Scenario, y: int, hh: dict, pf: dict, state: RunState, out: dict) -> None:
+    """
+    One year of the simulation: advances the carried `state` in place and
+    writes the year's values into slot y of the `out` buffers
+    (ResultColumns.data). hh and pf are household_series() and
+    portfolio_series() as lists.
+    """
+    cash = state.cash
+    cody_ret = state.cody_ret
+    lauren_ret = state.lauren_ret
+
+    # Pharmacy state
+    ph_note_balance = state.ph_note_balance
+    ph_annual_payment = state.ph_annual_payment
+    ph_active = state.ph_active
+    seller_note_rate = (float(s.seller_note_rate_pct) / 100.0) if s.pharmacy_buyin_enabled else 0.0
+
+    cody_gross_y = hh["cody_gross"][y]
+    lauren_gross_y = hh["lauren_gross"][y]
+    cody_emp_contrib = hh["cody_emp_contrib"][y]
+    lauren_emp_contrib = hh["lauren_emp_contrib"][y]
+    cody_match = hh["cody_match"][y]
+    lauren_match = hh["lauren_match"][y]
+    cody_ira = hh["cody_ira"][y]
+    lauren_ira = hh["lauren_ira"][y]
+
+    income_y = hh["income"][y]
+    expenses_y = hh["expenses"][y]
+    sl_remaining = hh["sl_remaining"][y]
+    sl_pay_y = hh["sl_pay"][y]
+    new_home_piti_y = hh["new_home_piti"][y]
+    new_home_equity_y = hh["new_home_equity"][y]
+    mort_savings_y = hh["mort_savings"][y]
+    ph_profit_y = hh["ph_profit"][y]
+    ph_equity_value = hh["ph_equity_value"][y]
+
+    # -------------------------
+    # Retirement balances
+    # -------------------------
+    total_ret_contrib_outflow = 0.0
+    if s.count_retirement_contrib_as_expense:
+        total_ret_contrib_outflow = cody_emp_contrib + lauren_emp_contrib + cody_ira + lauren_ira
+
+    cody_ret = grow_balance(cody_ret + cody_emp_contrib + cody_match + cody_ira, s.retirement_return)
+    lauren_ret = grow_balance(lauren_ret + lauren_emp_contrib + lauren_match + lauren_ira, s.retirement_return)
+    total_retirement = cody_ret + lauren_ret
+
+    # -------------------------
+    # New home sale
+    # -------------------------
+    cash += hh["new_home_proceeds"][y]
+
+    # -------------------------
+    # Properties
+    # -------------------------
+    rental_cf_y = pf["rental_cf"][y]
+    total_equity = pf["equity"][y]
+    total_heloc = pf["heloc"][y]
+    total_property_value = pf["value"][y]
+    cash += pf["cash_delta"][y]
+
+    # -------------------------
+    # Pharmacy seller note
+    # -------------------------
+    ph_note_payment_y = 0.0
+    ph_note_interest_y = 0.0
+    ph_note_principal_y = 0.0
+    ph_extra_principal_y = 0.0
+
+    if s.pharmacy_buyin_enabled:
+        if (y == int(s.pharmacy_buyin_year)) and (not ph_active):
+            ph_active = True
+            cash -= float(s.pharmacy_cash_down)
+            ph_note_balance = max(0.0, float(s.pharmacy_buyin_price) - float(s.pharmacy_cash_down))
+
+            if s.seller_note_years > 0 and ph_note_balance > 0:
+                ph_annual_payment = schedule(
+                    ph_note_balance, seller_note_rate, int(s.seller_note_years), periods_per_year=1
+                ).payment
+            else:
+                ph_annual_payment = 0.0
+
+        if ph_active and ph_note_balance > 0 and ph_annual_payment > 0:
+            extra = 0.0
+            if s.enable_accel_paydown:
+                if int(s.accel_year) > 0 and y == int(s.accel_year):
+                    extra += float(s.lauren_dist_lump)
+                if float(s.extra_principal_recurring) > 0 and y >= int(s.recurring_extra_start_year):
+                    extra += float(s.extra_principal_recurring)
+
+            ph_extra_principal_y = extra
+            ph_note_payment_y, ph_note_interest_y, ph_note_principal_y, ph_note_balance = annual_amort_step(
+                balance=ph_note_balance,
+                annual_rate=seller_note_rate,
+                annual_payment=float(ph_annual_payment),
+                extra_principal=extra
+            )
+
+    # -------------------------
+    # Net cash flow and cash update
+    # -------------------------
+    net_cash_flow_y = (
+        income_y
+        - expenses_y
+        - new_home_piti_y
+        - sl_pay_y
+        + rental_cf_y
+        + mort_savings_y
+        + ph_profit_y
+        - ph_note_payment_y
+        - total_ret_contrib_outflow
+    )
+
+    if s.reinvest_surplus:
+        cash += net_cash_flow_y
+
+    # -------------------------
+    # Net worth
+    # -------------------------
+    net_worth = cash + total_equity - sl_remaining
+    if s.include_retirement_in_networth:
+        net_worth += total_retirement
+    if s.pharmacy_buyin_enabled and s.include_pharmacy_equity_in_networth and ph_active:
+        net_worth += (ph_equity_value - ph_note_balance)
+    if s.include_new_home_equity_in_networth:
+        net_worth += new_home_equity_y
+
+    status = cash_flow_status(net_cash_flow_y)
+    show_tax = s.show_tax_line_item
+
+    state.cash, state.cody_ret, state.lauren_ret = cash, cody_ret, lauren_ret
+    state.ph_note_balance, state.ph_annual_payment, state.ph_active = ph_note_balance, ph_annual_payment, ph_active
+
+    out["Year"][y] = y
+
+    out["Cody Gross"][y] = cody_gross_y
+    out["Lauren Gross"][y] = lauren_gross_y
+    out["Other Gross"][y] = hh["other_gross"][y]
+
+    out["Cody Net"][y] = hh["cody_net"][y]
+    out["Lauren Net"][y] = hh["lauren_net"][y]
+    out["Other Net"][y] = hh["other_net"][y]
+
+    out["Income (Net Total)"][y] = income_y
+
+    out["Estimated Taxes (Total)"][y] = hh["est_total_tax"][y] if show_tax else 0.0
+    out["Estimated Federal Tax"][y] = hh["est_federal_tax"][y] if show_tax else 0.0
+    out["Estimated State Tax"][y] = hh["est_state_tax"][y] if show_tax else 0.0
+    out["Estimated FICA"][y] = hh["est_fica_tax"][y] if show_tax else 0.0
+
+    out["Expenses (non-property)"][y] = expenses_y
+    out["New Home PITI+HOA (annual)"][y] = new_home_piti_y
+
+    out["Retirement Employee Contrib"][y] = cody_emp_contrib + lauren_emp_contrib
+    out["Retirement Employer Match"][y] = cody_match + lauren_match
+    out["IRA Contributions"][y] = cody_ira + lauren_ira
+    out["Retirement Balance (Total)"][y] = total_retirement
+
+    out["Student Loan Pay"][y] = sl_pay_y
+    out["Student Loan Remaining"][y] = sl_remaining
+
+    out["Rental Cash Flow"][y] = rental_cf_y
+    out["Mortgage Savings"][y] = mort_savings_y
+
+    out["Pharmacy Profit"][y] = ph_profit_y
+    out["Pharmacy Note Payment"][y] = ph_note_payment_y
+    out["Pharmacy Note Interest"][y] = ph_note_interest_y
+    out["Pharmacy Note Principal"][y] = ph_note_principal_y
+    out["Pharmacy Extra Principal"][y] = ph_extra_principal_y
+    out["Pharmacy Note Balance"][y] = ph_note_balance
+    out["Pharmacy Equity Value"][y] = ph_equity_value if ph_active else 0.0
+
+    out["Net Cash Flow"][y] = net_cash_flow_y
+
+    out["Investable Cash"][y] = cash
+    out["Total Property Value (active)"][y] = total_property_value
+    out["Total Equity (active rentals)"][y] = total_equity
+    out["HELOC Outstanding"][y] = total_heloc
+
+    out["New Home Value"][y] = hh["new_home_value"][y]
+    out["New Home Mortgage Balance"][y] = hh["new_home_mort_bal"][y]
+    out["New Home Equity"][y] = new_home_equity_y
+    out["New Home Liquidation Proceeds"][y] = hh["new_home_proceeds"][y]
+
+    out["Net Worth"][y] = net_worth
+
+    out["Active Properties"][y] = pf["active"][y]
+    out["Acquired This Year"][y] = pf["acquired"][y]
+    out["Liquidated This Year"][y] = pf["liquidated"][y]
+    out["HELOC Drawn This Year"][y] = pf["heloc_drawn"][y]
+
+    out["Status"][y] = status
+
+
+def simulate(s: Scenario, columns: Optional[Sequence[str]] = None) -> "pd.DataFrame":
+    """
+    Run the year-by-year simulation for one scenario. Values are unrounded
+    (see rounded()); `columns` picks a subset of RESULT_COLUMNS.
+    """
+    years = s.years
+    hh = {k: v.tolist() for k, v in household_series(s).items()}
+
+    pf = {k: v.tolist() for k, v in portfolio_series(PropertyArrays(s.properties), years, s.heloc_rate).items()}
+
+    out = ResultColumns(len(years), columns)
+    state = initial_state(s)
+    for y in years.tolist():
+        simulate_year(s, y, hh, pf, state, out.data)
+    return out.frame()
@@ -0,0 +1,103 @@
+"""
+Process-pool backend for Monte Carlo runs too large for one core.
+
+Paths are cut into fixed-size shards and shard i always draws from child i
+of `SeedSequence(seed).spawn(...)`. Shards are merged in shard order, so a
+given seed gives bit-identical results whatever the worker count. Each shard
+is reduced to a sketches.StreamingSummary before it leaves its worker, so
+memory stays bounded however many paths run.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+from engine import Scenario
+from montecarlo import FAN_COLUMNS, FAN_PERCENTILES, MonteCarloSpec, draw_paths, run_monte_carlo
+from sketches import SKETCH_K, StreamingSummary
+
+SHARD_PATHS = 10000
+
+
+@dataclass(frozen=True)
+class MonteCarloSummary:
+    """Merged result of a sharded run; arrays are indexed by year."""
+    n_paths: int
+    percentiles: tuple
+    bands: Dict[str, np.ndarray]  # {column: (len(percentiles), horizon + 1)}
+    at_risk_share: np.ndarray     # share of paths whose Net Cash Flow is "🔴 At risk"
+    mean: Dict[str, np.ndarray]   # every output column
+    std: Dict[str, np.ndarray]
+    rank_error: float             # worst-case quantile rank error, as a share of paths
+
+
+def shard_sizes(n_paths: int, shard_paths: int = SHARD_PATHS) -> list:
+    """Path counts per shard; depends only on n_paths, never on the worker count."""
+    full, rest = divmod(int(n_paths), int(shard_paths))
+    return [int(shard_paths)] * full + ([rest] if rest else [])
+
+
+def _run_shard(scenario: Scenario, spec: MonteCarloSpec, seed_seq: np.random.SeedSequence,
+               n_paths: int, columns: Sequence[str], k: int) -> StreamingSummary:
+    """Simulate one shard and reduce it before it is sent back."""
+    paths = draw_paths(scenario, spec, n_paths, np.random.default_rng(seed_seq))
+    summary = StreamingSummary(len(scenario.years), columns, k)
+    summary.update(run_monte_carlo(scenario, spec, paths))
+    return summary
+
+
+def iter_shards(scenario: Scenario, spec: MonteCarloSpec,
+                shard_paths: int = SHARD_PATHS) -> Iterator[Tuple[int, Dict[str, np.ndarray]]]:
+    """
+    Full per-path results one shard at a time, in-process: (index of the
+    shard's first path, {column: (shard paths, horizon + 1)}). Shards draw
+    the same paths as run_sharded() for the same seed.
+    """
+    sizes = shard_sizes(spec.n_paths, shard_paths)
+    first = 0
+    for seed_seq, size in zip(np.random.SeedSequence(spec.seed).spawn(len(sizes)), sizes):
+        paths = draw_paths(scenario, spec, size, np.random.default_rng(seed_seq))
+        yield first, run_monte_carlo(scenario, spec, paths)
+        first += size
+
+
+def summarize(summary: StreamingSummary, percentiles: Sequence[float] = FAN_PERCENTILES) -> MonteCarloSummary:
+    """Freeze a streaming summary into the bands, shares and moments callers read."""
+    return MonteCarloSummary(
+        n_paths=summary.n_paths,
+        percentiles=tuple(percentiles),
+        bands=summary.bands(percentiles),
+        at_risk_share=summary.at_risk / summary.n_paths,
+        mean={col: m.mean for col, m in summary.moments.items()},
+        std={col: m.std for col, m in summary.moments.items()},
+        rank_error=summary.rank_error_bound(),
+    )
+
+
+def run_sharded(scenario: Scenario, spec: MonteCarloSpec, workers: Optional[int] = None,
+                shard_paths: int = SHARD_PATHS, columns: Sequence[str] = FAN_COLUMNS,
+                percentiles: Sequence[float] = FAN_PERCENTILES, k: int = SKETCH_K) -> MonteCarloSummary:
+    """
+    Run spec.n_paths paths across a process pool (workers=None uses every core,
+    workers=1 stays in-process) and merge them into one summary.
+    """
+    sizes = shard_sizes(spec.n_paths, shard_paths)
+    if not sizes:
+        raise ValueError("n_paths must be positive")
+    seeds = np.random.SeedSequence(spec.seed).spawn(len(sizes))
+    n = len(sizes)
+    args = ([scenario] * n, [spec] * n, seeds, sizes, [tuple(columns)] * n, [k] * n)
+
+    total = StreamingSummary(len(scenario.years), columns, k)
+    workers = min(workers or os.cpu_count() or 1, n)
+    if workers <= 1:
+        for part in map(_run_shard, *args):
+            total.merge(part)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # map() yields in submission order, which keeps the merge deterministic
+            for part in pool.map(_run_shard, *args):
+                total.merge(part)
+    return summarize(total, percentiles)
@@ -0,0 +1,123 @@
+"""
+Goal seek: solve for an input instead of dragging its slider until it works.
+
+Each round probes many candidate values in one batched run and keeps the
+bracket where the goal flips from unmet to met (k-ary bisection). Whole-
+number inputs such as years are searched exactly; when the whole range
+fits in one round every value is checked, so no monotonicity is assumed.
+"""
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from batch import run_batch, simulate_batch
+from engine import TIGHT_CASH_FLOW, Scenario
+from sensitivity import Knob, stack_knobs
+
+PROBES_PER_ROUND = 64
+
+# Passive income vs the expenses it has to cover (retirement saving is left out)
+PASSIVE_INCOME_COLUMNS = ("Rental Cash Flow", "Pharmacy Profit")
+COVERED_EXPENSE_COLUMNS = (
+    "Expenses (non-property)", "New Home PITI+HOA (annual)", "Student Loan Pay", "Pharmacy Note Payment",
+)
+
+# ok(results, household inputs) -> one bool per run
+Goal = Callable[[Dict[str, np.ndarray], Dict[str, np.ndarray]], np.ndarray]
+
+
+def _probe(s: Scenario, knob: Knob, values: np.ndarray, ok: Goal) -> np.ndarray:
+    hh, props = stack_knobs(s, [(knob, values)])
+    return np.asarray(ok(run_batch(hh, props, s.years), hh), dtype=bool)
+
+
+def seek(s: Scenario, knob: Knob, ok: Goal, lo: float, hi: float,
+         want: str = "min", tol: float = 1.0) -> Optional[float]:
+    """
+    Smallest (want="min") or largest (want="max") value of `knob` in [lo, hi]
+    that meets the goal, to within `tol` (exact for whole-number inputs).
+    Assumes the goal flips once across the range. None if nothing in the
+    range meets it.
+    """
+    if want not in ("min", "max"):
+        raise ValueError("want must be 'min' or 'max'")
+    integer = isinstance(knob.value(s), int)
+    lo, hi = (int(np.ceil(lo)), int(np.floor(hi))) if integer else (float(lo), float(hi))
+    if lo > hi:
+        raise ValueError("empty search range")
+
+    while True:
+        candidates = np.linspace(lo, hi, PROBES_PER_ROUND)
+        if integer:
+            candidates = np.unique(np.round(candidates)).astype(int)
+        met = _probe(s, knob, candidates, ok)
+        if not met.any():
+            return None
+        i = int(np.argmax(met)) if want == "min" else len(met) - 1 - int(np.argmax(met[::-1]))
+        exhaustive = integer and len(candidates) == hi - lo + 1
+        if exhaustive or (not integer and hi - lo <= tol):
+            return candidates[i].item()
+        # Narrow to the gap between the answer and its unmet neighbour
+        if want == "min":
+            if i == 0:
+                return candidates[0].item()
+            lo, hi = candidates[i - 1] + (1 if integer else 0), candidates[i]
+        else:
+            if i == len(candidates) - 1:
+                return candidates[-1].item()
+            lo, hi = candidates[i], candidates[i + 1] - (1 if integer else 0)
+        lo, hi = (int(lo), int(hi)) if integer else (float(lo), float(hi))
+
+
+def cash_flow_never_below(threshold: float = TIGHT_CASH_FLOW) -> Goal:
+    return lambda results, hh: results["Net Cash Flow"].min(axis=1) >= threshold
+
+
+def cash_never_below_reserve(results: Dict[str, np.ndarray], hh: Dict[str, np.ndarray]) -> np.ndarray:
+    return (results["Investable Cash"] >= hh["min_cash_reserve"][:, None]).all(axis=1)
+
+
+def min_income_for_cash_flow(s: Scenario, field: str = "cody_gross0", threshold: float = TIGHT_CASH_FLOW,
+                             tol: float = 100.0, ceiling: float = 1e8) -> Optional[float]:
+    """
+    Lowest starting income in `field` that keeps Net Cash Flow at or above
+    `threshold` (the "🟡 Tight buffer" line) every year; None if even
+    `ceiling` doesn't.
+    """
+    knob = Knob(field, field)
+    ok = cash_flow_never_below(threshold)
+    # Bracket first: doublings up to the ceiling, all in one run
+    steps = np.minimum(ceiling, max(float(knob.value(s)), 1000.0) * 2.0 ** np.arange(PROBES_PER_ROUND))
+    steps = np.unique(steps)
+    met = _probe(s, knob, steps, ok)
+    if not met.any():
+        return None
+    return seek(s, knob, ok, 0.0, float(steps[int(np.argmax(met))]), "min", tol)
+
+
+def latest_liquidation_year(s: Scenario, property_index: int) -> Optional[int]:
+    """
+    Latest liquidation_year for one property that keeps Investable Cash at or
+    above min_cash_reserve every year. 0 (never sell) if holding works;
+    None if no year does.
+    """
+    p = s.properties[property_index]
+    knob = Knob(f"{p.name} #{property_index + 1}: liquidation_year", "liquidation_year", property_index)
+    if _probe(s, knob, np.array([0]), cash_never_below_reserve)[0]:
+        return 0
+    first = max(1, int(p.purchase_year))
+    if first > s.horizon_years:
+        return None
+    return seek(s, knob, cash_never_below_reserve, first, int(s.horizon_years), "max")
+
+
+def passive_coverage(results: Dict[str, np.ndarray]) -> np.ndarray:
+    """Passive income minus the expenses it must cover, shaped (runs, years)."""
+    passive = sum(results[c] for c in PASSIVE_INCOME_COLUMNS)
+    return passive - sum(results[c] for c in COVERED_EXPENSE_COLUMNS)
+
+
+def earliest_passive_coverage_year(s: Scenario) -> Optional[int]:
+    """First year rentals + pharmacy profit cover household expenses; None within the horizon."""
+    covered = passive_coverage(simulate_batch([s]))[0] >= 0
+    return int(s.years[np.argmax(covered)]) if covered.any() else None
@@ -0,0 +1,30 @@
+"""
+Content hashes for caching derived outputs (chart images, export files).
+
+A hash covers the values and layout of frames and arrays plus the repr of
+plain values, so two results with identical contents share a cache entry
+however they were produced. pandas is not imported here: a frame can only
+be passed in once something else has loaded it.
+"""
+import hashlib
+import sys
+
+import numpy as np
+
+
+def data_hash(*parts) -> str:
+    """A digest of frames, arrays and plain values, used as (part of) a cache key."""
+    h = hashlib.blake2b(digest_size=16)
+    pd = sys.modules.get("pandas")
+    for part in parts:
+        if pd is not None and isinstance(part, (pd.DataFrame, pd.Series)):
+            h.update(pd.util.hash_pandas_object(part, index=True).to_numpy().tobytes())
+            h.update(repr(list(part.columns) if isinstance(part, pd.DataFrame) else part.name).encode())
+        elif isinstance(part, np.ndarray):
+            a = np.ascontiguousarray(part)
+            h.update(a.tobytes())
+            h.update(repr((a.dtype.str, a.shape)).encode())
+        else:
+            h.update(repr(part).encode())
+        h.update(b"|")
+    return h.hexdigest()
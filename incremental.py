@@ -0,0 +1,226 @@
+"""
+Incremental re-simulation for interactive edits.
+
+Only a handful of values (cash, retirement balances and the pharmacy note)
+are carried from one year to the next; everything else comes from the
+closed-form household and portfolio series. IncrementalSimulator keeps the
+previous run: the series, the result buffers and a checkpoint of the carried
+state at the start of each year. On the next run it works out the first
+year the edit can affect and resumes from that year's checkpoint, keeping
+every earlier year's results.
+
+advance() only brings the NumPy result buffers up to date, and is where
+a late edit gets cheaper than simulate(). run() also returns the results
+as a DataFrame. Building that frame costs about as much as simulate()
+itself, so run() after an edit is no faster than a full simulation; it is
+only cheap when nothing changed, since the frame is then reused. Callers
+that can read the buffers should use advance(). The app uses run(): its
+results table and charts need a frame.
+
+The first affected year is the first year any series differs from the
+previous run, or, for inputs the year loop reads directly, the year named
+in LOOP_FIELD_YEARS (year 0 for everything else in LOOP_FIELDS). So moving
+a late purchase or sale, or the accelerated paydown year, only re-runs the
+tail of the horizon. Results are identical to engine.simulate().
+"""
+from dataclasses import fields
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from engine import (
+    PropertyArrays,
+    ResultColumns,
+    Scenario,
+    household_series,
+    initial_state,
+    portfolio_rows,
+    portfolio_totals,
+    simulate_year,
+)
+from state import RunState
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Scenario fields read by initial_state() / simulate_year() (some feed the series as well)
+LOOP_FIELDS = {
+    "starting_cash", "cody_ret_balance0", "lauren_ret_balance0", "retirement_return",
+    "count_retirement_contrib_as_expense", "reinvest_surplus", "show_tax_line_item",
+    "include_retirement_in_networth", "include_pharmacy_equity_in_networth", "include_new_home_equity_in_networth",
+    "pharmacy_buyin_enabled", "pharmacy_buyin_year", "pharmacy_buyin_price", "pharmacy_cash_down",
+    "seller_note_rate_pct", "seller_note_years",
+    "enable_accel_paydown", "accel_year", "lauren_dist_lump",
+    "extra_principal_recurring", "recurring_extra_start_year",
+}
+
+# Loop fields whose effect starts at a given year: nothing changes before
+# the earliest of these year fields (old or new value)
+LOOP_FIELD_YEARS = {
+    "pharmacy_buyin_enabled": ("pharmacy_buyin_year",),
+    "pharmacy_buyin_year": ("pharmacy_buyin_year",),
+    "pharmacy_buyin_price": ("pharmacy_buyin_year",),
+    "pharmacy_cash_down": ("pharmacy_buyin_year",),
+    "seller_note_rate_pct": ("pharmacy_buyin_year",),
+    "seller_note_years": ("pharmacy_buyin_year",),
+    "enable_accel_paydown": ("accel_year", "recurring_extra_start_year"),
+    "accel_year": ("accel_year",),
+    "lauren_dist_lump": ("accel_year",),
+    "extra_principal_recurring": ("recurring_extra_start_year",),
+    "recurring_extra_start_year": ("recurring_extra_start_year",),
+}
+
+_SCENARIO_FIELDS = [f.name for f in fields(Scenario) if f.name != "properties"]
+
+
+def _first_diff(old: Dict[str, np.ndarray], new: Dict[str, np.ndarray], T: int) -> int:
+    """First year (< T) where any series differs; T if none does."""
+    first = T
+    for k, a in new.items():
+        b = old[k]
+        n = min(len(a), len(b), first)
+        diff = np.flatnonzero(a[:n] != b[:n])
+        if len(diff):
+            first = int(diff[0])
+    return first
+
+
+def _loop_dirty_year(old: Scenario, new: Scenario) -> Optional[int]:
+    """First year affected by changed loop-only inputs (None if there are none)."""
+    first = None
+    for name in LOOP_FIELDS:
+        if getattr(old, name) == getattr(new, name):
+            continue
+        year_fields = LOOP_FIELD_YEARS.get(name)
+        y = 0 if year_fields is None else min(
+            max(0, int(getattr(sc, f))) for f in year_fields for sc in (old, new)
+        )
+        first = y if first is None else min(first, y)
+    return first
+
+
+class IncrementalSimulator:
+    """
+    simulate() with memory of the previous run. Keep one per session and
+    call run() on every edit.
+    """
+
+    def __init__(self, columns: Optional[Sequence[str]] = None):
+        self.scenario: Optional[Scenario] = None
+        self.hh: Dict[str, np.ndarray] = {}
+        self.pf: Dict[str, np.ndarray] = {}
+        self._hh_lists: Dict[str, list] = {}
+        self._pf_lists: Dict[str, list] = {}
+        # Each property's portfolio_rows(), keyed by its PropertyInputs
+        self._property_rows: Dict[object, Dict[str, np.ndarray]] = {}
+        # The rows stacked (properties, years) for _stacked_for, so an edit replaces one row
+        self._stacked: Dict[str, np.ndarray] = {}
+        self._stacked_for: tuple = ()
+        self.out = ResultColumns(0, columns)
+        # checkpoints[y] = carried state at the start of year y
+        self.checkpoints: List[RunState] = []
+        self.last_resume_year = 0
+        # run()'s frame for the current buffers (None once they change)
+        self._frame: Optional["pd.DataFrame"] = None
+
+    def dirty_year(self, s: Scenario) -> int:
+        """
+        First year whose results can differ from the previous run (updates the
+        cached series as a side effect). len(s.years) means nothing changed.
+        """
+        old = self.scenario
+        years = s.years
+        T = len(years)
+        if old is None:
+            self._set_household(household_series(s))
+            self._set_portfolio(self._portfolio(s))
+            return 0
+
+        first = min(T, self.out.n_years)
+        changed = [n for n in _SCENARIO_FIELDS if getattr(old, n) != getattr(s, n)]
+
+        loop_year = _loop_dirty_year(old, s) if changed else None
+        if loop_year is not None:
+            first = min(first, loop_year)
+
+        if changed:
+            hh = household_series(s)
+            first = min(first, _first_diff(self.hh, hh, T))
+            self._set_household(hh)
+
+        if s.properties != old.properties or s.heloc_rate != old.heloc_rate or T != len(old.years):
+            if s.heloc_rate != old.heloc_rate or T != len(old.years):
+                self._property_rows.clear()
+                self._stacked_for = ()
+            pf = self._portfolio(s)
+            first = min(first, _first_diff(self.pf, pf, T))
+            self._set_portfolio(pf)
+        return first
+
+    def _portfolio(self, s: Scenario) -> Dict[str, np.ndarray]:
+        """portfolio_series() for s, computing only properties not seen before."""
+        cache = self._property_rows
+        missing = list(dict.fromkeys(p for p in s.properties if p not in cache))
+        if missing:
+            rows = portfolio_rows(PropertyArrays(missing), s.years, s.heloc_rate)
+            for i, p in enumerate(missing):
+                cache[p] = {k: v[i] for k, v in rows.items()}
+        # Drop properties that have been edited away
+        current = set(s.properties)
+        for p in [p for p in cache if p not in current]:
+            del cache[p]
+        if not s.properties:
+            return portfolio_totals(portfolio_rows(PropertyArrays([]), s.years, s.heloc_rate))
+        old = self._stacked_for
+        if len(old) == len(s.properties):
+            for i, (p_old, p) in enumerate(zip(old, s.properties)):
+                if p_old != p:
+                    for k, v in cache[p].items():
+                        self._stacked[k][i] = v
+        else:
+            per_property = [cache[p] for p in s.properties]
+            self._stacked = {k: np.stack([r[k] for r in per_property]) for k in per_property[0]}
+        self._stacked_for = s.properties
+        return portfolio_totals(self._stacked)
+
+    def _set_household(self, hh: Dict[str, np.ndarray]) -> None:
+        self.hh = hh
+        self._hh_lists = {k: v.tolist() for k, v in hh.items()}
+
+    def _set_portfolio(self, pf: Dict[str, np.ndarray]) -> None:
+        self.pf = pf
+        self._pf_lists = {k: v.tolist() for k, v in pf.items()}
+
+    def advance(self, s: Scenario) -> Dict[str, np.ndarray]:
+        """
+        Bring the result buffers up to date for s, re-running only the years
+        the edit reaches. Returns self.out.data ({column: array by year}, the selected columns);
+        the arrays are reused, so copy anything kept past the next call.
+        """
+        start = self.dirty_year(s)
+        T = len(s.years)
+        if start < T or T != self.out.n_years:
+            self._frame = None
+        state = initial_state(s) if start == 0 else self.checkpoints[start].copy()
+        del self.checkpoints[start:]
+        if T != self.out.n_years:
+            self.out.resize(T)
+
+        hh, pf, out = self._hh_lists, self._pf_lists, self.out.data
+        for y in range(start, T):
+            self.checkpoints.append(state.copy())
+            simulate_year(s, y, hh, pf, state, out)
+        # Keep the state after the last year so a longer horizon can resume there
+        self.checkpoints.append(state.copy())
+
+        self.scenario = s
+        self.last_resume_year = start
+        return self.out.data
+
+    def run(self, s: Scenario) -> "pd.DataFrame":
+        """Same result as engine.simulate(s). After an edit this costs about as much as simulate(); see advance()."""
+        self.advance(s)
+        if self._frame is None:
+            self._frame = self.out.frame()
+        # Copying the frame's few consolidated blocks is cheap next to building it
+        return self._frame.copy()
@@ -0,0 +1,167 @@
+"""
+Monte Carlo mode: stochastic growth rates drawn per path and per year.
+
+The deterministic sliders (`retirement_return`, each property's
+`value_growth` / `rent_growth`, `pharmacy_profit_growth_pct`) become the
+means of user-specified distributions. Alternatively the retirement and
+property rates can be block-bootstrapped from a local history file (see
+bootstrap.py). Every path is simulated at once by the batched engine, so
+thousands of paths cost one pass over the years.
+"""
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from batch import run_batch, stack_scenarios
+from bootstrap import HISTORY_FREQUENCIES, bootstrap_returns, load_history
+from engine import Scenario
+
+DISTRIBUTIONS = ["Normal", "Student-t (fat tails)", "Uniform"]
+STUDENT_T_DOF = 5
+
+FAN_COLUMNS = ["Net Worth", "Investable Cash", "Net Cash Flow"]
+FAN_PERCENTILES = (10, 50, 90)
+
+# Property-level shocks, in the order they are correlated (see shock_factor)
+PROPERTY_SHOCKS = ("value_growth", "rent_growth", "vacancy_pct")
+
+
+@dataclass(frozen=True)
+class MonteCarloSpec:
+    """
+    Path count, seed and the spread of each stochastic rate. Spreads are
+    standard deviations in percentage points around the scenario's own rate.
+    With `history_file` set, rates found in that file are bootstrapped from it
+    in blocks of `block_years` instead; the rest stay parametric.
+
+    Property shocks are correlated two ways: `property_correlation` between
+    properties (or a full `property_corr_matrix`, properties x properties),
+    and the three pairwise correlations between a property's own shocks.
+    """
+    n_paths: int = 10000
+    seed: Optional[int] = 42
+    distribution: str = "Normal"
+    retirement_return_sd: float = 12.0
+    value_growth_sd: float = 5.0
+    rent_growth_sd: float = 2.0
+    pharmacy_profit_growth_sd: float = 5.0
+    vacancy_sd: float = 0.0
+    property_correlation: float = 0.0
+    property_corr_matrix: Optional[Tuple[Tuple[float, ...], ...]] = None
+    value_rent_corr: float = 0.0
+    value_vacancy_corr: float = 0.0
+    rent_vacancy_corr: float = 0.0
+    history_file: Optional[str] = None
+    history_frequency: str = "Annual"
+    block_years: int = 5
+
+
+def standard_draws(rng: np.random.Generator, distribution: str, shape) -> np.ndarray:
+    """Zero-mean, unit-variance draws from the chosen distribution family."""
+    if distribution == "Student-t (fat tails)":
+        return rng.standard_t(STUDENT_T_DOF, size=shape) * np.sqrt((STUDENT_T_DOF - 2) / STUDENT_T_DOF)
+    if distribution == "Uniform":
+        return rng.uniform(-np.sqrt(3.0), np.sqrt(3.0), size=shape)
+    return rng.standard_normal(size=shape)
+
+
+def _factor(corr: np.ndarray) -> np.ndarray:
+    """Lower-triangular L with L @ L.T == corr; singular (e.g. perfectly correlated) matrices are allowed."""
+    try:
+        return np.linalg.cholesky(corr)
+    except np.linalg.LinAlgError:
+        w, v = np.linalg.eigh(corr)
+        if w.min() < -1e-9:
+            raise ValueError("correlation matrix is not positive semi-definite")
+        # Not triangular, but any square root gives the same joint distribution
+        return v * np.sqrt(np.clip(w, 0.0, None))
+
+
+def shock_factor(spec: MonteCarloSpec, n_props: int) -> np.ndarray:
+    """
+    Factor of the (shock x property) correlation matrix, size 3P x 3P: the
+    Kronecker product of the between-shock and between-property factors.
+    """
+    if spec.property_corr_matrix is not None:
+        props = np.asarray(spec.property_corr_matrix, dtype=float)
+        if props.shape != (n_props, n_props):
+            raise ValueError(f"property correlation matrix must be {n_props} x {n_props}")
+    else:
+        props = np.full((n_props, n_props), float(spec.property_correlation))
+        np.fill_diagonal(props, 1.0)
+    shocks = np.array([
+        [1.0, spec.value_rent_corr, spec.value_vacancy_corr],
+        [spec.value_rent_corr, 1.0, spec.rent_vacancy_corr],
+        [spec.value_vacancy_corr, spec.rent_vacancy_corr, 1.0],
+    ])
+    return np.kron(_factor(shocks), _factor(props))
+
+
+def property_shocks(spec: MonteCarloSpec, n_paths: int, n_props: int, n_years: int,
+                    rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    """Unit-variance correlated shocks {shock: (n_paths, n_props, n_years)} from one draw."""
+    width = len(PROPERTY_SHOCKS) * n_props
+    # Drawn year-major so the engine's per-year slices need no reshuffling
+    z = standard_draws(rng, spec.distribution, (n_years * n_paths, width))
+    factor = shock_factor(spec, n_props)
+    if not np.array_equal(factor, np.eye(width)):
+        z = z @ factor.T
+    z = z.reshape(n_years, n_paths, len(PROPERTY_SHOCKS), n_props)
+    return {key: np.moveaxis(z[:, :, i, :], 0, -1) for i, key in enumerate(PROPERTY_SHOCKS)}
+
+
+def draw_paths(scenario: Scenario, spec: MonteCarloSpec, n_paths: int, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    """Per-year rate paths for `n_paths` paths, in the units batch.run_batch expects."""
+    T = int(scenario.horizon_years) + 1
+    P = len(scenario.properties)
+
+    def z(shape):
+        return standard_draws(rng, spec.distribution, shape)
+
+    sampled = {}
+    if spec.history_file:
+        sampled = bootstrap_returns(load_history(spec.history_file), n_paths, T, int(spec.block_years),
+                                    HISTORY_FREQUENCIES[spec.history_frequency], rng)
+
+    paths = {}
+    if "retirement_return" in sampled:
+        paths["retirement_return"] = 100.0 * sampled["retirement_return"]
+    else:
+        paths["retirement_return"] = scenario.retirement_return + spec.retirement_return_sd * z((n_paths, T))
+    paths["pharmacy_profit_growth_pct"] = scenario.pharmacy_profit_growth_pct + spec.pharmacy_profit_growth_sd * z((n_paths, T))
+    if P:
+        shocks = property_shocks(spec, n_paths, P, T, rng)
+        for key, sd in (("value_growth", spec.value_growth_sd), ("rent_growth", spec.rent_growth_sd)):
+            if key in sampled:
+                # One market history, shared by every property
+                paths[key] = np.broadcast_to(sampled[key][:, None, :], (n_paths, P, T))
+            else:
+                mean = np.array([getattr(p, key) for p in scenario.properties])[None, :, None]
+                paths[key] = mean + (sd / 100.0) * shocks[key]
+        if spec.vacancy_sd > 0:
+            mean = np.array([p.vacancy_pct for p in scenario.properties])[None, :, None]
+            paths["vacancy_pct"] = np.clip(mean + (spec.vacancy_sd / 100.0) * shocks["vacancy_pct"], 0.0, 1.0)
+
+    # A year can't lose more than everything
+    paths["retirement_return"] = np.maximum(paths["retirement_return"], -99.0)
+    paths["pharmacy_profit_growth_pct"] = np.maximum(paths["pharmacy_profit_growth_pct"], -99.0)
+    for key in ("value_growth", "rent_growth"):
+        if key in paths:
+            paths[key] = np.maximum(paths[key], -0.99)
+    return paths
+
+
+def run_monte_carlo(scenario: Scenario, spec: MonteCarloSpec,
+                    paths: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, np.ndarray]:
+    """Simulate every path; each column comes back shaped (n_paths, horizon + 1)."""
+    if paths is None:
+        paths = draw_paths(scenario, spec, int(spec.n_paths), np.random.default_rng(spec.seed))
+    hh, props = stack_scenarios([scenario])
+    return run_batch(hh, props, scenario.years, paths)
+
+
+def percentile_bands(results: Dict[str, np.ndarray], columns: Sequence[str] = FAN_COLUMNS,
+                     percentiles: Sequence[float] = FAN_PERCENTILES) -> Dict[str, np.ndarray]:
+    """Per-year percentiles across paths: {column: array shaped (len(percentiles), horizon + 1)}."""
+    return {col: np.percentile(results[col], percentiles, axis=0) for col in columns}
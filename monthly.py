@@ -0,0 +1,329 @@
+"""
+Monthly-resolution simulation.
+
+simulate() steps a year at a time. This runs the same scenario month by
+month instead:
+
+- Salaries, taxes, expenses, contributions and pharmacy profit are the
+  annual figures spread evenly over the year's 12 months.
+- Rentals, the new home and student loans pay monthly from their
+  amortization schedules. Payments stop in the month a loan is paid off.
+- Rent is collected and HELOC interest accrues month by month.
+- Retirement balances compound monthly at the equivalent monthly return.
+- The seller note amortizes monthly. Extra principal lands in the month it
+  is paid.
+- Asset values (homes, pharmacy equity) are revalued once a year, as in
+  the annual engine.
+
+Purchases, HELOC draws, the pharmacy buy-in and lump-sum extra principal
+fall in the first month of their year. Sales close in the last month, and
+the sold asset leaves the balances as its proceeds reach cash.
+
+Nothing loops over months. Schedules are gathers from the amortization
+cache. Cash, retirement and the seller note are linear recurrences, each
+solved in one cumulative-sum scan.
+
+rollup_annual() turns the monthly frame into simulate()'s columns: flows
+are summed over the year, balances are taken at year end. Like
+simulate(), values are left unrounded.
+"""
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from amortization import ScheduleTable, schedule
+from batch import BATCH_COLUMNS
+from engine import PropertyArrays, Scenario, cash_flow_status, household_series
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+MONTHS = 12
+RESOLUTIONS = ["Annual", "Monthly"]
+
+# Columns that are a level at a point in time; every other column is a flow
+BALANCE_COLUMNS = [
+    "Retirement Balance (Total)", "Student Loan Remaining", "Pharmacy Note Balance", "Pharmacy Equity Value",
+    "Investable Cash", "Total Property Value (active)", "Total Equity (active rentals)", "HELOC Outstanding",
+    "New Home Value", "New Home Mortgage Balance", "New Home Equity", "Net Worth", "Active Properties",
+]
+FLOW_COLUMNS = [c for c in BATCH_COLUMNS if c not in BALANCE_COLUMNS]
+
+
+def linear_scan(x0: float, a: float, u: np.ndarray) -> np.ndarray:
+    """x[k] = a * x[k-1] + u[k] for every k at once (x[-1] = x0), as one cumulative sum."""
+    u = np.asarray(u, dtype=float)
+    if a == 0:
+        return u.copy()
+    k = np.arange(1, len(u) + 1)
+    return a ** k * (x0 + np.cumsum(u * a ** -k))
+
+
+def portfolio_monthly(pa: PropertyArrays, months: np.ndarray, heloc_rate_pct: float) -> dict:
+    """portfolio_series() at monthly resolution: per-month totals, shaped (months,)."""
+    M = len(months)
+    if not len(pa):
+        zeros = np.zeros(M)
+        return {k: zeros for k in (
+            "rental_cf", "equity", "heloc", "value", "cash_delta", "heloc_drawn", "active", "acquired", "liquidated",
+        )}
+
+    col = pa.col
+    m = months[None, :]
+    year = m // MONTHS
+    first, last = (m % MONTHS) == 0, (m % MONTHS) == MONTHS - 1
+    buy = col("purchase_year")
+    sell = col("liquidation_year")
+    draw_year = col("heloc_draw_year")
+
+    sold_later = (sell > 0) & (sell >= buy)
+    owned = (year >= buy) & ~(sold_later & (year > sell))
+    selling = owned & (sell > 0) & (year == sell) & last
+    held = owned & ~selling
+    acquiring = owned & ~pa.is_existing[:, None] & (year == buy) & first
+    drawing = owned & pa.heloc_enabled[:, None] & (draw_year > 0) & (year == draw_year) & first
+
+    home_value = col("value_year0") * ((1 + col("value_growth")) ** np.maximum(0, year - buy))
+    loans = ScheduleTable(pa.loan_principal[:, None], col("mortgage_rate"), col("term_years").astype(int))
+    paid = np.maximum(0, m - MONTHS * buy.astype(int) + 1)  # payments made by the end of month m
+    mort_bal = loans.balance_after(paid)
+    debt_service = np.where(paid <= loans.periods(), loans.payment(), 0.0)
+
+    rent_years = year - col("rent_start_year").astype(int)
+    gross_rent = np.where(rent_years >= 0, col("gross_rent_month") * ((1 + col("rent_growth")) ** np.maximum(rent_years, 0)), 0.0)
+    rent_share_costs = col("pm_pct") + col("maintenance_pct") + col("vacancy_pct") + col("capex_pct")
+
+    allowed = np.maximum(0.0, col("heloc_cltv") * home_value - mort_bal)
+    draw = np.where(drawing, np.maximum(0.0, np.minimum(col("heloc_draw_amount"), allowed)), 0.0)
+    heloc = np.cumsum(draw, axis=1)
+
+    net_rent = gross_rent * (1.0 - rent_share_costs) - col("tax_ins_month") - debt_service \
+        - heloc * (heloc_rate_pct / 100.0 / MONTHS)
+    equity = home_value - mort_bal - heloc
+    down = col("purchase_price") * (col("down_pct") / 100.0)
+
+    def total(x, mask):
+        return np.where(mask, x, 0.0).sum(axis=0)
+
+    return {
+        "rental_cf": total(net_rent, owned),
+        "equity": total(equity, held),
+        "heloc": total(heloc, held),
+        "value": total(home_value, held),
+        "cash_delta": total(np.maximum(0.0, equity), selling) + draw.sum(axis=0) - total(down, acquiring),
+        "heloc_drawn": draw.sum(axis=0),
+        "active": held.sum(axis=0),
+        "acquired": acquiring.sum(axis=0),
+        "liquidated": selling.sum(axis=0),
+    }
+
+
+def _monthly_columns(s: Scenario) -> dict:
+    """Every simulate() column, month by month and unrounded."""
+    T = len(s.years)
+    months = np.arange(T * MONTHS)
+    year = months // MONTHS
+    first, last = (months % MONTHS) == 0, (months % MONTHS) == MONTHS - 1
+    zeros = np.zeros(len(months))
+    hh = household_series(s)
+
+    def spread(x):
+        """An annual flow, split evenly over its months."""
+        return np.repeat(np.asarray(x, dtype=float), MONTHS) / MONTHS
+
+    def level(x):
+        """An annual value, held for all of its months."""
+        return np.repeat(np.asarray(x, dtype=float), MONTHS)
+
+    # Student loans
+    sl_balance0 = float(s.student_loan_balance0)
+    sl_start = int(s.student_loan_start_year)
+    sl = schedule(sl_balance0, s.student_loan_interest_rate / 100.0, int(s.student_loan_years))
+    sl_paid = np.maximum(0, months - MONTHS * sl_start + 1)
+    sl_remaining = np.where(sl_paid >= sl.n, 0.0, sl.balance_after(sl_paid))
+    sl_remaining = np.where(year < sl_start, sl_balance0, sl_remaining)
+    sl_pay = np.where((year >= sl_start) & (sl_paid <= sl.n), sl.payment, 0.0)
+
+    # New home
+    nh_piti, nh_value, nh_bal, nh_equity, nh_proceeds = zeros, zeros, zeros, zeros, zeros
+    loan = s.new_home_loan_amount_eff
+    start = int(s.new_home_start_year)
+    if s.new_home_enabled and loan > 0:
+        nh = schedule(loan, float(s.new_home_rate_pct) / 100.0, int(s.new_home_term_years))
+        nh_paid = np.maximum(0, months - MONTHS * start + 1)
+        paying = year >= start
+        if s.include_new_home_equity_in_networth and s.compute_loan_from_price and s.new_home_purchase_price > 0:
+            value = float(s.new_home_purchase_price) * ((1 + float(s.new_home_value_growth_pct) / 100.0) ** np.maximum(0, year - start))
+            bal = nh.balance_after(nh_paid)
+            selling = np.zeros(len(months), dtype=bool)
+            sell_year = int(s.new_home_sell_year)
+            if sell_year > 0 and sell_year >= start:
+                selling = paying & (year == sell_year) & last
+                sell_cost = (float(s.new_home_selling_cost_pct) / 100.0) * value
+                nh_proceeds = np.where(selling, np.maximum(0.0, value - sell_cost - bal), 0.0)
+                paying = paying & (year <= sell_year)
+            held = paying & ~selling
+            nh_value = np.where(held, value, 0.0)
+            nh_bal = np.where(held, bal, 0.0)
+            nh_equity = np.where(held, np.maximum(0.0, value - bal), 0.0)
+        escrow = (float(s.new_home_property_tax_annual) + float(s.new_home_insurance_annual)) / MONTHS
+        other = float(s.new_home_pmi_monthly) + float(s.new_home_hoa_monthly)
+        nh_piti = np.where(paying, escrow + other + np.where(nh_paid <= nh.n, nh.payment, 0.0), 0.0)
+
+    # Retirement: contributions land, then the month's return
+    growth = (1.0 + float(s.retirement_return) / 100.0) ** (1.0 / MONTHS)
+    cody_in = spread(hh["cody_emp_contrib"] + hh["cody_match"] + hh["cody_ira"])
+    lauren_in = spread(hh["lauren_emp_contrib"] + hh["lauren_match"] + hh["lauren_ira"])
+    retirement = (
+        linear_scan(float(s.cody_ret_balance0), growth, growth * cody_in)
+        + linear_scan(float(s.lauren_ret_balance0), growth, growth * lauren_in)
+    )
+    ret_outflow = zeros
+    if s.count_retirement_contrib_as_expense:
+        ret_outflow = spread(hh["cody_emp_contrib"] + hh["lauren_emp_contrib"] + hh["cody_ira"] + hh["lauren_ira"])
+
+    # Pharmacy buy-in and seller note
+    ph_active = np.zeros(len(months), dtype=bool)
+    ph_down = zeros
+    note_payment, note_interest, note_principal, note_extra, note_balance = zeros, zeros, zeros, zeros, zeros
+    if s.pharmacy_buyin_enabled and int(s.pharmacy_buyin_year) <= s.horizon_years:
+        m0 = MONTHS * int(s.pharmacy_buyin_year)
+        ph_active = months >= m0
+        ph_down = np.where(months == m0, float(s.pharmacy_cash_down), 0.0)
+        b0 = max(0.0, float(s.pharmacy_buyin_price) - float(s.pharmacy_cash_down))
+        note_balance = np.where(ph_active, b0, 0.0)
+        if s.seller_note_years > 0 and b0 > 0:
+            r = float(s.seller_note_rate_pct) / 100.0
+            pmt = schedule(b0, r, int(s.seller_note_years)).payment
+            r /= MONTHS
+            extra = zeros
+            if s.enable_accel_paydown:
+                if int(s.accel_year) > 0:
+                    extra = extra + np.where(months == MONTHS * int(s.accel_year), float(s.lauren_dist_lump), 0.0)
+                if float(s.extra_principal_recurring) > 0:
+                    extra = extra + np.where(year >= int(s.recurring_extra_start_year), float(s.extra_principal_recurring) / MONTHS, 0.0)
+            tail = extra[m0:]
+            raw = linear_scan(b0, 1.0 + r, -(pmt + tail))
+            bal = np.where(np.maximum.accumulate(raw <= 0), 0.0, raw)
+            prev = np.concatenate(([b0], bal[:-1]))
+            amortizing = prev > 0
+            interest = np.where(amortizing, prev * r, 0.0)
+            principal = np.where(amortizing, np.minimum(prev, np.maximum(0.0, pmt - prev * r) + tail), 0.0)
+            note_interest = np.concatenate((zeros[:m0], interest))
+            note_principal = np.concatenate((zeros[:m0], principal))
+            note_payment = note_interest + note_principal
+            note_extra = np.concatenate((zeros[:m0], np.where(amortizing, tail, 0.0)))
+            note_balance = np.concatenate((zeros[:m0], bal))
+    ph_equity_value = np.where(ph_active, level(hh["ph_equity_value"]), 0.0)
+
+    pf = portfolio_monthly(PropertyArrays(s.properties), months, s.heloc_rate)
+
+    income = spread(hh["income"])
+    expenses = spread(hh["expenses"])
+    mort_savings = spread(hh["mort_savings"])
+    ph_profit = spread(hh["ph_profit"])
+    net_cash_flow = (
+        income - expenses - nh_piti - sl_pay + pf["rental_cf"] + mort_savings + ph_profit - note_payment - ret_outflow
+    )
+
+    cash_in = nh_proceeds + pf["cash_delta"] - ph_down
+    if s.reinvest_surplus:
+        cash_in = cash_in + net_cash_flow
+    cash = float(s.starting_cash) + np.cumsum(cash_in)
+
+    net_worth = cash + pf["equity"] - sl_remaining
+    if s.include_retirement_in_networth:
+        net_worth = net_worth + retirement
+    if s.pharmacy_buyin_enabled and s.include_pharmacy_equity_in_networth:
+        net_worth = net_worth + np.where(ph_active, ph_equity_value - note_balance, 0.0)
+    if s.include_new_home_equity_in_networth:
+        net_worth = net_worth + nh_equity
+
+    def tax(key):
+        return spread(hh[key]) if s.show_tax_line_item else zeros
+
+    return {
+        "Year": year,
+        "Month": months % MONTHS + 1,
+
+        "Cody Gross": spread(hh["cody_gross"]),
+        "Lauren Gross": spread(hh["lauren_gross"]),
+        "Other Gross": spread(hh["other_gross"]),
+        "Cody Net": spread(hh["cody_net"]),
+        "Lauren Net": spread(hh["lauren_net"]),
+        "Other Net": spread(hh["other_net"]),
+        "Income (Net Total)": income,
+
+        "Estimated Taxes (Total)": tax("est_total_tax"),
+        "Estimated Federal Tax": tax("est_federal_tax"),
+        "Estimated State Tax": tax("est_state_tax"),
+        "Estimated FICA": tax("est_fica_tax"),
+
+        "Expenses (non-property)": expenses,
+        "New Home PITI+HOA (annual)": nh_piti,
+
+        "Retirement Employee Contrib": spread(hh["cody_emp_contrib"] + hh["lauren_emp_contrib"]),
+        "Retirement Employer Match": spread(hh["cody_match"] + hh["lauren_match"]),
+        "IRA Contributions": spread(hh["cody_ira"] + hh["lauren_ira"]),
+        "Retirement Balance (Total)": retirement,
+
+        "Student Loan Pay": sl_pay,
+        "Student Loan Remaining": sl_remaining,
+
+        "Rental Cash Flow": pf["rental_cf"],
+        "Mortgage Savings": mort_savings,
+
+        "Pharmacy Profit": ph_profit,
+        "Pharmacy Note Payment": note_payment,
+        "Pharmacy Note Interest": note_interest,
+        "Pharmacy Note Principal": note_principal,
+        "Pharmacy Extra Principal": note_extra,
+        "Pharmacy Note Balance": note_balance,
+        "Pharmacy Equity Value": ph_equity_value,
+
+        "Net Cash Flow": net_cash_flow,
+
+        "Investable Cash": cash,
+        "Total Property Value (active)": pf["value"],
+        "Total Equity (active rentals)": pf["equity"],
+        "HELOC Outstanding": pf["heloc"],
+
+        "New Home Value": nh_value,
+        "New Home Mortgage Balance": nh_bal,
+        "New Home Equity": nh_equity,
+        "New Home Liquidation Proceeds": nh_proceeds,
+
+        "Net Worth": net_worth,
+
+        "Active Properties": pf["active"],
+        "Acquired This Year": pf["acquired"],
+        "Liquidated This Year": pf["liquidated"],
+        "HELOC Drawn This Year": pf["heloc_drawn"],
+    }
+
+
+def rollup_annual(monthly: "pd.DataFrame") -> "pd.DataFrame":
+    """simulate()'s annual frame from a monthly one: flows summed, balances at year end."""
+    import pandas as pd
+
+    grouped = monthly.groupby("Year", sort=True)
+    df = pd.concat([grouped[FLOW_COLUMNS].sum(), grouped[BALANCE_COLUMNS].last()], axis=1).reset_index()
+    df = df[["Year"] + BATCH_COLUMNS]
+    for c in ("Active Properties", "Acquired This Year", "Liquidated This Year"):
+        df[c] = df[c].astype(int)
+    df["Status"] = [cash_flow_status(v) for v in df["Net Cash Flow"]]
+    return df
+
+
+def simulate_monthly(s: Scenario, rollup: bool = True) -> "pd.DataFrame":
+    """
+    Run the scenario month by month. With rollup, returns simulate()'s annual
+    columns; otherwise one row per month with the same column names (flows
+    are that month's amount) plus "Month" (1-12).
+    """
+    import pandas as pd
+
+    monthly = pd.DataFrame(_monthly_columns(s))
+    if rollup:
+        return rollup_annual(monthly)
+    return monthly
@@ -0,0 +1,126 @@
+"""
+Schedule optimizer: when to buy, sell and draw a HELOC on each property.
+
+Every property's (purchase_year, liquidation_year, heloc_draw_year) is an
+integer decision, so 10 properties give far too many schedules to try them
+all. The search is a beam search with pruning:
+
+- Decisions are revisited one at a time (property by property, field by
+  field). Every schedule in the beam tries every valid year for that
+  decision, and all those candidates run as one batched evaluation.
+- Candidates that break the cash floor (Investable Cash below
+  min_cash_reserve in any year) rank below every feasible one, so they are
+  pruned as soon as feasible alternatives exist.
+- Only the best `beam_width` distinct schedules survive each step, and
+  passes repeat until the best final Net Worth stops improving.
+
+HELOC draws stay capped by each property's heloc_cltv inside the engine.
+Sales in the final year are not offered: the engine counts a property's
+equity and its sale proceeds together in the year it sells, which would
+inflate the final Net Worth being maximized.
+"""
+from dataclasses import dataclass, replace
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from batch import run_batch
+from engine import Scenario
+from sensitivity import Knob, stack_knobs
+
+SCHEDULE_FIELDS = ("purchase_year", "liquidation_year", "heloc_draw_year")
+
+
+@dataclass(frozen=True)
+class OptimizerResult:
+    """Best schedules first, plus how much work the search took."""
+    schedules: pd.DataFrame
+    best: Scenario
+    evaluations: int
+    base_net_worth: float
+
+
+def _schedule_of(s: Scenario) -> np.ndarray:
+    return np.array([[getattr(p, f) for f in SCHEDULE_FIELDS] for p in s.properties], dtype=int).reshape(-1, 3)
+
+
+def apply_schedule(s: Scenario, schedule: np.ndarray) -> Scenario:
+    props = tuple(
+        replace(p, **{f: int(v) for f, v in zip(SCHEDULE_FIELDS, row)})
+        for p, row in zip(s.properties, schedule)
+    )
+    return replace(s, properties=props)
+
+
+def _candidates(s: Scenario, schedule: np.ndarray, j: int, f: int) -> List[int]:
+    """Valid years for decision f of property j, given the rest of its schedule."""
+    p = s.properties[j]
+    horizon = int(s.horizon_years)
+    buy, sell, draw = (int(v) for v in schedule[j])
+    if f == 0:
+        if p.is_existing:
+            return [buy]
+        last = horizon if sell == 0 else sell - 1
+        return list(range(0, last + 1))
+    if f == 1:
+        return [0] + list(range(buy + 1, horizon))
+    if not p.heloc_enabled:
+        return [draw]
+    return [0] + list(range(max(buy, 1), horizon + 1))
+
+
+def _evaluate(s: Scenario, knobs: list, schedules: np.ndarray):
+    """Final Net Worth and the worst-year cash headroom over the reserve, per schedule."""
+    settings = [(knobs[j][f], schedules[:, j, f]) for j in range(schedules.shape[1]) for f in range(3)]
+    hh, props = stack_knobs(s, settings)
+    results = run_batch(hh, props, s.years, columns=["Investable Cash", "Net Worth"])
+    headroom = (results["Investable Cash"] - hh["min_cash_reserve"][:, None]).min(axis=1)
+    return np.asarray(results["Net Worth"][:, -1]), headroom
+
+
+def _rank(net_worth: np.ndarray, headroom: np.ndarray) -> np.ndarray:
+    """Feasible schedules by Net Worth, then infeasible ones by how close they come."""
+    feasible = headroom >= 0
+    return np.lexsort((-net_worth, -np.where(feasible, 0.0, headroom), ~feasible))
+
+
+def optimize_schedule(s: Scenario, beam_width: int = 8, max_passes: int = 3, top: int = 5) -> OptimizerResult:
+    """Search purchase / liquidation / HELOC draw years to maximize final Net Worth under the cash floor."""
+    if not s.properties:
+        raise ValueError("no properties to schedule")
+    P = len(s.properties)
+    knobs = [[Knob(f"{p.name} #{j + 1}: {f}", f, j) for f in SCHEDULE_FIELDS] for j, p in enumerate(s.properties)]
+
+    beam = _schedule_of(s)[None]
+    net_worth, headroom = _evaluate(s, knobs, beam)
+    base_net_worth = float(net_worth[0])
+    evaluations = 1
+    best_seen = -np.inf
+
+    for _ in range(max_passes):
+        for j in range(P):
+            for f in range(3):
+                expanded = []
+                for schedule in beam:
+                    for v in _candidates(s, schedule, j, f):
+                        candidate = schedule.copy()
+                        candidate[j, f] = v
+                        expanded.append(candidate)
+                expanded = np.unique(np.stack(expanded), axis=0)
+                net_worth, headroom = _evaluate(s, knobs, expanded)
+                evaluations += len(expanded)
+                keep = _rank(net_worth, headroom)[:beam_width]
+                beam, net_worth, headroom = expanded[keep], net_worth[keep], headroom[keep]
+        best = float(net_worth[0]) if headroom[0] >= 0 else -np.inf
+        if best <= best_seen:
+            break
+        best_seen = best
+
+    rows = []
+    for rank, (schedule, nw, room) in enumerate(zip(beam[:top], net_worth[:top], headroom[:top]), start=1):
+        row = {"Rank": rank, "Final Net Worth": nw, "Min Cash Headroom": room, "Meets Cash Floor": bool(room >= 0)}
+        for j, (p, (buy, sell, draw)) in enumerate(zip(s.properties, schedule), start=1):
+            row[f"{j}: {p.name}"] = f"buy {buy} · sell {sell or 'never'} · HELOC {draw or 'none'}"
+        rows.append(row)
+    return OptimizerResult(pd.DataFrame(rows), apply_schedule(s, beam[0]), evaluations, base_net_worth)
@@ -0,0 +1,229 @@
+"""
+Property tables: the portfolio as rows for the data editor, CSV and Excel.
+
+One row per property, one column per PropertyInputs field, plus `enabled`.
+Values use the same units as the property expanders, so rates and
+percentages are in percent (7.0 = 7%); years and terms are whole numbers.
+`mortgage_balance_year0` is only read for existing properties. As in the
+expanders, a purchased property is valued at its purchase price, so its
+`value_year0` is ignored.
+
+Files are parsed and validated in chunks of CHUNK_ROWS rows, so a large
+portfolio never has to be materialized as one big frame of raw strings.
+Excel support needs openpyxl, which is imported only when used.
+"""
+import importlib.util
+import io
+from dataclasses import fields
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from engine import PropertyInputs
+
+CHUNK_ROWS = 5000
+MAX_REPORTED_ERRORS = 20
+
+PROPERTY_COLUMNS = ["enabled"] + [f.name for f in fields(PropertyInputs)]
+BOOL_COLUMNS = ["enabled", "is_existing", "heloc_enabled"]
+INT_COLUMNS = ["purchase_year", "liquidation_year", "term_years", "rent_start_year", "heloc_draw_year"]
+# Stored as fractions in PropertyInputs, shown in percent here (as in the expanders)
+PERCENT_COLUMNS = [
+    "mortgage_rate", "maintenance_pct", "vacancy_pct", "capex_pct", "pm_pct",
+    "value_growth", "rent_growth", "heloc_cltv",
+]
+FLOAT_COLUMNS = [
+    c for c in PROPERTY_COLUMNS if c not in BOOL_COLUMNS + INT_COLUMNS + ["name"]
+]
+
+# Allowed (low, high) per column, in table units
+RANGES = {
+    "purchase_year": (0, 200), "liquidation_year": (0, 200), "rent_start_year": (0, 200), "heloc_draw_year": (0, 200),
+    "term_years": (1, 100),
+    "value_year0": (0, None), "purchase_price": (0, None), "mortgage_balance_year0": (0, None),
+    "gross_rent_month": (0, None), "tax_ins_month": (0, None), "heloc_draw_amount": (0, None),
+    "down_pct": (0, 100), "mortgage_rate": (0, 100), "heloc_cltv": (0, 100),
+    "maintenance_pct": (0, 100), "vacancy_pct": (0, 100), "capex_pct": (0, 100), "pm_pct": (0, 100),
+    "value_growth": (-100, 100), "rent_growth": (-100, 100),
+}
+
+_TRUE = {"true", "1", "yes", "y", "t"}
+_FALSE = {"false", "0", "no", "n", "f"}
+
+
+class PropertyTableError(ValueError):
+    """A property table failed validation; `errors` lists the problems by row."""
+
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        shown = errors[:MAX_REPORTED_ERRORS]
+        more = f"\n… and {len(errors) - len(shown)} more" if len(errors) > len(shown) else ""
+        super().__init__("\n".join(shown) + more)
+
+
+def properties_to_frame(properties: Sequence[PropertyInputs], enabled: Optional[Sequence[bool]] = None) -> pd.DataFrame:
+    """The table for these properties (all enabled unless told otherwise)."""
+    df = pd.DataFrame([{f.name: getattr(p, f.name) for f in fields(PropertyInputs)} for p in properties],
+                      columns=PROPERTY_COLUMNS[1:])
+    df.insert(0, "enabled", list(enabled) if enabled is not None else [True] * len(df))
+    df[PERCENT_COLUMNS] = df[PERCENT_COLUMNS].astype(float) * 100.0
+    df["mortgage_balance_year0"] = df["mortgage_balance_year0"].astype(float)
+    return df
+
+
+def _parse_bools(col: pd.Series, default: bool, name: str, row0: int, errors: List[str]) -> pd.Series:
+    """true/false, yes/no or 1/0; blanks (e.g. a new editor row) take the default."""
+    if pd.api.types.is_bool_dtype(col):
+        return col
+    text = col.astype(object).where(col.notna(), "").astype(str).str.strip().str.lower()
+    bad = ~text.isin(_TRUE | _FALSE | {""})
+    for i in np.flatnonzero(bad.to_numpy()):
+        errors.append(f"row {row0 + i}: {name} must be true/false (got {col.iloc[i]!r})")
+    return text.isin(_TRUE) | ((text == "") & default)
+
+
+def _validate_chunk(df: pd.DataFrame, row0: int, errors: List[str]) -> pd.DataFrame:
+    """Coerce and range-check one chunk; problems are appended to `errors`. row0 = file row of df's first row."""
+    df = df.reset_index(drop=True)
+    defaults = properties_to_frame([PropertyInputs()]).iloc[0]
+    unknown = [c for c in df.columns if c not in PROPERTY_COLUMNS]
+    if unknown and row0 <= 2:
+        errors.append(f"unknown column(s): {', '.join(map(str, unknown))}")
+    out = pd.DataFrame(index=df.index)
+
+    for name in PROPERTY_COLUMNS:
+        if name not in df.columns:
+            out[name] = defaults[name]
+            continue
+        col = df[name]
+        if name == "name":
+            text = col.astype(object).where(col.notna(), "").astype(str).str.strip()
+            out[name] = text.where(text != "", defaults[name])
+        elif name in BOOL_COLUMNS:
+            out[name] = _parse_bools(col, bool(defaults[name]), name, row0, errors)
+        else:
+            num = pd.to_numeric(col, errors="coerce")
+            given = col.notna() & (col.astype(str).str.strip() != "")
+            for i in np.flatnonzero((given & num.isna()).to_numpy()):
+                errors.append(f"row {row0 + i}: {name} is not a number (got {col.iloc[i]!r})")
+            if name != "mortgage_balance_year0":
+                num = num.fillna(defaults[name])
+            if name in INT_COLUMNS:
+                for i in np.flatnonzero((num != np.round(num)).to_numpy()):
+                    errors.append(f"row {row0 + i}: {name} must be a whole number (got {num.iloc[i]})")
+            lo, hi = RANGES.get(name, (None, None))
+            outside = ((num < lo) if lo is not None else False) | ((num > hi) if hi is not None else False)
+            for i in np.flatnonzero(np.asarray(outside & num.notna())):
+                errors.append(f"row {row0 + i}: {name} = {num.iloc[i]} is outside [{lo}, {'∞' if hi is None else hi}]")
+            out[name] = num
+
+    missing_balance = out["enabled"] & out["is_existing"] & out["mortgage_balance_year0"].isna()
+    for i in np.flatnonzero(missing_balance.to_numpy()):
+        errors.append(f"row {row0 + i}: existing properties need mortgage_balance_year0")
+    return out
+
+
+def validate_property_table(df: pd.DataFrame, row0: int = 1) -> pd.DataFrame:
+    """
+    A coerced copy of a table (all rows, enabled or not). Missing columns and
+    blank cells take the PropertyInputs defaults. Raises PropertyTableError
+    listing every bad cell.
+    """
+    errors: List[str] = []
+    clean = _validate_chunk(df, row0, errors)
+    if errors:
+        raise PropertyTableError(errors)
+    return clean
+
+
+def frame_to_properties(df: pd.DataFrame, row0: int = 1) -> List[PropertyInputs]:
+    """Enabled rows of a table as PropertyInputs (see validate_property_table())."""
+    return clean_table_to_properties(validate_property_table(df, row0))
+
+
+def clean_table_to_properties(clean: pd.DataFrame) -> List[PropertyInputs]:
+    """Enabled rows of an already validated table as PropertyInputs."""
+    clean = clean[clean["enabled"]]
+    props = []
+    for row in clean.to_dict("records"):
+        kw = {f.name: row[f.name] for f in fields(PropertyInputs)}
+        for name in INT_COLUMNS:
+            kw[name] = int(kw[name])
+        for name in BOOL_COLUMNS[1:]:
+            kw[name] = bool(kw[name])
+        for name in FLOAT_COLUMNS:
+            if name != "mortgage_balance_year0":
+                kw[name] = float(kw[name])
+        for name in PERCENT_COLUMNS:
+            kw[name] = kw[name] / 100.0
+        if not kw["is_existing"]:
+            kw["value_year0"] = kw["purchase_price"]
+        balance = kw["mortgage_balance_year0"]
+        kw["mortgage_balance_year0"] = float(balance) if kw["is_existing"] and not pd.isna(balance) else None
+        props.append(PropertyInputs(**kw))
+    return props
+
+
+def _xlsx_chunks(data: bytes, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    try:
+        import openpyxl
+    except ImportError as e:
+        raise ImportError("Excel import needs openpyxl (pip install openpyxl)") from e
+    wb = openpyxl.load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    rows = wb.worksheets[0].iter_rows(values_only=True)
+    header = [str(h).strip() if h is not None else "" for h in next(rows, ())]
+    batch = []
+    for row in rows:
+        if all(v is None for v in row):
+            continue
+        batch.append(row)
+        if len(batch) == chunk_rows:
+            yield pd.DataFrame(batch, columns=header)
+            batch = []
+    if batch:
+        yield pd.DataFrame(batch, columns=header)
+    wb.close()
+
+
+def _chunks(data: bytes, filename: str, chunk_rows: int) -> Iterable[pd.DataFrame]:
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        return _xlsx_chunks(data, chunk_rows)
+    return pd.read_csv(io.BytesIO(data), chunksize=chunk_rows, dtype=str, keep_default_na=False, skipinitialspace=True)
+
+
+def read_property_table(data: bytes, filename: str, chunk_rows: int = CHUNK_ROWS) -> pd.DataFrame:
+    """
+    Parse a CSV or XLSX upload chunk by chunk into a clean table (all rows,
+    enabled or not). Raises PropertyTableError with every problem found.
+    """
+    errors: List[str] = []
+    parts = []
+    row0 = 2  # the header is row 1
+    for chunk in _chunks(data, filename, chunk_rows):
+        chunk.columns = [str(c).strip() for c in chunk.columns]
+        parts.append(_validate_chunk(chunk, row0, errors))
+        row0 += len(chunk)
+    if errors:
+        raise PropertyTableError(errors)
+    if not parts:
+        return properties_to_frame([])
+    return pd.concat(parts, ignore_index=True)
+
+
+def excel_available() -> bool:
+    """Whether openpyxl is installed (checked without importing it)."""
+    return importlib.util.find_spec("openpyxl") is not None
+
+
+def write_property_table(df: pd.DataFrame, fmt: str = "csv") -> bytes:
+    """The table as CSV or XLSX bytes, ready for a download button."""
+    if fmt == "xlsx":
+        try:
+            import openpyxl  # noqa: F401  (pandas' Excel writer)
+        except ImportError as e:
+            raise ImportError("Excel export needs openpyxl (pip install openpyxl)") from e
+        buf = io.BytesIO()
+        df.to_excel(buf, index=False, sheet_name="Properties")
+        return buf.getvalue()
+    return df.to_csv(index=False).encode("utf-8")
@@ -0,0 +1,211 @@
+"""
+Report and batch-result exports, built on demand.
+
+The download buttons are given callables, so an export is only built
+when someone clicks it. The bytes are then kept in a small LRU cache
+keyed by the format and a hash of the report table and its text, so a
+second click, or one after a rerun that changed nothing, reuses them.
+
+Monte Carlo paths and sweep grids are exported as Parquet or Arrow IPC,
+one row per (run, year) or grid cell. Columns are handed to Arrow
+straight from the NumPy result arrays, so their buffers are wrapped
+rather than copied or formatted as text. Monte Carlo runs are simulated
+and written one shard at a time (one row group each) into a temporary
+file, so only one shard's results are held while the file is built. The
+finished file is then read back once, because a download is served from
+bytes, so that copy still grows with the path count; exports larger than
+EXPORT_CACHE_BYTES are not cached. pyarrow is imported only when one of
+these exports is requested.
+"""
+import tempfile
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+from batch import BATCH_COLUMNS
+from engine import Scenario
+from executor import SHARD_PATHS, iter_shards
+from hashing import data_hash
+from montecarlo import MonteCarloSpec
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+EXPORT_CACHE_SIZE = 32
+# Total bytes kept; a larger export is built for its download but not kept
+EXPORT_CACHE_BYTES = 256 * 1024 * 1024
+COLUMNAR_FORMATS = {"parquet": ("parquet", "application/vnd.apache.parquet"),
+                    "arrow": ("arrow", "application/vnd.apache.arrow.file")}
+
+_cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+
+
+def cached_export(key: tuple, build: Callable[[], bytes]) -> bytes:
+    """The bytes for `key`, calling build() only on a cache miss."""
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+    data = build()
+    if len(data) > EXPORT_CACHE_BYTES:
+        return data
+    _cache[key] = data
+    while len(_cache) > EXPORT_CACHE_SIZE or sum(len(v) for v in _cache.values()) > EXPORT_CACHE_BYTES:
+        _cache.popitem(last=False)
+    return data
+
+
+# -----------------------------
+# Report documents
+# -----------------------------
+def report_csv(df: "pd.DataFrame") -> bytes:
+    return cached_export(("csv", data_hash(df)), lambda: df.to_csv(index=False).encode("utf-8"))
+
+
+def report_html(df: "pd.DataFrame", title: str, summary_text: str, notes: str) -> bytes:
+    """A standalone printable HTML report."""
+    def build() -> bytes:
+        notes_html = ""
+        if notes.strip():
+            notes_html = "<h2>Notes</h2><div class='summary'>" + notes.replace("\n", "<br>") + "</div>"
+
+        # IMPORTANT: HTML is kept entirely inside a string to avoid SyntaxErrors.
+        html_doc = (
+            "<!doctype html>"
+            "<html><head><meta charset='utf-8' />"
+            f"<title>{title}</title>"
+            "<style>"
+            "body{font-family:Arial,sans-serif;padding:24px;}"
+            "h1,h2,h3{margin:0.4em 0;}"
+            ".summary{white-space:pre-wrap;background:#f7f7f7;padding:12px;border-radius:8px;}"
+            "table{border-collapse:collapse;width:100%;font-size:12px;}"
+            "th,td{border:1px solid #ddd;padding:6px 8px;}"
+            "th{background:#f0f0f0;}"
+            "@media print{body{padding:0;}table{font-size:10px;}}"
+            "</style></head><body>"
+            f"<h1>{title}</h1>"
+            "<h2>Summary</h2>"
+            f"<div class='summary'>{summary_text.replace(chr(10), '<br>')}</div>"
+            f"{notes_html}"
+            "<h2>Results</h2>"
+            f"{df.to_html(index=False)}"
+            "</body></html>"
+        )
+        return html_doc.encode("utf-8")
+
+    return cached_export(("html", data_hash(df, title, summary_text, notes)), build)
+
+
+def report_markdown(df: "pd.DataFrame", title: str, summary_text: str, notes: str) -> bytes:
+    """The report as Markdown (the table falls back to CSV without `tabulate`)."""
+    def build() -> bytes:
+        try:
+            md_table = df.to_markdown(index=False)
+        except Exception:
+            md_table = df.to_csv(index=False)
+
+        md_doc = f"# {title}\n\n## Summary\n\n```\n{summary_text}\n```\n\n"
+        if notes.strip():
+            md_doc += f"## Notes\n\n{notes}\n\n"
+        md_doc += "## Results Table\n\n" + md_table + "\n"
+        return md_doc.encode("utf-8")
+
+    return cached_export(("md", data_hash(df, title, summary_text, notes)), build)
+
+
+# -----------------------------
+# Columnar exports (Parquet / Arrow)
+# -----------------------------
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise ImportError("Parquet/Arrow export needs pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+
+def _columns(arrays: Dict[str, np.ndarray]):
+    """Arrow table over 1-D NumPy columns; contiguous numeric buffers are wrapped, not copied."""
+    pa = _pyarrow()
+    return pa.table({name: pa.array(np.ascontiguousarray(a)) for name, a in arrays.items()})
+
+
+def batch_table(results: Dict[str, np.ndarray], years: np.ndarray, columns: Optional[Sequence[str]] = None,
+                first_run: int = 0):
+    """
+    Long-format Arrow table for batch results shaped (runs, years): one row
+    per (Run, Year) plus one column per result column.
+    """
+    columns = list(columns or [c for c in BATCH_COLUMNS if c in results])
+    n_runs, n_years = results[columns[0]].shape
+    arrays = {
+        "Run": np.repeat(np.arange(first_run, first_run + n_runs, dtype=np.int64), n_years),
+        "Year": np.tile(np.asarray(years, dtype=np.int64), n_runs),
+    }
+    for col in columns:
+        arrays[col] = results[col].reshape(-1)
+    return _columns(arrays)
+
+
+def sweep_table(xs: Sequence, ys: Sequence, grids: Dict[str, np.ndarray], x_label: str, y_label: str):
+    """One row per sweep cell: both inputs and every metric (grids are (len(ys), len(xs)))."""
+    xs, ys = np.asarray(xs, dtype=float), np.asarray(ys, dtype=float)
+    arrays = {x_label: np.tile(xs, len(ys)), y_label: np.repeat(ys, len(xs))}
+    for metric, grid in grids.items():
+        arrays[metric] = np.asarray(grid).reshape(-1)
+    return _columns(arrays)
+
+
+def _writer(sink, schema, fmt: str):
+    pa = _pyarrow()
+    if fmt == "parquet":
+        return pa.parquet.ParquetWriter(sink, schema)
+    if fmt == "arrow":
+        return pa.ipc.new_file(sink, schema)
+    raise ValueError(f"unknown columnar format {fmt!r}; use one of {', '.join(COLUMNAR_FORMATS)}")
+
+
+def write_columnar(tables, fmt: str = "parquet") -> bytes:
+    """
+    Write one Arrow table, or an iterable of same-schema tables (one row
+    group / batch each), through a temporary file; only the table being
+    written and the finished bytes are held in memory.
+    """
+    tables = iter([tables]) if hasattr(tables, "schema") else iter(tables)
+    first = next(tables, None)
+    if first is None:
+        raise ValueError("nothing to export")
+    with tempfile.TemporaryFile() as sink:
+        writer = _writer(sink, first.schema, fmt)
+        try:
+            writer.write_table(first)
+            for table in tables:
+                writer.write_table(table)
+        finally:
+            writer.close()
+        sink.seek(0)
+        return sink.read()
+
+
+def sweep_export(xs: Sequence, ys: Sequence, grids: Dict[str, np.ndarray], x_label: str, y_label: str,
+                 fmt: str = "parquet") -> bytes:
+    key = ("sweep", fmt, data_hash(np.asarray(xs, dtype=float), np.asarray(ys, dtype=float),
+                                   *[np.asarray(g) for g in grids.values()], list(grids), x_label, y_label))
+    return cached_export(key, lambda: write_columnar(sweep_table(xs, ys, grids, x_label, y_label), fmt))
+
+
+def monte_carlo_export(scenario: Scenario, spec: MonteCarloSpec, fmt: str = "parquet",
+                       columns: Optional[Sequence[str]] = None, shard_paths: int = SHARD_PATHS) -> bytes:
+    """
+    Every Monte Carlo path, year by year, streamed shard by shard. The paths
+    are the ones run_sharded() summarizes for the same spec.
+    """
+    def build() -> bytes:
+        return write_columnar(
+            (batch_table(results, scenario.years, columns, first)
+             for first, results in iter_shards(scenario, spec, shard_paths)),
+            fmt,
+        )
+
+    return cached_export(("monte_carlo", fmt, scenario, spec, tuple(columns or ()), shard_paths), build)
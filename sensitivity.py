@@ -0,0 +1,150 @@
+"""
+One-at-a-time sensitivity ("tornado") analysis.
+
+Every numeric input, household and per property, is bumped down and up by
+the same percentage. The base case and all 2 x knobs variants run as one
+batched evaluation.
+"""
+from dataclasses import dataclass, fields, replace
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from batch import derive_inputs, simulate_batch, stack_scenarios
+from engine import TIGHT_CASH_FLOW, Scenario
+
+# Inputs that pick the shape of the run rather than tune it
+FIXED_FIELDS = ("horizon_years",)
+# A purchased property is valued at its price (the expanders set both), so
+# the price knob moves the value with it and the value is not a knob of its own
+PURCHASE_LINKED_FIELDS = {"purchase_price": ("value_year0",)}
+
+
+@dataclass(frozen=True)
+class Knob:
+    """One numeric input: a Scenario field, or a field of one property (plus any fields set along with it)."""
+    label: str
+    field: str
+    property_index: Optional[int] = None
+    linked: Tuple[str, ...] = ()
+
+    def value(self, s: Scenario):
+        target = s if self.property_index is None else s.properties[self.property_index]
+        return getattr(target, self.field)
+
+    def with_value(self, s: Scenario, value) -> Scenario:
+        changes = dict.fromkeys((self.field,) + self.linked, value)
+        if self.property_index is None:
+            return replace(s, **changes)
+        props = list(s.properties)
+        props[self.property_index] = replace(props[self.property_index], **changes)
+        return replace(s, properties=tuple(props))
+
+    def set_stacked(self, hh: dict, props: dict, values) -> None:
+        """Write one value per row into batch.stack_scenarios() output (then call batch.derive_inputs)."""
+        for name in (self.field,) + self.linked:
+            if self.property_index is None:
+                hh[name] = np.asarray(values, dtype=hh[name].dtype)
+            else:
+                column = props[name].copy()
+                column[:, self.property_index] = values
+                props[name] = column
+
+
+def _is_numeric(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def sensitivity_knobs(s: Scenario) -> List[Knob]:
+    """Every numeric input of the scenario, properties included."""
+    knobs = [
+        Knob(f.name, f.name) for f in fields(Scenario)
+        if f.name not in FIXED_FIELDS and _is_numeric(getattr(s, f.name))
+    ]
+    for i, p in enumerate(s.properties):
+        linked = {} if p.is_existing else PURCHASE_LINKED_FIELDS
+        skipped = {name for names in linked.values() for name in names}
+        knobs += [
+            Knob(f"{p.name or f'Property {i + 1}'} #{i + 1}: {f.name}", f.name, i, linked.get(f.name, ()))
+            for f in fields(p) if f.name not in skipped and _is_numeric(getattr(p, f.name))
+        ]
+    return knobs
+
+
+def stack_knobs(s: Scenario, settings: Sequence[Tuple[Knob, Sequence]]):
+    """
+    batch.stack_scenarios() output for copies of `s` with knobs set per row,
+    e.g. [(knob, [v0, v1, ...])]; every value list has one entry per run.
+    The scenario is stacked once and the values written into the arrays, so
+    no Scenario is built per run.
+    """
+    n = len(settings[0][1])
+    hh, props = stack_scenarios([s])
+    hh = {k: np.repeat(v, n, axis=0) for k, v in hh.items()}
+    props = {k: np.repeat(v, n, axis=0) for k, v in props.items()}
+    for knob, values in settings:
+        knob.set_stacked(hh, props, values)
+    derive_inputs(hh, props)
+    return hh, props
+
+
+def bumped(value, pct: float, direction: int):
+    """
+    value moved by pct% in `direction` (+1/-1). Nonzero whole-number inputs
+    (years, terms) move at least one step; zero stays zero, since for inputs
+    like liquidation_year it means "off".
+    """
+    if isinstance(value, int):
+        if value == 0:
+            return 0
+        step = max(1, int(round(abs(value) * pct / 100.0)))
+        return max(min(value, 1), value + direction * step)
+    return value * (1.0 + direction * pct / 100.0)
+
+
+def first_at_risk_year(net_cash_flow: np.ndarray, years: np.ndarray) -> np.ndarray:
+    """First year each row's Net Cash Flow is "🔴 At risk", NaN if it never is."""
+    at_risk = net_cash_flow < TIGHT_CASH_FLOW
+    return np.where(at_risk.any(axis=1), years[at_risk.argmax(axis=1)], np.nan)
+
+
+def run_sensitivity(s: Scenario, pct: float = 10.0) -> pd.DataFrame:
+    """
+    One row per knob, ranked by the larger of its two moves in final Net Worth.
+    At-risk years are NaN when Net Cash Flow never drops below the Tight threshold.
+    """
+    knobs = sensitivity_knobs(s)
+    lows = [bumped(k.value(s), pct, -1) for k in knobs]
+    highs = [bumped(k.value(s), pct, +1) for k in knobs]
+    scenarios = [s]
+    scenarios += [k.with_value(s, v) for k, v in zip(knobs, lows)]
+    scenarios += [k.with_value(s, v) for k, v in zip(knobs, highs)]
+
+    results = simulate_batch(scenarios, columns=["Net Worth", "Net Cash Flow"])
+    final_nw = results["Net Worth"][:, -1]
+    risk_year = first_at_risk_year(results["Net Cash Flow"], s.years)
+    n = len(knobs)
+    low, high = slice(1, 1 + n), slice(1 + n, 1 + 2 * n)
+
+    df = pd.DataFrame({
+        "Input": [k.label for k in knobs],
+        "Base": [k.value(s) for k in knobs],
+        "Low": lows,
+        "High": highs,
+        "Net Worth (low)": final_nw[low],
+        "Net Worth (high)": final_nw[high],
+        "Δ Net Worth (low)": final_nw[low] - final_nw[0],
+        "Δ Net Worth (high)": final_nw[high] - final_nw[0],
+        "First At-Risk Year (low)": risk_year[low],
+        "First At-Risk Year (high)": risk_year[high],
+    })
+    df["Swing"] = np.maximum(df["Δ Net Worth (low)"].abs(), df["Δ Net Worth (high)"].abs())
+    # "Never at risk" counts as the year after the horizon, so it still ranks
+    never = s.years[-1] + 1
+    risk = np.nan_to_num(risk_year, nan=never)
+    df["At-Risk Shift (yrs)"] = np.maximum(np.abs(risk[low] - risk[0]), np.abs(risk[high] - risk[0]))
+    df = df.sort_values(["Swing", "At-Risk Shift (yrs)"], ascending=False, kind="stable").reset_index(drop=True)
+    df.attrs["base_net_worth"] = float(final_nw[0])
+    df.attrs["base_first_at_risk_year"] = float(risk_year[0])
+    return df
@@ -0,0 +1,169 @@
+"""
+Streaming reductions for Monte Carlo output.
+
+Paths are folded in chunk by chunk, so memory depends on the number of years
+and columns, not on the number of paths.
+
+Quantiles use a per-year merge-reduce sketch: level l keeps at most `k`
+sorted values per year, each standing for 2**l paths. When a level
+overflows, every other value moves up a level (alternating which half is
+kept). Each such compaction at level l moves any value's rank by at most
+2**l paths, so the rank error of a quantile is bounded by
+
+    sum over compactions of 2**level / n_paths  <=  (number of levels) / k
+
+which `QuantileSketch.rank_error_bound()` reports exactly. With the default
+k = 2048, a million paths (about 9 levels) stays within 0.5% of rank, and
+runs of up to k paths are exact.
+"""
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from engine import TIGHT_CASH_FLOW
+from montecarlo import FAN_COLUMNS, FAN_PERCENTILES
+
+SKETCH_K = 2048
+
+
+class QuantileSketch:
+    """Per-year quantile sketch over values shaped (paths, years)."""
+
+    def __init__(self, n_years: int, k: int = SKETCH_K):
+        self.n_years = int(n_years)
+        self.k = int(k)
+        self.count = 0
+        self.levels: List[Optional[np.ndarray]] = []
+        self._flips: List[int] = []
+        self._compactions: List[int] = []
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=float).reshape(-1, self.n_years)
+        if values.shape[0]:
+            self.count += values.shape[0]
+            self._push(0, np.sort(values, axis=0))
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Fold another sketch in; merging in a fixed order keeps results reproducible."""
+        if other.n_years != self.n_years:
+            raise ValueError("sketches cover different horizons")
+        self.count += other.count
+        for level, buf in enumerate(other.levels):
+            if buf is not None:
+                self._push(level, buf)
+        # Compactions already made inside `other` count toward the error too
+        for level, n in enumerate(other._compactions):
+            self._grow(level)
+            self._compactions[level] += n
+
+    def _grow(self, level: int) -> None:
+        while len(self.levels) <= level:
+            self.levels.append(None)
+            self._flips.append(0)
+            self._compactions.append(0)
+
+    def _push(self, level: int, values: np.ndarray) -> None:
+        """Add sorted values at `level`, compacting upward while a level overflows."""
+        while True:
+            self._grow(level)
+            held = self.levels[level]
+            buf = values if held is None else np.sort(np.concatenate([held, values]), axis=0)
+            if buf.shape[0] <= self.k:
+                self.levels[level] = buf
+                return
+            even = buf.shape[0] & ~1
+            offset = self._flips[level]
+            self._flips[level] ^= 1
+            self._compactions[level] += 1
+            self.levels[level] = buf[even:] if even < buf.shape[0] else None
+            values = buf[offset:even:2]
+            level += 1
+
+    def rank_error_bound(self) -> float:
+        """Worst-case quantile rank error, as a fraction of the path count."""
+        if not self.count:
+            return 0.0
+        return sum(n * 2.0 ** level for level, n in enumerate(self._compactions)) / self.count
+
+    def percentiles(self, percentiles: Sequence[float]) -> np.ndarray:
+        """(len(percentiles), years); matches np.percentile's linear rule while the sketch is exact."""
+        if not self.count:
+            raise ValueError("empty sketch")
+        held = [(level, buf) for level, buf in enumerate(self.levels) if buf is not None]
+        values = np.concatenate([buf for _, buf in held])
+        weights = np.concatenate([np.full(buf.shape[0], 2.0 ** level) for level, buf in held])
+        order = np.argsort(values, axis=0, kind="stable")
+        values = np.take_along_axis(values, order, axis=0)
+        weights = weights[order]
+        # Rank of each value's midpoint; with unit weights this is 0..n-1
+        ranks = np.cumsum(weights, axis=0) - weights / 2 - 0.5
+        target = np.asarray(percentiles, dtype=float) / 100.0 * (self.count - 1)
+        return np.stack([np.interp(target, ranks[:, t], values[:, t]) for t in range(self.n_years)], axis=1)
+
+
+class RunningMoments:
+    """Count, mean and spread, merged chunk by chunk (Chan et al.)."""
+
+    def __init__(self, n_years: int):
+        self.count = 0
+        self.mean = np.zeros(n_years)
+        self.m2 = np.zeros(n_years)
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=float)
+        if values.shape[0]:
+            mean = values.mean(axis=0)
+            self._combine(values.shape[0], mean, ((values - mean) ** 2).sum(axis=0))
+
+    def merge(self, other: "RunningMoments") -> None:
+        if other.count:
+            self._combine(other.count, other.mean, other.m2)
+
+    def _combine(self, n: int, mean: np.ndarray, m2: np.ndarray) -> None:
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (n / total)
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.count * n / total)
+        self.count = total
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.m2 / self.count) if self.count else np.zeros_like(self.m2)
+
+
+class StreamingSummary:
+    """
+    Everything kept from a Monte Carlo run: moments for every output column,
+    quantile sketches for `columns`, and per-year "🔴 At risk" counts.
+    """
+
+    def __init__(self, n_years: int, columns: Sequence[str] = FAN_COLUMNS, k: int = SKETCH_K):
+        self.n_years = int(n_years)
+        self.n_paths = 0
+        self.sketches = {col: QuantileSketch(n_years, k) for col in columns}
+        self.moments: Dict[str, RunningMoments] = {}
+        self.at_risk = np.zeros(self.n_years, dtype=np.int64)
+
+    def update(self, results: Dict[str, np.ndarray]) -> None:
+        """Fold in one chunk of batch results ({column: (paths, years)})."""
+        self.n_paths += len(results["Net Cash Flow"])
+        for col, values in results.items():
+            self.moments.setdefault(col, RunningMoments(self.n_years)).update(values)
+        for col, sketch in self.sketches.items():
+            sketch.update(results[col])
+        self.at_risk += (results["Net Cash Flow"] < TIGHT_CASH_FLOW).sum(axis=0)
+
+    def merge(self, other: "StreamingSummary") -> None:
+        self.n_paths += other.n_paths
+        for col, moments in other.moments.items():
+            self.moments.setdefault(col, RunningMoments(self.n_years)).merge(moments)
+        for col, sketch in self.sketches.items():
+            sketch.merge(other.sketches[col])
+        self.at_risk += other.at_risk
+
+    def bands(self, percentiles: Sequence[float] = FAN_PERCENTILES) -> Dict[str, np.ndarray]:
+        """Same layout as montecarlo.percentile_bands()."""
+        return {col: sketch.percentiles(percentiles) for col, sketch in self.sketches.items()}
+
+    def rank_error_bound(self) -> float:
+        return max((s.rank_error_bound() for s in self.sketches.values()), default=0.0)
@@ -0,0 +1,41 @@
+"""
+The state a single simulation carries from one year to the next.
+
+Everything else about a year is closed-form, so this is all there is:
+investable cash, the two retirement balances and the pharmacy seller
+note. It lives in a RunState, a small __slots__ object that simulate_year()
+advances in place and that is cheap to copy, so a run can be checkpointed
+(IncrementalSimulator keeps one per year) and continued from any year.
+
+Batched runs (batch.run_batch) keep the same quantities as per-run arrays
+inside their year loop and always start from year 0.
+"""
+
+RUN_STATE_FIELDS = ("cash", "cody_ret", "lauren_ret", "ph_note_balance", "ph_annual_payment", "ph_active")
+
+
+class RunState:
+    """Carried state of one scenario at the start (or end) of a year."""
+    __slots__ = RUN_STATE_FIELDS
+
+    def __init__(self, cash: float = 0.0, cody_ret: float = 0.0, lauren_ret: float = 0.0,
+                 ph_note_balance: float = 0.0, ph_annual_payment: float = 0.0, ph_active: bool = False):
+        self.cash = cash
+        self.cody_ret = cody_ret
+        self.lauren_ret = lauren_ret
+        self.ph_note_balance = ph_note_balance
+        self.ph_annual_payment = ph_annual_payment
+        self.ph_active = ph_active
+
+    def astuple(self) -> tuple:
+        return (self.cash, self.cody_ret, self.lauren_ret, self.ph_note_balance, self.ph_annual_payment, self.ph_active)
+
+    def copy(self) -> "RunState":
+        """A snapshot; later updates to either object don't affect the other."""
+        return RunState(*self.astuple())
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, RunState) and self.astuple() == other.astuple()
+
+    def __repr__(self) -> str:
+        return "RunState(" + ", ".join(f"{n}={getattr(self, n)!r}" for n in RUN_STATE_FIELDS) + ")"
@@ -0,0 +1,85 @@
+"""
+Two-input grid sweeps for heatmaps.
+
+Any two knobs (see sensitivity.sensitivity_knobs) are swept over a grid.
+The base scenario is stacked once and the grid is written straight into the
+stacked arrays, so cells are simulated in batched calls without building a
+Scenario per cell. Results are cached per grid row: moving or extending the
+y range only simulates rows not seen before, and every metric comes out of
+the same run.
+"""
+from collections import OrderedDict
+from typing import Dict, Sequence
+
+import numpy as np
+
+from batch import run_batch
+from engine import Scenario
+from sensitivity import Knob, stack_knobs
+
+SWEEP_METRICS = ["Final Net Worth", "Minimum Investable Cash", "Years Below Min Cash Reserve"]
+
+# Cells per run_batch() call; bounds the (cells x years) arrays
+SWEEP_CHUNK = 2500
+ROW_CACHE_SIZE = 4096
+
+_row_cache: "OrderedDict[tuple, Dict[str, np.ndarray]]" = OrderedDict()
+
+
+def default_range(knob: Knob, s: Scenario) -> tuple:
+    """A starting (lo, hi) for the sliders: the whole horizon for years, else ±50% of the current value."""
+    value = knob.value(s)
+    if isinstance(value, int) and (knob.field.endswith("_year") or knob.field.endswith("_start")):
+        return 0, int(s.horizon_years)
+    if value == 0:
+        return 0, 1
+    lo, hi = sorted((value * 0.5, value * 1.5))
+    return (int(lo), int(round(hi))) if isinstance(value, int) else (lo, hi)
+
+
+def grid_values(knob: Knob, s: Scenario, lo: float, hi: float, n: int) -> list:
+    """n evenly spaced values from lo to hi; whole-number inputs get each whole number once."""
+    values = np.linspace(lo, hi, int(n))
+    if isinstance(knob.value(s), int):
+        return [int(v) for v in np.unique(np.round(values))]
+    return [float(v) for v in values]
+
+
+def _metrics(results: Dict[str, np.ndarray], reserves: np.ndarray) -> Dict[str, np.ndarray]:
+    cash = results["Investable Cash"]
+    return {
+        "Final Net Worth": results["Net Worth"][:, -1],
+        "Minimum Investable Cash": cash.min(axis=1),
+        "Years Below Min Cash Reserve": (cash < reserves[:, None]).sum(axis=1),
+    }
+
+
+def run_sweep(s: Scenario, knob_x: Knob, xs: Sequence, knob_y: Knob, ys: Sequence) -> Dict[str, np.ndarray]:
+    """{metric: array (len(ys), len(xs))} for every metric in SWEEP_METRICS."""
+    if knob_x == knob_y:
+        raise ValueError("pick two different inputs")
+    xs, ys = tuple(xs), tuple(ys)
+    keys = [(s, knob_x, xs, knob_y, y) for y in ys]
+    missing = list(dict.fromkeys(k for k in keys if k not in _row_cache))
+
+    fresh = {}
+    if missing:
+        rows_per_chunk = max(1, SWEEP_CHUNK // len(xs))
+        for start in range(0, len(missing), rows_per_chunk):
+            chunk = missing[start:start + rows_per_chunk]
+            row_ys = [key[-1] for key in chunk]
+            hh, props = stack_knobs(s, [(knob_y, np.repeat(row_ys, len(xs))), (knob_x, np.tile(xs, len(row_ys)))])
+            results = run_batch(hh, props, s.years, columns=["Investable Cash", "Net Worth"])
+            metrics = _metrics(results, hh["min_cash_reserve"])
+            for i, key in enumerate(chunk):
+                fresh[key] = {m: v.reshape(len(row_ys), len(xs))[i] for m, v in metrics.items()}
+
+    rows = []
+    for key in keys:
+        if key in fresh:
+            _row_cache[key] = fresh[key]
+        _row_cache.move_to_end(key)
+        rows.append(_row_cache[key])
+        if len(_row_cache) > ROW_CACHE_SIZE:
+            _row_cache.popitem(last=False)
+    return {m: np.stack([r[m] for r in rows]) for m in SWEEP_METRICS}
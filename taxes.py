@@ -0,0 +1,199 @@
+"""
+Vectorized tax estimator with a registry of yearly tax tables.
+
+Tables live in tax_tables/<year>.json (standard deduction and brackets per
+filing status, plus the Social Security wage base). A table is read the
+first time it is used and then cached for the life of the process. To add
+a year, drop in another file with the same layout.
+
+A simulation applies its chosen table in year 0 and indexes brackets,
+deductions and the wage base by `tax_indexation_pct` per year after that
+(0 = the table stays frozen). Each table is compiled once into bracket
+bounds, rates and the cumulative tax owed at every bound. Indexation
+scales every bound by the same factor, so a year's bracket is found by
+dividing income by that year's factor and running one np.searchsorted
+over the year-0 bounds; the tax is then a multiply-add. FICA is plain
+elementwise array math.
+"""
+import json
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+TAX_MODE_SIMPLE = "Simple effective tax %"
+TAX_MODE_ESTIMATE = "Estimate taxes (federal + optional state + optional FICA)"
+
+TAX_TABLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tax_tables")
+DEFAULT_TAX_YEAR = "2026"
+FILING_STATUSES = ["Single", "Married Filing Jointly", "Head of Household", "Married Filing Separately"]
+# Used for a filing status a table doesn't list
+FALLBACK_FILING_STATUS = "Married Filing Jointly"
+
+SS_RATE = 0.062
+MEDICARE_RATE = 0.0145
+ADDL_MEDICARE_RATE = 0.009
+
+
+# -----------------------------
+# Table registry
+# -----------------------------
+@dataclass(frozen=True)
+class TaxTable:
+    """One tax year's tables, as published (brackets are (rate, lower, upper_or_None))."""
+    tax_year: str
+    standard_deduction: Dict[str, float]
+    brackets: Dict[str, List[Tuple[float, float, float]]]
+    ss_wage_base: float
+
+
+def available_tax_years() -> List[str]:
+    """Every tax year with a table file, oldest first."""
+    return sorted(name[:-5] for name in os.listdir(TAX_TABLE_DIR) if name.endswith(".json"))
+
+
+@lru_cache(maxsize=None)
+def load_tax_table(tax_year: str) -> TaxTable:
+    """Read and check tax_tables/<tax_year>.json (once per process)."""
+    path = os.path.join(TAX_TABLE_DIR, f"{tax_year}.json")
+    if not os.path.exists(path):
+        raise ValueError(f"no tax table for {tax_year!r}; available: {', '.join(available_tax_years())}")
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+
+    brackets = {}
+    for status, rows in raw["brackets"].items():
+        rows = [(float(rate), float(lower), None if upper is None else float(upper)) for rate, lower, upper in rows]
+        for (_, _, upper), (_, lower, _) in zip(rows, rows[1:]):
+            if upper != lower:
+                raise ValueError(f"{path}: {status} brackets must be contiguous and ascending")
+        if not rows or rows[-1][2] is not None:
+            raise ValueError(f"{path}: {status} needs a top bracket with no upper bound")
+        brackets[status] = rows
+    if FALLBACK_FILING_STATUS not in brackets:
+        raise ValueError(f"{path}: missing {FALLBACK_FILING_STATUS} brackets")
+
+    return TaxTable(
+        tax_year=str(tax_year),
+        standard_deduction={k: float(v) for k, v in raw["standard_deduction"].items()},
+        brackets=brackets,
+        ss_wage_base=float(raw["ss_wage_base"]),
+    )
+
+
+# -----------------------------
+# Compiled brackets
+# -----------------------------
+@dataclass(frozen=True)
+class BracketTable:
+    """Bracket lower bounds, marginal rates and the tax owed at each lower bound."""
+    lower: np.ndarray
+    rate: np.ndarray
+    base: np.ndarray
+    standard_deduction: float
+    ss_wage_base: float
+
+
+@lru_cache(maxsize=None)
+def bracket_table(tax_year: str, filing_status: str) -> BracketTable:
+    table = load_tax_table(str(tax_year))
+    brackets = table.brackets.get(filing_status, table.brackets[FALLBACK_FILING_STATUS])
+    rate = np.array([b[0] for b in brackets], dtype=float)
+    lower = np.array([b[1] for b in brackets], dtype=float)
+    upper = np.array([np.inf if b[2] is None else b[2] for b in brackets], dtype=float)
+    base = np.concatenate(([0.0], np.cumsum((upper[:-1] - lower[:-1]) * rate[:-1])))
+    return BracketTable(lower, rate, base, table.standard_deduction.get(filing_status, 0.0), table.ss_wage_base)
+
+
+def indexation(index_rate_pct, n_years: int) -> np.ndarray:
+    """Indexation factor per year, (..., n_years); 1.0 in year 0."""
+    rate = np.asarray(index_rate_pct, dtype=float)[..., None]
+    return (1.0 + rate / 100.0) ** np.arange(n_years)
+
+
+def _bracket_tax(table: BracketTable, ti: np.ndarray, factor: np.ndarray) -> np.ndarray:
+    """Tax on incomes `ti` under `table` with every bound scaled by `factor` (same shape as ti)."""
+    i = np.searchsorted(table.lower, ti / factor, side="right") - 1
+    idx = np.maximum(i, 0)
+    return np.where(i < 0, 0.0, table.base[idx] * factor + (ti - table.lower[idx] * factor) * table.rate[idx])
+
+
+@dataclass(frozen=True)
+class ProjectedTaxes:
+    """
+    Year-0 bracket tables plus the indexation factor per simulated year
+    (..., years); deduction and wage base are already indexed. Runs that mix
+    tax years or filing statuses keep one table per setting, and `group`
+    maps each of the N runs to its table.
+    """
+    tables: Tuple[BracketTable, ...]
+    factor: np.ndarray
+    standard_deduction: np.ndarray
+    ss_wage_base: np.ndarray
+    group: Optional[np.ndarray] = None
+
+    def federal_tax(self, taxable_income) -> np.ndarray:
+        """Tax on taxable income shaped (..., years), each year taxed with that year's brackets."""
+        ti = np.maximum(0.0, np.asarray(taxable_income, dtype=float))
+        ti, factor = np.broadcast_arrays(ti, self.factor)
+        if self.group is None:
+            return _bracket_tax(self.tables[0], ti, factor)
+        tax = np.empty(ti.shape)
+        for g, table in enumerate(self.tables):
+            rows = self.group == g
+            tax[rows] = _bracket_tax(table, ti[rows], factor[rows])
+        return tax
+
+
+def _project(table: BracketTable, factor: np.ndarray) -> ProjectedTaxes:
+    return ProjectedTaxes(
+        tables=(table,),
+        factor=factor,
+        standard_deduction=table.standard_deduction * factor,
+        ss_wage_base=table.ss_wage_base * factor,
+    )
+
+
+@lru_cache(maxsize=256)
+def project_taxes(tax_year: str, filing_status: str, index_rate_pct: float, n_years: int) -> ProjectedTaxes:
+    """One household's tables for every simulated year, computed once per distinct setting."""
+    return _project(bracket_table(str(tax_year), str(filing_status)), indexation(float(index_rate_pct), int(n_years)))
+
+
+def project_taxes_batch(tax_year, filing_status, index_rate_pct, n_years: int) -> ProjectedTaxes:
+    """
+    Tables for N runs at once. When every run shares one setting (the usual
+    case) the result is project_taxes()'s and broadcasts; otherwise the factor,
+    deduction and wage base are (N, years), with one bracket table per
+    (tax year, filing status) group.
+    """
+    settings = np.stack([np.asarray(tax_year).astype(str), np.asarray(filing_status).astype(str)], axis=1)
+    index_rate_pct = np.asarray(index_rate_pct, dtype=float)
+    keys, group = np.unique(settings, axis=0, return_inverse=True)
+    group = group.ravel()
+    if len(keys) == 1 and (index_rate_pct == index_rate_pct[0]).all():
+        return project_taxes(keys[0][0], keys[0][1], float(index_rate_pct[0]), n_years)
+
+    factor = indexation(index_rate_pct, n_years)
+    tables = tuple(bracket_table(year, status) for year, status in keys.tolist())
+    std = np.array([t.standard_deduction for t in tables])[group][:, None] * factor
+    ss = np.array([t.ss_wage_base for t in tables])[group][:, None] * factor
+    return ProjectedTaxes(tables, factor, std, ss, group if len(tables) > 1 else None)
+
+
+# -----------------------------
+# FICA
+# -----------------------------
+def fica_tax(wages, ss_wage_base, addl_medicare_threshold) -> np.ndarray:
+    """
+    Employee-side FICA on an array of wages: SS up to the wage base,
+    Medicare on all wages, Additional Medicare above the threshold.
+    """
+    w = np.maximum(0.0, np.asarray(wages, dtype=float))
+    return (
+        np.minimum(w, ss_wage_base) * SS_RATE
+        + w * MEDICARE_RATE
+        + np.maximum(0.0, w - addl_medicare_threshold) * ADDL_MEDICARE_RATE
+    )
@@ -0,0 +1,52 @@
+import os
+import random
+import sys
+from dataclasses import replace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import TAX_MODE_ESTIMATE, TAX_MODE_SIMPLE, PropertyInputs, Scenario  # noqa: E402
+
+
+def random_scenario(rng: random.Random, horizon_years: int = None) -> Scenario:
+    """A scenario with the main features switched on at random: rentals, HELOC draws, sales, taxes, pharmacy."""
+    props = []
+    for i in range(rng.randint(0, 4)):
+        heloc = rng.random() < 0.5
+        props.append(PropertyInputs(
+            name=f"R{i}",
+            purchase_year=rng.randint(0, 8),
+            liquidation_year=rng.choice([0, rng.randint(5, 20)]),
+            purchase_price=rng.uniform(150000, 400000),
+            mortgage_rate=rng.uniform(0.03, 0.08),
+            gross_rent_month=rng.uniform(1200, 3500),
+            rent_start_year=rng.randint(0, 8),
+            heloc_enabled=heloc,
+            heloc_cltv=0.8 if heloc else 0.0,
+            heloc_draw_year=rng.randint(1, 12) if heloc else 0,
+            heloc_draw_amount=rng.uniform(0, 60000) if heloc else 0.0,
+        ))
+        props[-1] = replace(props[-1], value_year0=props[-1].purchase_price)
+    return Scenario(
+        horizon_years=horizon_years or rng.randint(5, 40),
+        properties=tuple(props),
+        cody_gross0=rng.uniform(60000, 250000),
+        lauren_gross0=rng.uniform(0, 120000),
+        tax_mode=rng.choice([TAX_MODE_SIMPLE, TAX_MODE_ESTIMATE]),
+        tax_indexation_pct=rng.choice([0.0, 2.5]),
+        base_living_expenses=rng.uniform(50000, 120000),
+        pharmacy_buyin_enabled=rng.random() < 0.5,
+        pharmacy_buyin_year=rng.randint(0, 6),
+        student_loan_years=rng.randint(5, 25),
+        student_loan_start_year=rng.randint(0, 3),
+        retirement_return=rng.uniform(3, 9),
+        cody_contrib_pct=rng.uniform(0, 10),
+        starting_cash=rng.uniform(0, 100000),
+    )
+
+
+@pytest.fixture
+def rng() -> random.Random:
+    return random.Random(1234)
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from batch import BATCH_COLUMNS, simulate_batch
+from conftest import random_scenario
+from engine import Scenario, simulate
+
+
+def assert_matches_simulate(results, k, s):
+    ref = simulate(s)
+    for col in BATCH_COLUMNS:
+        np.testing.assert_allclose(results[col][k], ref[col].to_numpy(dtype=float), rtol=1e-9, atol=1e-6,
+                                   err_msg=col)
+
+
+def test_batch_matches_simulate_per_scenario(rng):
+    for _ in range(25):
+        s = random_scenario(rng)
+        assert_matches_simulate(simulate_batch([s]), 0, s)
+
+
+def test_stacked_batch_matches_simulate(rng):
+    scenarios = [random_scenario(rng, horizon_years=25) for _ in range(20)]
+    results = simulate_batch(scenarios)
+    for k, s in enumerate(scenarios):
+        assert_matches_simulate(results, k, s)
+
+
+@pytest.mark.parametrize("term, start", [(20, 1), (5, 0), (10, 3)])
+def test_student_loan_paid_for_its_term(term, start):
+    s = Scenario(horizon_years=30, student_loan_years=term, student_loan_start_year=start)
+    annual = simulate(s)
+    paid = annual["Student Loan Pay"].to_numpy()
+    assert (paid > 0).sum() == term
+    assert paid[start + term - 1] > 0
+    assert annual["Student Loan Remaining"].iloc[start + term - 1] == 0
+    np.testing.assert_allclose(paid, simulate_batch([s])["Student Loan Pay"][0], rtol=1e-9)
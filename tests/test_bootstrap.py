@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+import bootstrap
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    cache = tmp_path / "cache"
+    monkeypatch.setattr(bootstrap, "HISTORY_CACHE_DIR", str(cache))
+    bootstrap._open_history.cache_clear()
+    yield cache
+    bootstrap._open_history.cache_clear()
+
+
+def test_csv_sidecar_goes_to_the_cache_dir(tmp_path, cache_dir):
+    data = tmp_path / "data"
+    data.mkdir()
+    csv = data / "returns.csv"
+    csv.write_text("retirement_return,value_growth\n0.07,0.03\n-0.12,0.01\n0.21,0.05\n")
+    history = bootstrap.load_history(str(csv))
+    np.testing.assert_array_equal(history["retirement_return"], [0.07, -0.12, 0.21])
+    assert isinstance(history, np.memmap)
+    assert [p.name for p in data.iterdir()] == ["returns.csv"]
+    assert len(list(cache_dir.glob("*.npy"))) == 1
+
+
+@pytest.mark.parametrize("row", ["0.07,\n", "n/a,0.02\n"])
+def test_blank_or_text_cells_are_rejected(tmp_path, cache_dir, row):
+    csv = tmp_path / "returns.csv"
+    csv.write_text("retirement_return,value_growth\n0.05,0.02\n" + row)
+    with pytest.raises(ValueError, match="data row 2"):
+        bootstrap.load_history(str(csv))
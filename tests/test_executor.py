@@ -0,0 +1,28 @@
+import numpy as np
+
+from engine import PropertyInputs, Scenario
+from executor import run_sharded
+from montecarlo import MonteCarloSpec
+
+
+def assert_same_summary(a, b):
+    assert a.n_paths == b.n_paths
+    for name in ("bands", "mean", "std"):
+        for col, values in getattr(a, name).items():
+            np.testing.assert_array_equal(values, getattr(b, name)[col], err_msg=f"{name}[{col}]")
+    np.testing.assert_array_equal(a.at_risk_share, b.at_risk_share)
+    assert a.rank_error == b.rank_error
+
+
+def test_worker_count_does_not_change_results():
+    s = Scenario(horizon_years=15, properties=Scenario().properties + (PropertyInputs(name="Duplex"),))
+    spec = MonteCarloSpec(n_paths=1300, seed=11, vacancy_sd=2.0, property_correlation=0.3)
+    one = run_sharded(s, spec, workers=1, shard_paths=250)
+    assert_same_summary(one, run_sharded(s, spec, workers=3, shard_paths=250))
+
+
+def test_seed_changes_results():
+    s = Scenario(horizon_years=10)
+    a = run_sharded(s, MonteCarloSpec(n_paths=300, seed=1), workers=1, shard_paths=100)
+    b = run_sharded(s, MonteCarloSpec(n_paths=300, seed=2), workers=1, shard_paths=100)
+    assert not np.array_equal(a.mean["Net Worth"], b.mean["Net Worth"])
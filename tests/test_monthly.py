@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from conftest import random_scenario
+from engine import Scenario, simulate
+from monthly import simulate_monthly
+
+# Annual figures that the monthly mode only spreads over the months, so the roll-up must give them back
+SPREAD_COLUMNS = [
+    "Cody Gross", "Lauren Gross", "Other Gross", "Income (Net Total)", "Estimated Taxes (Total)",
+    "Expenses (non-property)", "Retirement Employee Contrib", "Retirement Employer Match", "IRA Contributions",
+    "Mortgage Savings", "Pharmacy Profit", "New Home PITI+HOA (annual)",
+]
+
+
+def test_spread_flows_roll_up_to_annual(rng):
+    for _ in range(10):
+        s = random_scenario(rng)
+        annual, monthly = simulate(s), simulate_monthly(s)
+        for col in SPREAD_COLUMNS:
+            np.testing.assert_allclose(monthly[col], annual[col], rtol=1e-9, atol=1e-6, err_msg=col)
+
+
+@pytest.mark.parametrize("term, start", [(20, 1), (5, 0), (10, 3)])
+def test_student_loan_matches_annual(term, start):
+    s = Scenario(horizon_years=30, student_loan_years=term, student_loan_start_year=start)
+    annual, monthly = simulate(s), simulate_monthly(s)
+    for col in ("Student Loan Pay", "Student Loan Remaining"):
+        np.testing.assert_allclose(monthly[col], annual[col], rtol=1e-9, atol=1e-6, err_msg=col)
@@ -0,0 +1,33 @@
+import io
+
+import numpy as np
+import pytest
+
+import report
+from engine import Scenario
+from executor import iter_shards
+from montecarlo import MonteCarloSpec
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_monte_carlo_export_holds_every_path(fmt):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    s, spec = Scenario(horizon_years=10), MonteCarloSpec(n_paths=250, seed=3)
+    data = report.monte_carlo_export(s, spec, fmt, ["Net Worth"], shard_paths=100)
+    table = pq.read_table(io.BytesIO(data)) if fmt == "parquet" else pa.ipc.open_file(data).read_all()
+    assert table.num_rows == 250 * 11
+    expected = np.concatenate([r["Net Worth"].reshape(-1) for _, r in iter_shards(s, spec, 100)])
+    np.testing.assert_array_equal(table.column("Net Worth").to_numpy(), expected)
+    assert table.column("Run").to_numpy()[-1] == 249
+
+
+def test_oversized_exports_are_not_cached(monkeypatch):
+    monkeypatch.setattr(report, "_cache", report.OrderedDict())
+    monkeypatch.setattr(report, "EXPORT_CACHE_BYTES", 10)
+    assert report.cached_export(("small",), lambda: b"12345") == b"12345"
+    assert report.cached_export(("big",), lambda: b"x" * 11) == b"x" * 11
+    assert list(report._cache) == [("small",)]
+    report.cached_export(("second",), lambda: b"678901")
+    assert list(report._cache) == [("second",)]
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from sketches import QuantileSketch
+
+PERCENTILES = [1, 10, 25, 50, 75, 90, 99]
+
+
+def rank_error(sketch: QuantileSketch, values: np.ndarray) -> float:
+    """Worst distance, as a share of the paths, between each estimate's rank and its target rank."""
+    estimates = sketch.percentiles(PERCENTILES)
+    ordered = np.sort(values, axis=0)
+    n = len(values)
+    worst = 0.0
+    for p, row in zip(PERCENTILES, estimates):
+        target = p / 100.0 * (n - 1)
+        for t, x in enumerate(row):
+            lo = np.searchsorted(ordered[:, t], x, side="left")
+            hi = np.searchsorted(ordered[:, t], x, side="right") - 1
+            worst = max(worst, max(0.0, lo - 1 - target, target - hi - 1) / n)
+    return worst
+
+
+def test_exact_below_k():
+    values = np.random.default_rng(0).normal(size=(500, 6))
+    sketch = QuantileSketch(6, k=512)
+    sketch.update(values)
+    assert sketch.rank_error_bound() == 0.0
+    np.testing.assert_allclose(sketch.percentiles(PERCENTILES), np.percentile(values, PERCENTILES, axis=0))
+
+
+@pytest.mark.parametrize("k", [64, 256])
+def test_rank_error_within_bound(k):
+    rng = np.random.default_rng(k)
+    values = rng.lognormal(size=(40000, 5))
+    sketch = QuantileSketch(5, k=k)
+    for chunk in np.array_split(values, 37):
+        sketch.update(chunk)
+    bound = sketch.rank_error_bound()
+    assert 0 < bound < 1
+    assert rank_error(sketch, values) <= bound
+
+
+def test_merged_sketches_keep_the_bound():
+    rng = np.random.default_rng(5)
+    parts = [rng.normal(size=(7000, 3)) for _ in range(6)]
+    total = QuantileSketch(3, k=128)
+    for part in parts:
+        sketch = QuantileSketch(3, k=128)
+        sketch.update(part)
+        total.merge(sketch)
+    assert total.count == 42000
+    assert rank_error(total, np.concatenate(parts)) <= total.rank_error_bound()
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from taxes import (
+    DEFAULT_TAX_YEAR,
+    FALLBACK_FILING_STATUS,
+    FILING_STATUSES,
+    fica_tax,
+    load_tax_table,
+    project_taxes,
+    project_taxes_batch,
+)
+
+N_YEARS = 25
+
+
+def reference_tax(income: float, status: str, factor: float = 1.0) -> float:
+    """Walk the published brackets one at a time, every bound scaled by factor."""
+    table = load_tax_table(DEFAULT_TAX_YEAR)
+    tax = 0.0
+    for rate, lower, upper in table.brackets.get(status, table.brackets[FALLBACK_FILING_STATUS]):
+        top = income if upper is None else min(income, upper * factor)
+        tax += max(0.0, top - lower * factor) * rate
+    return tax
+
+
+def incomes(status: str, rng) -> np.ndarray:
+    """Random incomes (some negative) with one row exactly on the bracket bounds, where an off-by-one lookup shows."""
+    income = rng.uniform(-5000, 1.5e6, (40, N_YEARS))
+    bounds = [lo for _, lo, _ in load_tax_table(DEFAULT_TAX_YEAR).brackets.get(status, [])][:N_YEARS]
+    income[0, : len(bounds)] = bounds
+    return income
+
+
+@pytest.mark.parametrize("status", FILING_STATUSES)
+@pytest.mark.parametrize("index_pct", [0.0, 3.0])
+def test_federal_tax_matches_bracket_walk(status, index_pct):
+    income = incomes(status, np.random.default_rng(7))
+    factor = (1 + index_pct / 100.0) ** np.arange(N_YEARS)
+    got = project_taxes(DEFAULT_TAX_YEAR, status, index_pct, N_YEARS).federal_tax(income)
+    ref = np.array([[reference_tax(x, status, factor[t]) for t, x in enumerate(row)] for row in income])
+    np.testing.assert_allclose(got, ref, rtol=1e-12, atol=1e-6)
+
+
+def test_mixed_batch_matches_per_run_tables():
+    n = len(FILING_STATUSES)
+    rates = np.linspace(0.0, 3.0, n)
+    taxes = project_taxes_batch([DEFAULT_TAX_YEAR] * n, FILING_STATUSES, rates, N_YEARS)
+    income = np.random.default_rng(3).uniform(0, 9e5, (n, N_YEARS))
+    expected = np.stack([
+        project_taxes(DEFAULT_TAX_YEAR, status, float(rate), N_YEARS).federal_tax(income[k])
+        for k, (status, rate) in enumerate(zip(FILING_STATUSES, rates))
+    ])
+    np.testing.assert_array_equal(taxes.federal_tax(income), expected)
+
+
+def test_fica_caps_social_security_at_the_wage_base():
+    base = load_tax_table(DEFAULT_TAX_YEAR).ss_wage_base
+    low, high = fica_tax(np.array([base, base * 2]), base, np.inf)
+    assert high - low == pytest.approx(base * 0.0145)